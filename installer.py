@@ -53,8 +53,8 @@ PERSISTENT_FILE = BASE_DIR / "data" / "persistent.json"
 # which setuptools >= 58 refuses to run. That makes `pip install -r
 # requirements.txt` fail, which makes install_dependencies() return False, which
 # aborts the whole installer -- for a package that does nothing.
+# `tqdm` was dropped too: nothing imports it any more.
 REQUIREMENTS_TEXT = """requests>=2.31.0
-tqdm>=4.66.1
 urllib3>=2.1.0
 """
 
@@ -1,22 +1,31 @@
 # Script: `.\launcher.py`
 
 # Imports
-print("Starting `launcher` Imports.")
 import os, sys, time
 from pathlib import Path
 from typing import Dict
 
 # Set platform from command line argument FIRST
+# argv[1] is either the platform name passed by DownLord.bat / DownLord.sh, or
+# a headless command (`launcher.py get URL...`, `daemon`, `queue ...`; see
+# scripts/headless.py and scripts/daemon.py).
+# Headless runs keep stdout for JSON, so they skip the chatter below as well.
 from scripts import temporary
-if len(sys.argv) > 1:
+HEADLESS_COMMAND = len(sys.argv) > 1 and sys.argv[1].lower() in temporary.CLI_COMMANDS
+if HEADLESS_COMMAND:
+    temporary.HEADLESS = True
+elif len(sys.argv) > 1:
     temporary.PLATFORM = sys.argv[1].lower()
+if not HEADLESS_COMMAND:
+    print("Starting `launcher` Imports.")
 
 # Now import other modules
 from scripts.configure import Config_Manager, get_downloads_path, check_environment
 from scripts.interface import prompt_for_download, display_error, clear_screen  # Explicitly include clear_screen
 from scripts.manage import handle_orphaned_files
-from scripts.temporary import DOWNLOADS_DIR, APP_TITLE, BASE_DIR, TEMP_DIR
-print("`launcher` Imports Complete.")
+from scripts.temporary import DOWNLOADS_DIR, APP_TITLE, BASE_DIR, PARTIAL_DIRNAME, RUNTIME_CONFIG
+if not HEADLESS_COMMAND:
+    print("`launcher` Imports Complete.")
 
 # Initialize
 def initialize_startup(platform: str) -> Dict:
@@ -31,6 +40,25 @@ def initialize_startup(platform: str) -> Dict:
         
     config = Config_Manager.load()
     handle_orphaned_files(config)
+
+    # Optional JSON-lines event stream for monitoring the interactive session.
+    event_target = RUNTIME_CONFIG["interface"].get("event_stream")
+    if event_target:
+        from scripts.events import EVENTS
+        try:
+            EVENTS.open(event_target)
+            EVENTS.start_progress()
+        except OSError as e:
+            print(f"Event stream unavailable ({event_target}): {e}")
+
+    # Optional Prometheus endpoint; see scripts/metrics.py.
+    metrics_port = RUNTIME_CONFIG["interface"].get("metrics_port")
+    if metrics_port:
+        from scripts.metrics import METRICS
+        try:
+            METRICS.serve(port=int(metrics_port))
+        except OSError as e:
+            print(f"Metrics endpoint unavailable (port {metrics_port}): {e}")
     
     # Resolve downloads location
     downloads_location_str = config.get("downloads_location", "downloads")
@@ -41,7 +69,7 @@ def initialize_startup(platform: str) -> Dict:
     
     try:
         downloads_path.mkdir(parents=True, exist_ok=True)
-        TEMP_DIR.mkdir(parents=True, exist_ok=True)
+        (downloads_path / PARTIAL_DIRNAME).mkdir(parents=True, exist_ok=True)
     except Exception as e:
         print(f"Error creating directories: {str(e)}")
         sys.exit(1)
@@ -76,4 +104,7 @@ def main():
         time.sleep(3)
 
 if __name__ == "__main__":
+    if HEADLESS_COMMAND:
+        from scripts.headless import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
     main()
\ No newline at end of file
@@ -0,0 +1,750 @@
+# Script: `.\scripts\benchmark.py`
+
+# Imports
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# ── Benchmark harness ────────────────────────────────────────────────────────
+# `python -m scripts.benchmark [--size MB] [--scenario NAME ...] [--json]`
+#
+# Runs the real engine -- DownloadManager.download_file, headless -- against a
+# local fake origin, so throughput and regressions can be measured the same way
+# on any machine.  The origin runs in its own process, so the CPU figures below
+# are DownLord's alone.
+#
+# Scenarios, one per behaviour the engine special-cases:
+#
+#   range       well-behaved: HEAD, Range -> 206, Accept-Ranges
+#   norange     ignores Range and always sends 200 + the whole body, and drops
+#               the first response halfway -- the no_resume restart path
+#   noterm      chunked transfer encoding that closes without the terminating
+#               0-length chunk (SourceForge) -- the completion check
+#   ratelimit   first GET is 429 with Retry-After: 1
+#   disconnect  first GET is cut off halfway; the retry must resume with Range
+#   requeue-abort  run under a Scheduler: the first GET is 429, so the job is
+#               requeued; the second stalls STALL_AFTER bytes in, inside the
+#               first chunk, and the job is cancelled there.  The stop must
+#               come within ABORT_BUDGET_MS -- the requeued job's abort still
+#               interrupts the read (scripts/cancel.py) -- at exactly the
+#               .part's size; an ordinary run then resumes and finishes it.
+#               Pooled receive path only: iter_content reads cannot be cut.
+#
+# Reported per run:
+#   MB/s        payload bytes / wall time of download_file
+#   CPU s/GB    process CPU time (all threads) per GB of payload
+#   syscr/syscw read- and write-type syscalls, from /proc/self/io (Linux only;
+#               socket recv() is not counted there, file writes and fsyncs are)
+#   TTFB        download_file call to the response headers of the body request
+#               (the `resume` event), probe included
+#   attempts    as counted by the engine
+#
+# Every run is checked byte-for-byte (SHA-256) against what the origin served,
+# and fails if the scenario's misbehaviour never reached the engine: fewer
+# tries than MIN_ATTEMPTS, or fewer of a built-in fault script's faults fired.
+# An extra request before the body would otherwise use up the origin's
+# "first GET" or a fault's nth request unnoticed.
+# --throttle limits each origin connection to that many bytes per second.
+#
+# The fault-* scenarios run against the well-behaved origin with the client's
+# FaultInjectingTransport (scripts/transport.py) misbehaving at exact offsets
+# instead; `--faults FILE` replays a script of your own as "custom".  They add:
+#   wasted      body bytes received beyond the file size, total and per fault
+#   refetch     bytes fetched again although already on disk -- the tail_check
+#               overlap of each resume (scripts/resume.py), plus everything if
+#               the server refused a range and forced a restart
+#   recovery    fault to the next response headers for that URL, averaged
+#
+# `--receive pooled --receive iter_content` runs every scenario once per
+# receive path (scripts/buffers.py) and adds:
+#   minflt/GB   minor page faults per GB of payload -- fresh multi-MB chunk
+#               objects are fresh mappings, faulted in page by page
+#   peak MB     tracemalloc's peak of Python allocations during the download,
+#               with --trace-alloc (which slows both paths down)
+#
+# `--io-policy normal --io-policy drop_cache` runs every scenario once per
+# page-cache policy (scripts/buffers.py: drop_cache, idle_io, or both) and adds:
+#   cache MB    how much of the downloaded file is still in the page cache right
+#               after download_file returns (mincore; Linux only)
+#   reader      with `--reader MB`: a thread re-reads a file of that size, warm
+#               in the cache beforehand, for as long as the download runs --
+#               its MB/s, and how much of it is still cached at the end.  The
+#               eviction only shows when the payload is large next to free RAM.
+#
+# `--startup` measures launch instead: a fresh interpreter imports launcher.py
+# and runs initialize_startup() against a throwaway persistent.json, up to the
+# point where the menu would be drawn.  Reported per run: the imports, the
+# initialization, the whole process, how often persistent.json was actually
+# read, and which of STARTUP_HEAVY_MODULES got loaded.  The median must stay
+# under --budget milliseconds (STARTUP_BUDGET_MS), with one config read and no
+# heavy module, or the exit status is "failed" -- a regression check for CI.
+
+SCENARIOS = ("range", "norange", "noterm", "ratelimit", "disconnect", "requeue-abort")
+FAULT_SCENARIOS = ("fault-drop", "fault-truncate", "fault-status", "fault-delay", "fault-norange")
+MIN_ATTEMPTS = {"norange": 2, "ratelimit": 2, "disconnect": 2}
+STALL_AFTER = 1024 * 1024     # requeue-abort: bytes sent before the stall
+STALL_SECONDS = 20
+ABORT_BUDGET_MS = 1000
+PAYLOAD_BLOCK = 1024 * 1024   # the payload is this block of seeded random bytes, repeated
+IO_POLICIES = {
+    "normal": {"drop_cache": False, "idle_io": False},
+    "drop_cache": {"drop_cache": True, "idle_io": False},
+    "idle": {"drop_cache": False, "idle_io": True},
+    "both": {"drop_cache": True, "idle_io": True},
+}
+STARTUP_BUDGET_MS = 100       # launcher imports + initialize_startup, median
+STARTUP_RUNS = 7
+# Nothing before the first download needs these; scripts/manage.py imports
+# them inside download_file and friends.
+STARTUP_HEAVY_MODULES = ("requests", "urllib3", "tqdm", "http.server", "http.client", "pstats",
+                         "cProfile", "tarfile", "hashlib")
+# The files under data/ that a run could write to; each run gets its own.
+DATA_FILES = ("PERSISTENT_FILE", "HISTORY_FILE", "QUEUE_FILE", "DAEMON_FILE", "REQUIREMENTS_FILE")
+
+# Runs in a fresh interpreter, so nothing this module imports is counted.
+_STARTUP_CHILD = r"""
+import sys, time
+started = time.perf_counter()
+import contextlib, io, json
+from pathlib import Path
+sys.argv = ["launcher.py", "linux"]
+sys.path.insert(0, {base!r})
+with contextlib.redirect_stdout(io.StringIO()):
+    from scripts import temporary
+    temporary.PERSISTENT_FILE = Path({config!r})
+    import launcher
+    imported = time.perf_counter()
+    launcher.initialize_startup("linux")
+    ready = time.perf_counter()
+from scripts.configure import Config_Manager
+print(json.dumps({{"import_ms": (imported - started) * 1000, "init_ms": (ready - imported) * 1000,
+                  "config_reads": Config_Manager.reads,
+                  "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+# Classes
+class _OriginHandler(BaseHTTPRequestHandler):
+    """Serves /<scenario>/<run>/<size>.bin with the behaviour named in the path."""
+
+    protocol_version = "HTTP/1.1"
+    block = b""
+    throttle = 0
+    seen: Dict = {}
+    seen_lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _parse(self):
+        parts = self.path.strip("/").split("/")
+        scenario, size = parts[0], int(parts[-1].split(".")[0])
+        with self.seen_lock:
+            nth = self.seen[self.command, self.path] = self.seen.get((self.command, self.path), 0) + 1
+        return scenario, size, nth
+
+    def _headers(self, code: int, length: Optional[int], extra: Dict[str, str] = None) -> None:
+        self.send_response(code)
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        self.send_header("ETag", '"downlord-bench"')
+        for name, value in (extra or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _body(self, start: int, end: int, chunked: bool = False) -> None:
+        """Write payload bytes [start, end), throttled if asked."""
+        view = memoryview(self.block)
+        pos = start
+        began = time.time()
+        while pos < end:
+            offset = pos % PAYLOAD_BLOCK
+            piece = view[offset:offset + min(65536, end - pos, PAYLOAD_BLOCK - offset)]
+            if chunked:
+                self.wfile.write(b"%x\r\n" % len(piece) + piece.tobytes() + b"\r\n")
+            else:
+                self.wfile.write(piece)
+            pos += len(piece)
+            if self.throttle:
+                ahead = (pos - start) / self.throttle - (time.time() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+    def _cut(self) -> None:
+        self.wfile.flush()
+        self.close_connection = True
+        self.connection.shutdown(socket.SHUT_RDWR)
+
+    def do_HEAD(self):
+        scenario, size, _ = self._parse()
+        extra = {} if scenario == "norange" else {"Accept-Ranges": "bytes"}
+        self._headers(200, size, extra)
+
+    def do_GET(self):
+        scenario, size, nth = self._parse()
+        first = nth == 1
+        if scenario in ("ratelimit", "requeue-abort") and first:
+            self._headers(429, 0, {"Retry-After": "1"})
+            return
+        if scenario == "noterm":
+            self._headers(200, None, {"Transfer-Encoding": "chunked"})
+            self._body(0, size, chunked=True)
+            self._cut()   # every byte sent, no 0\r\n\r\n
+            return
+        start, end, code = 0, size, 200
+        header = self.headers.get("Range", "")
+        if header.startswith("bytes=") and scenario != "norange":
+            first_byte, _, last_byte = header[6:].partition("-")
+            start = int(first_byte or 0)
+            end = min(int(last_byte) + 1, size) if last_byte else size
+            code = 206
+        extra = {"Content-Range": f"bytes {start}-{end - 1}/{size}"} if code == 206 else {}
+        self._headers(code, end - start, extra)
+        if scenario in ("disconnect", "norange") and first:
+            self._body(start, start + (end - start) // 2)
+            self._cut()
+            return
+        if scenario == "requeue-abort" and nth == 2:
+            self._body(start, min(end, start + STALL_AFTER))
+            self.wfile.flush()
+            time.sleep(STALL_SECONDS)   # the client is expected to hang up long before
+            self._cut()
+            return
+        self._body(start, end)
+
+
+class FakeOrigin:
+    """The fake origin, in a child process so its CPU is not counted."""
+
+    def __init__(self, throttle: int = 0):
+        self.throttle = throttle
+        self.port = None
+        self._process = None
+
+    def start(self) -> "FakeOrigin":
+        ready = multiprocessing.Queue()
+        self._process = multiprocessing.Process(target=_serve_origin, args=(ready, self.throttle), daemon=True)
+        self._process.start()
+        self.port = ready.get(timeout=10)
+        return self
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join(timeout=5)
+
+    def url(self, scenario: str, run: int, size: int) -> str:
+        return f"http://127.0.0.1:{self.port}/{scenario}/{run}/{size}.bin"
+
+
+class CacheReader:
+    """Re-reads one file in a loop on a thread: the workload the download competes with."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.bytes_read = 0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "CacheReader":
+        self._stop.clear()
+        self.bytes_read = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> float:
+        """Stop reading; returns the read rate in MB/s."""
+        self._stop.set()
+        self._thread.join()
+        return round(self.bytes_read / 1e6 / self.seconds, 1) if self.seconds else 0.0
+
+    def _run(self) -> None:
+        started = time.perf_counter()
+        with open(self.path, "rb", buffering=0) as f:
+            while not self._stop.is_set():
+                block = f.read(PAYLOAD_BLOCK)
+                if not block:
+                    f.seek(0)
+                    continue
+                self.bytes_read += len(block)
+        self.seconds = time.perf_counter() - started
+
+
+# Functions
+def fault_script(scenario: str, size: int) -> list:
+    """The built-in fault scenarios, scaled to the payload size."""
+    from .transport import Fault
+    return {
+        "fault-drop": [Fault("drop", at=size // 3), Fault("drop", at=2 * size // 3, nth=2)],
+        "fault-truncate": [Fault("truncate", at=size // 2)],
+        "fault-status": [Fault("status", status=503)],
+        "fault-delay": [Fault("delay", seconds=0.5)],
+        "fault-norange": [Fault("drop", at=size // 2), Fault("norange", nth=2)],
+    }[scenario]
+
+
+def _payload_block() -> bytes:
+    return random.Random(1).getrandbits(8 * PAYLOAD_BLOCK).to_bytes(PAYLOAD_BLOCK, "little")
+
+
+def _serve_origin(ready, throttle: int) -> None:
+    _OriginHandler.block = _payload_block()
+    _OriginHandler.throttle = throttle
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _OriginHandler)
+    server.handle_error = lambda request, client_address: None   # resets are the point
+    server.daemon_threads = True
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def expected_sha256(size: int) -> str:
+    block = _payload_block()
+    digest = hashlib.sha256()
+    whole, tail = divmod(size, PAYLOAD_BLOCK)
+    for _ in range(whole):
+        digest.update(block)
+    digest.update(block[:tail])
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def isolated_data(workdir: Path):
+    """Point DATA_FILES, in every loaded DownLord module, into `workdir`/data meanwhile.
+
+    The modules hold their own `from .temporary import HISTORY_FILE` copies,
+    so temporary alone is not enough.
+    """
+    from . import temporary
+    data = workdir / "data"
+    data.mkdir(parents=True, exist_ok=True)
+    prefix = temporary.__name__.rpartition(".")[0] + "."
+    patched = []
+    for module in [m for name, m in list(sys.modules.items()) if name.startswith(prefix)]:
+        for attr in DATA_FILES:
+            value = getattr(module, attr, None)
+            if isinstance(value, Path):
+                patched.append((module, attr, value))
+                setattr(module, attr, data / value.name)
+    try:
+        yield data
+    finally:
+        for module, attr, value in patched:
+            setattr(module, attr, value)
+
+
+def read_proc_io() -> Dict[str, int]:
+    """Counters from /proc/self/io; empty where there is no such file."""
+    try:
+        with open("/proc/self/io") as f:
+            return {k: int(v) for k, v in (line.split(":") for line in f)}
+    except OSError:
+        return {}
+
+
+def minor_faults() -> Optional[int]:
+    """Minor page faults of this process so far; None where getrusage is missing."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+
+
+def resident_bytes(path: Path) -> Optional[int]:
+    """How much of `path` is in the page cache (mincore); None where that cannot be asked."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        import ctypes
+        import mmap
+        size = path.stat().st_size
+        if size == 0:
+            return 0
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int,
+                              ctypes.c_int, ctypes.c_long)
+        libc.munmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+        libc.mincore.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p)
+        pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+        vec = (ctypes.c_ubyte * pages)()
+        with open(path, "rb") as f:
+            addr = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, f.fileno(), 0)
+            if addr in (None, ctypes.c_void_p(-1).value):
+                return None
+            try:
+                if libc.mincore(addr, size, vec) != 0:
+                    return None
+            finally:
+                libc.munmap(addr, size)
+        return min(size, sum(b & 1 for b in vec) * mmap.PAGESIZE)
+    except (ImportError, OSError, AttributeError):
+        return None
+
+
+def requeue_and_abort(dm, url: str, out_path: Path, chunk: int, events_path: Path,
+                      part_path: Path) -> Dict:
+    """The requeue-abort scenario up to the resume: a scheduled run, requeued, cancelled mid-chunk."""
+    from .scheduler import Scheduler
+
+    def events() -> List[Dict]:
+        found = []
+        for line in events_path.read_text().splitlines():
+            try:
+                found.append(json.loads(line))
+            except ValueError:
+                pass   # still being written
+        return found
+
+    scheduler = Scheduler(lambda job: dm.download_file(url, out_path, chunk, abort_event=job.abort,
+                                                       scheduled=True), max_parallel=1)
+    job = scheduler.submit(url)
+    deadline = time.time() + STALL_SECONDS
+    while time.time() < deadline and not any(e["event"] == "resume" for e in events()):
+        time.sleep(0.05)
+    time.sleep(0.3)   # well into the stall: the read is blocked on the socket
+    aborted = time.time()
+    scheduler.cancel(job)
+    job.done.wait(STALL_SECONDS)
+    stop_ms = round((time.time() - aborted) * 1000, 1) if job.done.is_set() else None
+    scheduler.stop()
+    seen = events()
+    stopped = next((e for e in seen if e["event"] == "stopped"), {})
+    return {"requeued": any(e["event"] == "waiting" for e in seen),
+            "stop_ms": stop_ms,
+            "stopped_at": stopped.get("offset"),
+            "part_size": part_path.stat().st_size if part_path.exists() else 0}
+
+
+def run_case(origin: FakeOrigin, scenario: str, run: int, size: int, chunk: int,
+             workdir: Path, faults: Optional[list] = None, receive: str = "pooled",
+             trace_alloc: bool = False, io_policy: str = "normal",
+             reader: Optional[CacheReader] = None) -> Dict:
+    """One download_file run, through a FaultInjectingTransport if `faults`."""
+    from . import temporary
+    from .temporary import PARTIAL_DIRNAME, RUNTIME_CONFIG
+    from .events import EVENTS
+    from .headless import sha256_file
+    from .manage import DownloadManager
+    from .transport import FaultInjectingTransport, Transport, use_transport
+
+    tag = f"{scenario}-{receive}-{io_policy}-{run}"
+    dest = workdir / tag
+    dest.mkdir(parents=True, exist_ok=True)
+    events_path = dest / "events.jsonl"
+    url = origin.url("range" if faults is not None else scenario, tag, size)
+    out_path = dest / f"{size}.bin"
+    part_path = dest / PARTIAL_DIRNAME / f"{size}.bin.part"
+
+    transport = FaultInjectingTransport(faults) if faults is not None else Transport()
+    if faults is not None:
+        transport.on_disk = lambda _url: part_path.stat().st_size if part_path.exists() else 0
+
+    temporary.HEADLESS = True
+    EVENTS.open(events_path)
+    dm = DownloadManager(dest, interactive=False, temp_dir=dest / PARTIAL_DIRNAME)
+    dm.config["chunk"] = chunk
+
+    overrides = dict(IO_POLICIES[io_policy], receive=receive)
+    configured = {key: RUNTIME_CONFIG["download"].get(key) for key in overrides}
+    RUNTIME_CONFIG["download"].update(overrides)
+    if reader is not None:
+        reader.start()
+    if trace_alloc:
+        tracemalloc.start()
+    io_before = read_proc_io()
+    faults_before = minor_faults()
+    cpu_before = time.process_time()
+    started = time.time()
+    stop = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()), use_transport(transport), isolated_data(dest):
+            if scenario == "requeue-abort":
+                stop = requeue_and_abort(dm, url, out_path, chunk, events_path, part_path)
+            success, error = dm.download_file(url, out_path, chunk)
+    finally:
+        RUNTIME_CONFIG["download"].update(configured)
+    wall = time.time() - started
+    cpu = time.process_time() - cpu_before
+    reader_rate = reader.stop() if reader is not None else None
+    path = dm.completed_path or out_path
+    cached = resident_bytes(path) if path.exists() else None   # before the SHA-256 reads it back in
+    hot_cached = resident_bytes(reader.path) if reader is not None else None
+    faults_after = minor_faults()
+    io_after = read_proc_io()
+    peak = None
+    if trace_alloc:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    EVENTS.close()
+
+    events = [json.loads(line) for line in events_path.read_text().splitlines() if line]
+    resumes = [e for e in events if e["event"] == "resume"]
+    complete = next((e for e in events if e["event"] == "complete"), {})
+    intact = success and path.exists() and sha256_file(path) == expected_sha256(size)
+    gigabytes = size / 1e9
+    result = {
+        "scenario": scenario,
+        "receive": receive,
+        "io_policy": io_policy,
+        "run": run,
+        "ok": bool(intact),
+        "error": error or ("" if intact else "content mismatch"),
+        "size": size,
+        "seconds": round(wall, 3),
+        "mb_per_s": round(size / 1e6 / wall, 1) if wall > 0 else 0.0,
+        "cpu_s_per_gb": round(cpu / gigabytes, 2) if gigabytes else 0.0,
+        "syscr": io_after.get("syscr", 0) - io_before.get("syscr", 0) if io_before else None,
+        "syscw": io_after.get("syscw", 0) - io_before.get("syscw", 0) if io_before else None,
+        "ttfb_ms": round((resumes[0]["time"] - started) * 1000, 1) if resumes else None,
+        "attempts": complete.get("attempts", len(resumes)),
+        "minflt_per_gb": round((faults_after - faults_before) / gigabytes)
+                         if faults_before is not None and gigabytes else None,
+        "peak_mb": round(peak / 1e6, 1) if peak is not None else None,
+        "cache_mb": round(cached / 1e6, 1) if cached is not None else None,
+        "reader_mb_per_s": reader_rate,
+        "reader_cached_mb": round(hot_cached / 1e6, 1) if hot_cached is not None else None
+    }
+    if result["ok"] and result["attempts"] < MIN_ATTEMPTS.get(scenario, 1):
+        result.update(ok=False, error=f"{result['attempts']} tries: the {scenario} behaviour was never met")
+    if stop is not None:
+        result.update(stop_ms=stop["stop_ms"], stopped_at=stop["stopped_at"])
+        if not stop["requeued"]:
+            problem = "the job was never requeued"
+        elif stop["stop_ms"] is None or stop["stop_ms"] > ABORT_BUDGET_MS:
+            problem = f"the abort took {stop['stop_ms']} ms: the blocked read was not interrupted"
+        elif stop["stopped_at"] != stop["part_size"]:
+            problem = f"stopped at {stop['stopped_at']} with {stop['part_size']} bytes on disk"
+        else:
+            problem = None
+        if problem and result["ok"]:
+            result.update(ok=False, error=problem)
+    if faults is not None:
+        fired = len(transport.fault_log)
+        wasted = max(0, transport.delivered.get(url, 0) - size)
+        recoveries = [r["recovery"] for r in transport.requests if r["recovery"] is not None]
+        result.update({
+            "faults": fired,
+            "wasted_bytes": wasted,
+            "wasted_per_fault": wasted // fired if fired else 0,
+            "refetched_bytes": transport.refetched(url),
+            "recovery_ms": round(sum(recoveries) / len(recoveries) * 1000, 1) if recoveries else None
+        })
+        if result["ok"] and scenario in FAULT_SCENARIOS and fired < len(faults):
+            result.update(ok=False, error=f"only {fired} of {len(faults)} scripted faults fired")
+    return result
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m scripts.benchmark",
+                                     description="Benchmark download_file against a local fake origin.")
+    parser.add_argument("--size", type=float, default=64, help="Payload size in MB (default: 64).")
+    parser.add_argument("--chunk", type=int, default=None,
+                        help="Read size in bytes (default: the configured chunk).")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS + FAULT_SCENARIOS, default=None,
+                        help="Scenario to run; repeat for several (default: all).")
+    parser.add_argument("--faults", type=Path, default=None, metavar="FILE",
+                        help="Also replay this JSON fault script, as scenario \"custom\".")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per scenario (default: 1).")
+    parser.add_argument("--throttle", type=int, default=0, metavar="BYTES",
+                        help="Per-connection origin limit in bytes/second (default: none).")
+    parser.add_argument("--keep", action="store_true", help="Keep the downloaded files.")
+    parser.add_argument("--json", action="store_true", help="One JSON object per run instead of a table.")
+    parser.add_argument("--receive", action="append", choices=("pooled", "iter_content"), default=None,
+                        help="Receive path to run; repeat to compare (default: the configured one).")
+    parser.add_argument("--io-policy", action="append", choices=tuple(IO_POLICIES), default=None,
+                        help="Page-cache policy to run; repeat to compare (default: the configured one).")
+    parser.add_argument("--reader", type=float, default=0, metavar="MB",
+                        help="Re-read a cached file of this size during each download (default: off).")
+    parser.add_argument("--trace-alloc", action="store_true",
+                        help="Track peak Python allocations with tracemalloc (slower).")
+    parser.add_argument("--startup", action="store_true",
+                        help=f"Measure launch time instead of downloads ({STARTUP_RUNS} runs unless --repeat).")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS, metavar="MS",
+                        help=f"Startup budget in milliseconds (default: {STARTUP_BUDGET_MS}).")
+    return parser
+
+
+def run_startup(workdir: Path, runs: int) -> List[Dict]:
+    """Time `runs` fresh launches against a throwaway config in `workdir`."""
+    from .temporary import BASE_DIR, DEFAULT_CONFIG
+    downloads = workdir / "downloads"
+    downloads.mkdir(parents=True, exist_ok=True)
+    config = dict(DEFAULT_CONFIG, downloads_location=str(downloads))
+    for i in range(1, 4):   # a few slots for handle_orphaned_files to check
+        (downloads / f"startup-{i}.bin").write_bytes(b"x")
+        config[f"filename_{i}"], config[f"url_{i}"] = f"startup-{i}.bin", f"https://example.com/{i}"
+    config_path = workdir / "persistent.json"
+    config_path.write_text(json.dumps(config, indent=4))
+    code = _STARTUP_CHILD.format(base=str(BASE_DIR), config=str(config_path), heavy=STARTUP_HEAVY_MODULES)
+    results = []
+    for run in range(1, runs + 1):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", code], cwd=str(workdir),
+                              capture_output=True, text=True)
+        wall_ms = (time.perf_counter() - started) * 1000
+        if proc.returncode != 0:
+            results.append({"run": run, "ok": False, "error": proc.stderr.strip()[-500:]})
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result.update(run=run, ok=True, process_ms=wall_ms)
+        results.append(result)
+    return results
+
+
+def startup_verdict(results: List[Dict], budget: float) -> Dict:
+    """Median launch time, config reads and heavy modules, checked against the budget."""
+    good = [r for r in results if r["ok"]]
+    median = statistics.median(r["import_ms"] + r["init_ms"] for r in good) if good else 0.0
+    reads = max((r["config_reads"] for r in good), default=0)
+    heavy = sorted({m for r in good for m in r["heavy"]})
+    within = bool(good) and len(good) == len(results) and median <= budget and reads <= 1 and not heavy
+    return {"median_ms": round(median, 1), "budget_ms": budget, "config_reads": reads,
+            "heavy": heavy, "ok": within}
+
+
+def print_startup(results: List[Dict], budget: float) -> bool:
+    """Per-run table and the median against the budget; True if within it."""
+    print(f"{'run':>4} {'imports ms':>11} {'init ms':>8} {'process ms':>11} {'reads':>6}  heavy modules")
+    for r in results:
+        if not r["ok"]:
+            print(f"{r['run']:>4} FAILED: {r['error']}")
+            continue
+        print(f"{r['run']:>4} {r['import_ms']:>11.1f} {r['init_ms']:>8.1f} {r['process_ms']:>11.1f} "
+              f"{r['config_reads']:>6}  {', '.join(r['heavy']) or '-'}")
+    verdict = startup_verdict(results, budget)
+    print(f"\nstartup median {verdict['median_ms']} ms (budget {budget:g} ms), "
+          f"config reads {verdict['config_reads']}, heavy modules {', '.join(verdict['heavy']) or 'none'}: "
+          f"{'ok' if verdict['ok'] else 'OVER BUDGET'}")
+    return verdict["ok"]
+
+
+def print_table(results: List[Dict]) -> None:
+    print(f"{'scenario':<15} {'ok':<4} {'MB/s':>8} {'CPU s/GB':>9} {'syscr':>8} {'syscw':>8} "
+          f"{'TTFB ms':>8} {'tries':>5} {'seconds':>8}")
+    for r in results:
+        print(f"{r['scenario']:<15} {('yes' if r['ok'] else 'NO'):<4} {r['mb_per_s']:>8} "
+              f"{r['cpu_s_per_gb']:>9} {str(r['syscr']):>8} {str(r['syscw']):>8} "
+              f"{str(r['ttfb_ms']):>8} {r['attempts']:>5} {r['seconds']:>8}")
+        if not r["ok"]:
+            print(f"    {r['error']}")
+    if len({r["receive"] for r in results}) > 1 or any(r["peak_mb"] is not None for r in results):
+        print()
+        print(f"{'scenario':<15} {'receive':<13} {'MB/s':>8} {'CPU s/GB':>9} {'minflt/GB':>10} {'peak MB':>8}")
+        for r in sorted(results, key=lambda r: (r["scenario"], r["receive"])):
+            print(f"{r['scenario']:<15} {r['receive']:<13} {r['mb_per_s']:>8} {r['cpu_s_per_gb']:>9} "
+                  f"{str(r['minflt_per_gb']):>10} {str(r['peak_mb']):>8}")
+    if len({r["io_policy"] for r in results}) > 1 or any(r["reader_mb_per_s"] is not None for r in results):
+        print()
+        print(f"{'scenario':<15} {'io policy':<11} {'MB/s':>8} {'cache MB':>9} {'reader MB/s':>12} "
+              f"{'reader cached MB':>17}")
+        for r in sorted(results, key=lambda r: (r["scenario"], r["io_policy"])):
+            print(f"{r['scenario']:<15} {r['io_policy']:<11} {r['mb_per_s']:>8} {str(r['cache_mb']):>9} "
+                  f"{str(r['reader_mb_per_s']):>12} {str(r['reader_cached_mb']):>17}")
+    aborted = [r for r in results if "stop_ms" in r]
+    if aborted:
+        print()
+        print(f"{'scenario':<15} {'stop ms':>8} {'stopped at':>11}")
+        for r in aborted:
+            print(f"{r['scenario']:<15} {str(r['stop_ms']):>8} {str(r['stopped_at']):>11}")
+    faulted = [r for r in results if "faults" in r]
+    if faulted:
+        print()
+        print(f"{'scenario':<15} {'faults':>6} {'wasted':>12} {'per fault':>12} {'refetch':>10} {'recovery ms':>12}")
+        for r in faulted:
+            print(f"{r['scenario']:<15} {r['faults']:>6} {r['wasted_bytes']:>12} {r['wasted_per_fault']:>12} "
+                  f"{r['refetched_bytes']:>10} {str(r['recovery_ms']):>12}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from .temporary import DEFAULT_CONFIG, EXIT_CODES, RUNTIME_CONFIG
+    DEFAULT_RECEIVE = RUNTIME_CONFIG["download"].get("receive", "pooled")
+    DEFAULT_IO_POLICY = next((name for name, flags in IO_POLICIES.items()
+                              if all(bool(RUNTIME_CONFIG["download"].get(k)) == v for k, v in flags.items())),
+                             "normal")
+    args = build_parser().parse_args(argv)
+    if args.startup:
+        workdir = Path(tempfile.mkdtemp(prefix="downlord-startup-"))
+        try:
+            results = run_startup(workdir, args.repeat if args.repeat > 1 else STARTUP_RUNS)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if args.json:
+            for result in results:
+                print(json.dumps(result))
+            verdict = startup_verdict(results, args.budget)
+            print(json.dumps(dict(verdict, summary=True)))
+            within = verdict["ok"]
+        else:
+            within = print_startup(results, args.budget)
+        return EXIT_CODES["ok"] if within else EXIT_CODES["failed"]
+    size = int(args.size * 1024 * 1024)
+    chunk = args.chunk or DEFAULT_CONFIG.get("chunk", 4096000)
+    workdir = Path(tempfile.mkdtemp(prefix="downlord-bench-"))
+    origin = FakeOrigin(args.throttle).start()
+    results = []
+    try:
+        from .transport import FaultInjectingTransport
+        scenarios = list(args.scenario or SCENARIOS + FAULT_SCENARIOS)
+        if args.faults:
+            scenarios.append("custom")
+        receives = args.receive or [DEFAULT_RECEIVE]
+        policies = args.io_policy or [DEFAULT_IO_POLICY]
+        reader = None
+        if args.reader > 0:
+            hot = workdir / "reader.bin"
+            block = _payload_block()
+            with open(hot, "wb") as f:
+                for _ in range(max(1, int(args.reader * 1024 * 1024) // PAYLOAD_BLOCK)):
+                    f.write(block)
+            with open(hot, "rb") as f:   # warm
+                while f.read(PAYLOAD_BLOCK):
+                    pass
+            reader = CacheReader(hot)
+        for scenario, receive, policy in ((s, r, p) for s in scenarios for r in receives for p in policies):
+            if scenario == "requeue-abort" and receive != "pooled":
+                continue
+            for run in range(1, args.repeat + 1):
+                if scenario == "custom":
+                    faults = FaultInjectingTransport.from_file(args.faults).faults
+                elif scenario in FAULT_SCENARIOS:
+                    faults = fault_script(scenario, size)
+                else:
+                    faults = None
+                result = run_case(origin, scenario, run, size, chunk, workdir, faults,
+                                  receive=receive, trace_alloc=args.trace_alloc,
+                                  io_policy=policy, reader=reader)
+                results.append(result)
+                if args.json:
+                    print(json.dumps(result), flush=True)
+    finally:
+        origin.stop()
+        if args.keep:
+            print(f"Files kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    if not args.json:
+        print_table(results)
+    return EXIT_CODES["ok"] if all(r["ok"] for r in results) else EXIT_CODES["failed"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,486 @@
+# Script: `.\scripts\buffers.py`
+
+# Imports
+import json
+import mmap
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .temporary import BUFFER_SETTINGS, RUNTIME_CONFIG, WRITE_SETTINGS
+
+# ── Receive buffers ──────────────────────────────────────────────────────────
+# The body loop used to be `for chunk in response.iter_content(chunk_size)`:
+# every chunk a brand new bytes object of up to 16 MB (the "fiber" chunk),
+# written once and dropped.  Sizes like that bypass pymalloc and go straight
+# to malloc/mmap, so each chunk cost a fresh mapping and a page fault per 4 KB
+# touched -- hundreds of MB a second through the allocator with several
+# downloads running, for data that is only ever copied from the socket to the
+# file.
+#
+# Now download_file leases one bytearray per download from BUFFERS, reads
+# into it with readinto() (transport.BodyReader: recv_into straight from the
+# socket when the body is not content-encoded) and writes it with pwrite_all()
+# at the explicit file offset.  The buffer goes back to the pool when the
+# download ends, so retries, resumes and the next file reuse the same memory.
+# At most MAX_IDLE_BYTES of returned buffers are kept.
+#
+# ── Budget ───────────────────────────────────────────────────────────────────
+# A 16 MB "lan" chunk times a few parallel files is a lot of RAM on a small
+# prefetch VM, so every lease counts against BUFFER_SETTINGS["budget"] (idle
+# buffers included; they are freed first).  A lease asks for its capacity
+# before every read (BufferLease.view), and gets its chunk size or an equal
+# share of the budget, whichever is smaller, in steps of `min_chunk` -- so
+# chunks shrink as downloads start and grow back as they finish.  When not even
+# `min_chunk` fits, the reader waits for capacity; an abort ends the wait.
+# The iter_content path reserves once, for its fixed chunk size.  Usage is in
+# BUFFERS.snapshot(): the progress screen, `queue stats` and /metrics.
+#
+# RUNTIME_CONFIG["download"]["receive"] = "iter_content" brings the old loop
+# back; `python -m scripts.benchmark --receive pooled --receive iter_content`
+# compares the two.
+#
+# ── Writers ──────────────────────────────────────────────────────────────────
+# part_writer() picks how chunks reach the .part, by
+# RUNTIME_CONFIG["download"]["write_backend"]:
+#
+#   pwrite  (default) pwrite + fsync per chunk: the file on disk is always
+#           exactly the bytes received, which is what resume trusts.
+#   mmap    the file is mapped WRITE_SETTINGS["mmap_window"] bytes at a time
+#           and each chunk is copied into the mapping -- no write syscall per
+#           chunk.  Every `sync_every` bytes, at each window change, and when
+#           all mmap downloads together hold more than `dirty_budget` unsynced
+#           bytes (DIRTY), the dirty range is msynced and the synced offset is
+#           recorded in a journal beside the .part (`name.part.journal`).
+#           Windows are allocated up front (posix_fallocate where there is
+#           one), so a full disk is an OSError here and not a SIGBUS later.
+#
+# A mapped window runs past the last byte received, so while an mmap download
+# is open its .part is longer than the data in it.  Closing the writer -- the
+# download finished, failed, was stopped or will be retried -- syncs, cuts the
+# file back to the data and removes the journal.  Only a crash leaves the
+# journal behind, and partial_size() then trusts it instead of the file size.
+#
+# ── Page cache ───────────────────────────────────────────────────────────────
+# Written data stays in the page cache after its fsync, so a 50 GB download
+# pushes everything else on the box out of memory -- for bytes nobody will read
+# again soon.  Two RUNTIME_CONFIG["download"] switches, either backend:
+#
+#   drop_cache   once a range is synced, posix_fadvise(DONTNEED) it, in steps
+#                of WRITE_SETTINGS["drop_step"].  download_file passes the
+#                lowest offset still wanted -- the slowest PartFollower (hasher,
+#                tarball extractor) -- so those keep reading from memory.  The
+#                mmap writer never drops its current window.  No-op where
+#                there is no posix_fadvise (Windows, macOS).
+#   idle_io      the download thread runs in the idle I/O class while its
+#                writer is open: ioprio_set(IOPRIO_CLASS_IDLE) on Linux (honoured
+#                by the BFQ scheduler; mq-deadline and none ignore it),
+#                THREAD_MODE_BACKGROUND_BEGIN on Windows, which also lowers
+#                memory priority so its pages are evicted first.
+#
+# `python -m scripts.benchmark --io-policy normal --io-policy drop_cache
+# --reader 256` compares the file's resident size afterwards and the
+# throughput of a concurrent reader.
+
+MAX_IDLE_BYTES = 64 * 1024 * 1024
+JOURNAL_SUFFIX = ".journal"
+
+
+# Classes
+class BufferLease:
+    """One download's share of the pool: capacity, and the bytearray behind it."""
+
+    def __init__(self, pool: "BufferPool", requested: int, abort: Optional[threading.Event]):
+        self.pool = pool
+        self.requested = requested
+        self.abort = abort
+        self.size = 0               # capacity granted, counted against the budget
+        self.buffer: Optional[bytearray] = None
+
+    def reserve(self) -> int:
+        """Capacity for the next read, waiting if there is none; returns its size."""
+        return self.pool._grant(self)
+
+    def view(self) -> memoryview:
+        """A buffer of the granted size to read into, reallocated when the grant changes."""
+        size = self.reserve()
+        if self.buffer is None or len(self.buffer) != size:
+            if self.buffer is not None:
+                self.pool._give_back(self.buffer)
+            self.buffer = self.pool._take(size)
+        return memoryview(self.buffer)
+
+    def release(self) -> None:
+        self.pool._end(self)
+
+
+class BufferPool:
+    """Reusable bytearrays, by size, under one process-wide byte budget."""
+
+    def __init__(self, budget: int = BUFFER_SETTINGS["budget"],
+                 min_chunk: int = BUFFER_SETTINGS["min_chunk"], max_idle_bytes: int = MAX_IDLE_BYTES):
+        self._lock = threading.Condition()
+        self._idle: Dict[int, List[bytearray]] = {}
+        self._leases: List[BufferLease] = []
+        self.budget = budget
+        self.min_chunk = min_chunk
+        self.max_idle_bytes = max_idle_bytes
+        self.idle_bytes = 0
+        self.granted = 0            # sum of every lease's size
+        self.waiting = 0            # readers waiting for capacity
+        self.allocated = 0          # buffers ever created; reuse keeps this flat
+
+    def lease(self, size: int, abort: Optional[threading.Event] = None) -> BufferLease:
+        lease = BufferLease(self, size, abort)
+        with self._lock:
+            self._leases.append(lease)
+        return lease
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"budget": self.budget, "granted": self.granted, "idle": self.idle_bytes,
+                    "leases": len(self._leases), "waiting": self.waiting, "dirty": DIRTY.dirty}
+
+    def _target(self, lease: BufferLease) -> int:
+        """The lease's fair share: its own size, or budget / leases, in min_chunk steps."""
+        share = self.budget // max(1, len(self._leases))
+        if share >= lease.requested:
+            return lease.requested
+        return max(self.min_chunk, share - share % self.min_chunk)
+
+    def _grant(self, lease: BufferLease) -> int:
+        with self._lock:
+            while True:
+                target = self._target(lease)
+                if target <= lease.size:
+                    self._resize(lease, target)     # shrinking always fits
+                    return target
+                self._trim_idle(self.granted - lease.size + target)
+                room = self.budget - self.granted - self.idle_bytes + lease.size
+                fits = min(target, room - room % self.min_chunk)
+                if fits >= self.min_chunk:
+                    self._resize(lease, max(fits, lease.size))
+                    return lease.size
+                if lease.size or (lease.abort is not None and lease.abort.is_set()):
+                    # Keep what it has; an aborting reader gets one read to notice.
+                    self._resize(lease, lease.size or self.min_chunk)
+                    return lease.size
+                self.waiting += 1
+                self._lock.wait(0.5)
+                self.waiting -= 1
+
+    def _resize(self, lease: BufferLease, size: int) -> None:
+        if size != lease.size:
+            self.granted += size - lease.size
+            lease.size = size
+            self._lock.notify_all()
+
+    def _end(self, lease: BufferLease) -> None:
+        with self._lock:
+            if lease in self._leases:
+                self._leases.remove(lease)
+            self._resize(lease, 0)
+        if lease.buffer is not None:
+            self._give_back(lease.buffer)
+            lease.buffer = None
+
+    def _take(self, size: int) -> bytearray:
+        with self._lock:
+            free = self._idle.get(size)
+            if free:
+                self.idle_bytes -= size
+                return free.pop()
+            self.allocated += 1
+        return bytearray(size)
+
+    def _give_back(self, buffer: bytearray) -> None:
+        size = len(buffer)
+        with self._lock:
+            if (self.idle_bytes + size <= self.max_idle_bytes
+                    and self.granted + self.idle_bytes + size <= self.budget):
+                self._idle.setdefault(size, []).append(buffer)
+                self.idle_bytes += size
+
+    def _trim_idle(self, needed: int) -> None:
+        """Drop idle buffers until `needed` granted bytes fit beside them.  Needs _lock."""
+        for size in sorted(self._idle, reverse=True):
+            free = self._idle[size]
+            while free and needed + self.idle_bytes > self.budget:
+                free.pop()
+                self.idle_bytes -= size
+
+
+class DirtyBudget:
+    """Unsynced mapped bytes across every MmapWriter."""
+
+    def __init__(self, limit: int):
+        self._lock = threading.Lock()
+        self.limit = limit
+        self.dirty = 0
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.dirty += n
+
+    def release(self, n: int) -> None:
+        with self._lock:
+            self.dirty -= n
+
+    def over(self) -> bool:
+        return self.dirty > self.limit
+
+
+class PwriteWriter:
+    """pwrite each chunk at its offset and fsync it."""
+
+    def __init__(self, fd: int, offset: int):
+        self.fd = fd
+        self.end = offset
+        self.drop_cache = False
+        self.dropped = 0            # below this, pages were dropped from the cache
+        self.idle_io = False
+        self._priority = None
+
+    def write(self, view: memoryview, offset: int) -> int:
+        self.end = pwrite_all(self.fd, view, offset)
+        return self.end
+
+    def commit(self) -> None:
+        os.fsync(self.fd)
+
+    def drop_behind(self, upto: int) -> None:
+        """Drop synced pages below `upto` from the page cache, if drop_cache."""
+        upto = min(upto, self.synced_end())
+        if self.drop_cache and upto - self.dropped >= WRITE_SETTINGS["drop_step"]:
+            _fadvise_dontneed(self.fd, self.dropped, upto - self.dropped)
+            self.dropped = upto
+
+    def synced_end(self) -> int:
+        return self.end             # commit() fsyncs every chunk
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        if self.idle_io:
+            self._priority = _set_idle_io()
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.close()
+        finally:
+            if self._priority is not None:
+                _restore_io(self._priority)
+                self._priority = None
+
+
+class MmapWriter(PwriteWriter):
+    """Copy each chunk into a mapped window; msync and journal now and then."""
+
+    def __init__(self, fd: int, offset: int, journal: Path):
+        super().__init__(fd, offset)
+        self.journal = journal
+        self.window = WRITE_SETTINGS["mmap_window"] - WRITE_SETTINGS["mmap_window"] % mmap.ALLOCATIONGRANULARITY
+        self.sync_every = WRITE_SETTINGS["sync_every"]
+        self.synced = offset        # everything below is on disk and journaled
+        self.dirty = 0
+        self._map: Optional[mmap.mmap] = None
+        self._map_start = 0
+        _write_journal(journal, offset)   # before the first window grows the file
+
+    def write(self, view: memoryview, offset: int) -> int:
+        while view:
+            if self._map is None or not self._map_start <= offset < self._map_start + self.window:
+                self._remap(offset)
+            start = offset - self._map_start
+            n = min(len(view), self.window - start)
+            self._map[start:start + n] = view[:n]
+            view = view[n:]
+            offset += n
+            self.dirty += n
+            DIRTY.add(n)
+        self.end = max(self.end, offset)
+        return self.end
+
+    def commit(self) -> None:
+        if self.dirty >= self.sync_every or DIRTY.over():
+            self.sync()
+
+    def synced_end(self) -> int:
+        # Mapped pages stay resident however they are advised.
+        return min(self.synced, self._map_start if self._map is not None else self.synced)
+
+    def sync(self) -> None:
+        """msync what was written since the last sync, then journal the offset."""
+        if self._map is not None and self.dirty:
+            start = max(self.synced, self._map_start) - self._map_start
+            start -= start % mmap.ALLOCATIONGRANULARITY
+            self._map.flush(start, self.end - self._map_start - start)
+            os.fsync(self.fd)       # the file size changed with each window
+            DIRTY.release(self.dirty)
+            self.dirty = 0
+        if self.synced != self.end:
+            self.synced = self.end
+            _write_journal(self.journal, self.synced)
+
+    def close(self) -> None:
+        try:
+            self.sync()
+        finally:
+            if self.dirty:
+                DIRTY.release(self.dirty)
+                self.dirty = 0
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+        os.ftruncate(self.fd, self.end)
+        os.fsync(self.fd)
+        try:
+            self.journal.unlink()
+        except OSError:
+            pass
+
+    def _remap(self, offset: int) -> None:
+        if self._map is not None:
+            self.sync()
+            self._map.close()
+            self._map = None
+        start = offset - offset % self.window
+        if os.fstat(self.fd).st_size < start + self.window:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(self.fd, start, self.window)
+            else:
+                os.ftruncate(self.fd, start + self.window)
+        self._map = mmap.mmap(self.fd, self.window, access=mmap.ACCESS_WRITE, offset=start)
+        self._map_start = start
+
+
+# Globals
+BUFFERS = BufferPool()
+DIRTY = DirtyBudget(WRITE_SETTINGS["dirty_budget"])
+
+
+# Functions
+def pwrite_all(fd: int, view: memoryview, offset: int) -> int:
+    """Write all of `view` at `offset`, whatever the file position; returns the new end."""
+    while view:
+        if hasattr(os, "pwrite"):
+            n = os.pwrite(fd, view, offset)
+        else:
+            # Windows has no pwrite; the fd is this download's alone.
+            os.lseek(fd, offset, os.SEEK_SET)
+            n = os.write(fd, view)
+        view = view[n:]
+        offset += n
+    return offset
+
+
+def journal_path(part_path: Path) -> Path:
+    return part_path.with_name(part_path.name + JOURNAL_SUFFIX)
+
+
+def discard_journal(part_path: Path) -> None:
+    """Remove the journal of a .part that is being thrown away, so no later resume trusts it."""
+    try:
+        journal_path(part_path).unlink()
+    except OSError:
+        pass
+
+
+def part_writer(out_file, part_path: Path, offset: int) -> PwriteWriter:
+    """The configured writer for `out_file`, which is cut to `offset` first."""
+    settings = RUNTIME_CONFIG["download"]
+    out_file.truncate(offset)
+    fd = out_file.fileno()
+    journal = journal_path(part_path)
+    if settings.get("write_backend") == "mmap":
+        writer = MmapWriter(fd, offset, journal)
+    else:
+        try:
+            journal.unlink()   # left by a crashed mmap run; `offset` already honoured it
+        except OSError:
+            pass
+        writer = PwriteWriter(fd, offset)
+    writer.drop_cache = bool(settings.get("drop_cache"))
+    writer.idle_io = bool(settings.get("idle_io"))
+    return writer
+
+
+def partial_size(part_path: Path) -> int:
+    """Bytes of a .part that can be resumed from: the journaled offset if an
+    mmap download crashed with it open, else the file size."""
+    try:
+        size = part_path.stat().st_size
+    except OSError:
+        return 0
+    try:
+        with open(journal_path(part_path), "r") as f:
+            return min(size, int(json.load(f)["synced"]))
+    except (OSError, ValueError, KeyError, TypeError):
+        return size
+
+
+def _fadvise_dontneed(fd: int, offset: int, length: int) -> None:
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, offset, length, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+# ioprio_set / ioprio_get by machine; IOPRIO_WHO_PROCESS with who=0 is the calling thread.
+_IOPRIO_SYSCALLS = {"x86_64": (251, 252), "amd64": (251, 252), "i386": (289, 290), "i686": (289, 290),
+                    "aarch64": (30, 31), "arm64": (30, 31), "armv7l": (314, 315)}
+_IOPRIO_CLASS_IDLE = 3 << 13
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+_THREAD_MODE_BACKGROUND_END = 0x00020000
+
+
+def _set_idle_io():
+    """Put this thread in the idle I/O class; returns what _restore_io needs, or None."""
+    try:
+        import ctypes
+        if sys.platform.startswith("win"):
+            kernel32 = ctypes.windll.kernel32
+            if kernel32.SetThreadPriority(kernel32.GetCurrentThread(), _THREAD_MODE_BACKGROUND_BEGIN):
+                return _THREAD_MODE_BACKGROUND_END
+            return None
+        if not sys.platform.startswith("linux"):
+            return None
+        import platform
+        calls = _IOPRIO_SYSCALLS.get(platform.machine().lower())
+        if calls is None:
+            return None
+        libc = ctypes.CDLL(None, use_errno=True)
+        previous = libc.syscall(calls[1], 1, 0)
+        if previous < 0 or libc.syscall(calls[0], 1, 0, _IOPRIO_CLASS_IDLE) < 0:
+            return None
+        return previous
+    except (ImportError, OSError, AttributeError):
+        return None
+
+
+def _restore_io(previous: int) -> None:
+    try:
+        import ctypes
+        if sys.platform.startswith("win"):
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), previous)
+            return
+        import platform
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.syscall(_IOPRIO_SYSCALLS[platform.machine().lower()][0], 1, 0, previous)
+    except (ImportError, OSError, AttributeError, KeyError):
+        pass
+
+
+def _write_journal(journal: Path, synced: int) -> None:
+    tmp = journal.with_name(journal.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"synced": synced}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, journal)
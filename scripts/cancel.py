@@ -0,0 +1,66 @@
+# Script: `.\scripts\cancel.py`
+
+# Imports
+import threading
+from typing import Callable, List
+
+# ── Cancellation ─────────────────────────────────────────────────────────────
+# Stopping a download used to wait for the chunk in flight: the loop looked at
+# ABORT_EVENT only after each write, and one 16 MB "lan" chunk on a slow line
+# can take minutes to arrive.
+#
+# ABORT_EVENT and every ScheduledJob.abort are now AbortEvents: an Event that
+# also runs callbacks when it is set.  While a body is being read,
+# download_file registers the transport.BodyReader's interrupt(), which shuts
+# the socket down -- a recv() blocked in another thread returns at once with
+# whatever had arrived, those bytes are written and fsynced like any chunk,
+# and the `stopped` event carries the exact offset to resume from.  BodyReader
+# also reads a chunk in READ_SLICE pieces and hands over what it has as soon
+# as the download is stopped or paused, so neither waits for a whole chunk
+# even where a shutdown does not wake the read.
+#
+# Pausing (the menu's P key, `queue pause` in the daemon) is warm: the loop
+# stops reading but keeps the response, the open .part and its buffer lease;
+# TCP flow control holds the server back meanwhile.  Continuing picks up the
+# same connection, with no new request, probe or resume check.  A pause longer
+# than RUNTIME_CONFIG["download"]["warm_pause"] seconds is turned into a stop
+# with the .part kept -- by then the server has usually given up on the
+# connection anyway.
+
+
+# Classes
+class AbortEvent(threading.Event):
+    """threading.Event that also calls back on set(), so a blocked read can be woken."""
+
+    def __init__(self):
+        super().__init__()
+        self._callbacks_lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    def on_set(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Run `callback` when this is set (now, if it already is); returns an unsubscribe."""
+        with self._callbacks_lock:
+            self._callbacks.append(callback)
+        if self.is_set():
+            _call(callback)
+
+        def unsubscribe() -> None:
+            with self._callbacks_lock:
+                if callback in self._callbacks:
+                    self._callbacks.remove(callback)
+        return unsubscribe
+
+    def set(self) -> None:
+        super().set()
+        with self._callbacks_lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            _call(callback)
+
+
+# Functions
+def _call(callback: Callable[[], None]) -> None:
+    try:
+        callback()
+    except Exception:
+        pass   # a callback failing must not keep the event from stopping the rest
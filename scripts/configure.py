@@ -2,15 +2,17 @@
 
 # Imports
 import json
+import os
 import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional, Tuple
 import sys
 
 from .temporary import (
     PERSISTENT_FILE,
     DEFAULT_CONFIG,
     DOWNLOADS_DIR,
+    PARTIAL_DIRNAME,
     RETRY_OPTIONS,
     REFRESH_OPTIONS,
     DEFAULT_CHUNK_SIZES,
@@ -18,12 +20,26 @@ from .temporary import (
     BASE_DIR
 )
 
+# ── Config cache ─────────────────────────────────────────────────────────────
+# load() is called from everywhere -- check_environment, initialize_startup,
+# the menu loop, every slot update -- and each call used to open, parse and
+# validate persistent.json again: three full reads before the menu was even
+# drawn.  Now the validated config is kept together with the (inode, mtime,
+# size) of the file it came from; while the file on disk is unchanged, load()
+# is one stat() and a dict copy.  save() refreshes the cache with what it
+# wrote, and a file changed by anything else (another process, an editor) no
+# longer matches and is read again -- so "read-modify-write against what is
+# on disk" still holds.  `reads` counts real reads, for the startup benchmark.
+
 # Classes
 class Config_Manager:
     """
     Manages loading, saving, and validating the application configuration.
     """
 
+    _cache: Optional[Tuple[Tuple[int, int, int], Dict]] = None
+    reads = 0
+
     @staticmethod
     def get_available_slots() -> int:
         config = Config_Manager.load()
@@ -68,9 +84,14 @@ class Config_Manager:
             if not PERSISTENT_FILE.exists():
                 raise FileNotFoundError("Missing configuration file")
 
+            cached = Config_Manager._cache
+            if cached is not None and cached[0] == _file_key(os.stat(PERSISTENT_FILE)):
+                return dict(cached[1])
+
             # Attempt to load primary config
             try:
                 with open(PERSISTENT_FILE, "r") as f:
+                    key = _file_key(os.fstat(f.fileno()))
                     config = json.load(f)
             except json.JSONDecodeError:  # Detect corruption
                 from .interface import display_error  # Deferred import
@@ -87,6 +108,7 @@ class Config_Manager:
                     # Verify backup integrity
                     try:
                         with open(PERSISTENT_FILE, "r") as f:
+                            key = _file_key(os.fstat(f.fileno()))
                             config = json.load(f)
                     except json.JSONDecodeError:
                         raise RuntimeError("Backup also corrupted. Please reinstall.")
@@ -94,7 +116,10 @@ class Config_Manager:
                     raise RuntimeError("Config corrupted and no backup available.")
 
             # Validate and return
-            return Config_Manager.validate(config)
+            validated = Config_Manager.validate(config)
+            Config_Manager._cache = (key, validated)
+            Config_Manager.reads += 1
+            return dict(validated)
 
         except Exception as e:
             from .interface import display_error  # Deferred import
@@ -112,6 +137,8 @@ class Config_Manager:
 
             with open(temp_path, 'w') as f:
                 json.dump(validated, f, indent=4)
+                f.flush()
+                key = _file_key(os.fstat(f.fileno()))   # a rename keeps inode and mtime
 
             # Create a backup if the persistent file exists
             if PERSISTENT_FILE.exists():
@@ -126,6 +153,7 @@ class Config_Manager:
 
             # Move the temporary file to the persistent file location
             temp_path.rename(PERSISTENT_FILE)
+            Config_Manager._cache = (key, validated)
             return True
 
         except Exception as e:
@@ -198,6 +226,9 @@ class Config_Manager:
         return validated
 
 # Functions
+def _file_key(st: os.stat_result) -> Tuple[int, int, int]:
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
 def get_downloads_path(config: Dict) -> Path:
     downloads_location_str = config.get("downloads_location", "downloads")
     downloads_path = Path(downloads_location_str)
@@ -205,6 +236,10 @@ def get_downloads_path(config: Dict) -> Path:
         downloads_path = BASE_DIR / downloads_path
     return downloads_path.resolve()       
 
+def get_partials_path(config: Dict) -> Path:
+    """Where .part files live: a hidden folder on the same disk as the downloads."""
+    return get_downloads_path(config) / PARTIAL_DIRNAME
+
 def check_environment() -> bool:
     try:
         if not PERSISTENT_FILE.exists():
@@ -0,0 +1,544 @@
+# Script: `.\scripts\daemon.py`
+
+# Imports
+import contextlib
+import hmac
+import json
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib import request as urlrequest
+from urllib.error import HTTPError, URLError
+
+from . import temporary
+from .buffers import BUFFERS
+from .events import EVENTS, emit
+from .scheduler import ScheduledJob, Scheduler
+from .temporary import (
+    ACTIVE_DOWNLOADS,
+    BASE_DIR,
+    DAEMON_FILE,
+    DAEMON_SETTINGS,
+    EXIT_CODES,
+    QUEUE_FILE
+)
+
+# ── Daemon ───────────────────────────────────────────────────────────────────
+# `launcher.py daemon [--detach]` runs a long-lived DownLord that owns a
+# persistent download queue (data/queue.json) and exposes a small JSON control
+# API over HTTP on 127.0.0.1:
+#
+#   GET  /jobs                     every job, with live progress for running ones
+#   GET  /stats                    counts per state, bytes done, active transfers, buffer usage
+#   POST /jobs                     {"url", "dest"?, "priority"?, "sha256"?} -> job
+#   POST /jobs/<id>/pause          a running job stops reading but keeps its
+#                                  connection for warm_pause seconds, then stops
+#                                  and keeps the .part; see scripts/cancel.py
+#   POST /jobs/<id>/resume         carry on over the same connection if it is
+#                                  still warm, else back into the queue to
+#                                  resume from the .part
+#   POST /jobs/<id>/priority       {"priority": N}, higher runs first and may
+#                                  preempt a lower-priority running job
+#   POST /jobs/<id>/remove         stop if running, then forget it (files kept)
+#
+# Downloads then outlive the terminal that asked for them, and any number of
+# clients -- `launcher.py queue ...`, the interactive menu, a script -- submit
+# to one shared queue.  The jobs run through the same headless engine as
+# `launcher.py get` (headless.fetch), with their partials in <dest>/.incomplete
+# so the menu's orphan sweep of the slot list never touches them.
+#
+# HTTP rather than a Unix socket so Windows gets the same API.  Bound to
+# loopback only, and every request must carry the token written, owner-only,
+# to data/daemon.json -- that keeps other local users out, and keeps out web
+# pages that try to reach localhost through the browser.
+#
+# What runs when is up to a Scheduler (scripts/scheduler.py): priority order,
+# per-host caps, preemption of lower-priority jobs, and Retry-After parking.
+# On disk a job is queued, paused, complete or failed; whether a queued one is
+# currently running or waiting out a backoff is the scheduler's live state,
+# which GET /jobs overlays.  The queue file is rewritten atomically on every
+# change, and everything still queued at shutdown resumes at the next start.
+
+JOB_STATES = ("queued", "running", "waiting", "paused", "complete", "failed")
+
+
+# Classes
+class Job:
+    """One queued download.  Persisted as a plain dict in data/queue.json."""
+
+    __slots__ = ("id", "url", "dest", "priority", "state", "sha256", "filename",
+                 "path", "error", "added", "finished")
+
+    def __init__(self, url: str, dest: str, priority: int = 0, sha256: Optional[str] = None,
+                 id: Optional[str] = None, state: str = "queued", filename: str = "",
+                 path: str = "", error: str = "", added: Optional[float] = None,
+                 finished: Optional[float] = None):
+        self.id = id or uuid.uuid4().hex[:8]
+        self.url = url
+        self.dest = dest
+        self.priority = int(priority)
+        self.state = state if state in JOB_STATES else "queued"
+        self.sha256 = sha256
+        self.filename = filename
+        self.path = path
+        self.error = error
+        self.added = added if added is not None else time.time()
+        self.finished = finished
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Job":
+        return cls(**{k: v for k, v in data.items() if k in cls.__slots__})
+
+
+class DownloadQueue:
+    """The persistent job list.  All access goes through one lock."""
+
+    def __init__(self, path: Path = QUEUE_FILE):
+        self.path = path
+        self.lock = threading.RLock()
+        self.jobs: Dict[str, Job] = {}
+        self.load()
+
+    def load(self) -> None:
+        with self.lock:
+            self.jobs = {}
+            if not self.path.exists():
+                return
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Queue file unreadable, starting empty: {e}")
+                return
+            for entry in data.get("jobs", []):
+                job = Job.from_dict(entry)
+                if job.state == "running":
+                    job.state = "queued"   # interrupted by the last shutdown
+                self.jobs[job.id] = job
+
+    def save(self) -> None:
+        """Atomic rewrite, same pattern as Config_Manager.save."""
+        with self.lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_suffix(".tmp")
+            with open(temp_path, "w") as f:
+                json.dump({"jobs": [j.to_dict() for j in self.jobs.values()]}, f, indent=4)
+            os.replace(temp_path, self.path)
+
+    def add(self, job: Job) -> Job:
+        with self.lock:
+            self.jobs[job.id] = job
+            self.save()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def set_state(self, job: Job, state: str, **fields) -> None:
+        with self.lock:
+            job.state = state
+            for name, value in fields.items():
+                setattr(job, name, value)
+            self.save()
+
+    def remove(self, job_id: str) -> None:
+        with self.lock:
+            self.jobs.pop(job_id, None)
+            self.save()
+
+    def ordered(self) -> List[Job]:
+        """Highest priority first, then oldest first."""
+        with self.lock:
+            return sorted(self.jobs.values(), key=lambda j: (-j.priority, j.added))
+
+
+class Daemon:
+    """Feeds queued jobs to a Scheduler and answers the control API."""
+
+    def __init__(self, max_parallel: int = DAEMON_SETTINGS["max_parallel"]):
+        self.queue = DownloadQueue()
+        self.scheduler = Scheduler(self._run, max_parallel=max_parallel, on_done=self._done)
+        self.handles: Dict[str, ScheduledJob] = {}
+        self.stopping = threading.Event()
+        self.bytes_completed = 0
+
+    # Control operations
+    def add(self, url: str, dest: Optional[str] = None, priority: int = 0,
+            sha256: Optional[str] = None) -> Job:
+        from .headless import output_key
+        from .manage import URLProcessor
+        if not URLProcessor.validate_url(url):
+            raise ValueError(f"Invalid URL: {url}")
+        dest = str(Path(dest or _default_dest()).expanduser().resolve())
+        # Two jobs for one file would share its .part.  A name only the probe
+        # can tell is still kept to one writer at a time by download_file.
+        key = output_key(url, Path(dest))
+        if key is not None:
+            for other in self.queue.ordered():
+                if other.state in ("queued", "paused") and output_key(other.url, Path(other.dest)) == key:
+                    raise ValueError(f"{key} is already queued as job {other.id}")
+        job = self.queue.add(Job(url, dest, priority=priority, sha256=sha256))
+        emit("queued", job=job.id, url=url, priority=job.priority)
+        self._submit(job)
+        return job
+
+    def pause(self, job_id: str) -> Job:
+        job = self._job(job_id)
+        if job.state == "queued":
+            self.queue.set_state(job, "paused")
+            handle = self.handles.get(job.id)
+            if handle is not None and handle.state == "running":
+                handle.pause.set()   # warm: keeps its slot and connection for now
+            elif handle is not None:
+                self.scheduler.cancel(handle)
+        return job
+
+    def resume(self, job_id: str) -> Job:
+        job = self._job(job_id)
+        handle = self.handles.get(job.id)
+        if job.state == "paused" and handle is not None and handle.pause.is_set():
+            self.queue.set_state(job, "queued")
+            handle.pause.clear()
+        elif job.state in ("paused", "failed") and handle is None:
+            self.queue.set_state(job, "queued", error="")
+            self._submit(job)
+        return job
+
+    def reprioritise(self, job_id: str, priority: int) -> Job:
+        job = self._job(job_id)
+        with self.queue.lock:
+            job.priority = int(priority)
+            self.queue.save()
+        handle = self.handles.get(job.id)
+        if handle is not None:
+            self.scheduler.reprioritise(handle, job.priority)
+        return job
+
+    def remove(self, job_id: str) -> None:
+        job = self._job(job_id)
+        self.queue.remove(job.id)
+        handle = self.handles.get(job.id)
+        if handle is not None:
+            self.scheduler.cancel(handle)
+
+    def list(self) -> List[Dict]:
+        live = {dl['url']: dl for dl in ACTIVE_DOWNLOADS.snapshot()}
+        waiting = {entry['url']: entry for entry in self.scheduler.snapshot()}
+        jobs = []
+        for job in self.queue.ordered():
+            entry = job.to_dict()
+            handle = self.handles.get(job.id)
+            if handle is not None and job.state == "paused" and job.url in live:
+                entry["warm"] = True     # paused, connection still open
+                entry["progress"] = live[job.url]
+            if handle is not None and job.state == "queued":
+                # The scheduler knows whether it is running, waiting or queued.
+                entry["state"] = handle.state
+                if job.url in waiting and waiting[job.url]['wake_at']:
+                    entry["waiting_until"] = waiting[job.url]['wake_at']
+                if handle.state == "running" and job.url in live:
+                    entry["progress"] = live[job.url]
+            jobs.append(entry)
+        return jobs
+
+    def stats(self) -> Dict:
+        counts = {state: 0 for state in JOB_STATES}
+        for entry in self.list():
+            counts[entry["state"]] = counts.get(entry["state"], 0) + 1
+        active = ACTIVE_DOWNLOADS.snapshot()
+        return {
+            "jobs": counts,
+            "active": len(active),
+            "speed": round(sum(dl['speed'] for dl in active), 1),
+            "bytes_completed": self.bytes_completed,
+            "max_parallel": self.scheduler.max_parallel,
+            "per_host": self.scheduler.per_host,
+            "buffers": BUFFERS.snapshot(),
+            "pid": os.getpid()
+        }
+
+    def _job(self, job_id: str) -> Job:
+        job = self.queue.get(job_id)
+        if job is None:
+            raise KeyError(f"No such job: {job_id}")
+        return job
+
+    # Scheduling
+    def _submit(self, job: Job) -> None:
+        from .headless import output_key
+        self.handles[job.id] = self.scheduler.submit(job.url, job.priority, payload=job,
+                                                     key=output_key(job.url, Path(job.dest)))
+
+    def _run(self, handle: ScheduledJob):
+        from .headless import fetch
+        job = handle.payload
+        dest = Path(job.dest)
+        dest.mkdir(parents=True, exist_ok=True)
+        return fetch(job.url, dest, job.sha256, abort_event=handle.abort, scheduled=True)
+
+    def _done(self, handle: ScheduledJob) -> None:
+        """Scheduler callback: a job has left the scheduler for good."""
+        job = handle.payload
+        self.handles.pop(job.id, None)
+        if self.queue.get(job.id) is None or handle.state == "cancelled" or job.state == "paused":
+            return   # removed, paused, or the daemon is stopping: state already right
+        outcome, path, error = handle.result if handle.result else ("failed", None, str(handle.error))
+        if outcome == "ok":
+            self.bytes_completed += path.stat().st_size if path and path.exists() else 0
+            self.queue.set_state(job, "complete", path=str(path), filename=path.name,
+                                 finished=time.time())
+        else:
+            self.queue.set_state(job, "failed", error=error, finished=time.time())
+
+    # Lifecycle
+    def serve(self, host: str = DAEMON_SETTINGS["host"], port: int = DAEMON_SETTINGS["port"]) -> int:
+        token = secrets.token_hex(16)
+        server = ThreadingHTTPServer((host, port), _ControlHandler)
+        server.daemon_threads = True
+        server.downlord = self
+        server.token = token
+        _write_daemon_file(host, server.server_address[1], token)
+
+        for job in self.queue.ordered():
+            if job.state == "queued":
+                self._submit(job)
+        http_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        http_thread.start()
+        print(f"DownLord daemon listening on http://{host}:{server.server_address[1]} "
+              f"(pid {os.getpid()}, {self.scheduler.max_parallel} parallel)")
+
+        def _stop(signum, frame):
+            self.stopping.set()
+        signal.signal(signal.SIGTERM, _stop)
+        try:
+            while not self.stopping.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            self.stopping.set()
+        finally:
+            print("Stopping: running jobs keep their partial files and resume next start.")
+            # Jobs stay "queued" on disk, so the next start picks them all up.
+            self.scheduler.stop()
+            self.scheduler.wait(timeout=30)
+            server.shutdown()
+            try:
+                DAEMON_FILE.unlink()
+            except OSError:
+                pass
+        return EXIT_CODES["ok"]
+
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    """JSON control API.  See the block comment at the top of this module."""
+
+    server_version = "DownLord"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, code: int, payload) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorised(self) -> bool:
+        supplied = self.headers.get("X-DownLord-Token", "")
+        if hmac.compare_digest(supplied, self.server.token):
+            return True
+        self._reply(403, {"error": "missing or wrong X-DownLord-Token"})
+        return False
+
+    def _body(self) -> Dict:
+        length = int(self.headers.get("Content-Length", 0) or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length).decode("utf-8"))
+
+    def do_GET(self):
+        if not self._authorised():
+            return
+        daemon = self.server.downlord
+        if self.path == "/jobs":
+            self._reply(200, {"jobs": daemon.list()})
+        elif self.path == "/stats":
+            self._reply(200, daemon.stats())
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if not self._authorised():
+            return
+        daemon = self.server.downlord
+        parts = [p for p in self.path.split("/") if p]
+        try:
+            body = self._body()
+            if parts == ["jobs"]:
+                job = daemon.add(body["url"], body.get("dest"), body.get("priority", 0), body.get("sha256"))
+                self._reply(201, job.to_dict())
+            elif len(parts) == 3 and parts[0] == "jobs":
+                job_id, action = parts[1], parts[2]
+                if action == "pause":
+                    self._reply(200, daemon.pause(job_id).to_dict())
+                elif action == "resume":
+                    self._reply(200, daemon.resume(job_id).to_dict())
+                elif action == "priority":
+                    self._reply(200, daemon.reprioritise(job_id, body["priority"]).to_dict())
+                elif action == "remove":
+                    daemon.remove(job_id)
+                    self._reply(200, {"removed": job_id})
+                else:
+                    self._reply(404, {"error": f"Unknown action: {action}"})
+            else:
+                self._reply(404, {"error": f"Unknown path: {self.path}"})
+        except KeyError as e:
+            self._reply(404, {"error": str(e).strip("'\"")})
+        except (ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+
+
+class DaemonClient:
+    """Talks to a running daemon using the port and token in data/daemon.json."""
+
+    def __init__(self, timeout: float = 5.0):
+        self.timeout = timeout
+        self.info = _read_daemon_file()
+
+    def available(self) -> bool:
+        if not self.info:
+            return False
+        try:
+            self.request("GET", "/stats")
+            return True
+        except (OSError, RuntimeError):
+            return False
+
+    def request(self, method: str, path: str, payload: Optional[Dict] = None):
+        if not self.info:
+            raise RuntimeError("DownLord daemon is not running (no data/daemon.json).")
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = urlrequest.Request(
+            f"http://{self.info['host']}:{self.info['port']}{path}",
+            data=data,
+            method=method,
+            headers={"X-DownLord-Token": self.info["token"], "Content-Type": "application/json"}
+        )
+        try:
+            with urlrequest.urlopen(req, timeout=self.timeout) as response:
+                return json.loads(response.read().decode("utf-8"))
+        except HTTPError as e:
+            try:
+                message = json.loads(e.read().decode("utf-8")).get("error", str(e))
+            except Exception:
+                message = str(e)
+            raise RuntimeError(message)
+        except URLError as e:
+            raise OSError(f"DownLord daemon unreachable: {e.reason}")
+
+    def add(self, url: str, dest: Optional[str] = None, priority: int = 0,
+            sha256: Optional[str] = None) -> Dict:
+        return self.request("POST", "/jobs", {"url": url, "dest": dest, "priority": priority, "sha256": sha256})
+
+    def jobs(self) -> List[Dict]:
+        return self.request("GET", "/jobs")["jobs"]
+
+    def stats(self) -> Dict:
+        return self.request("GET", "/stats")
+
+    def action(self, job_id: str, action: str, payload: Optional[Dict] = None) -> Dict:
+        return self.request("POST", f"/jobs/{job_id}/{action}", payload or {})
+
+
+# Functions
+def _default_dest() -> Path:
+    from .headless import _default_dest as headless_default
+    return headless_default()
+
+
+def _write_daemon_file(host: str, port: int, token: str) -> None:
+    DAEMON_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(DAEMON_FILE), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        json.dump({"host": host, "port": port, "token": token, "pid": os.getpid()}, f)
+
+
+def _read_daemon_file() -> Optional[Dict]:
+    try:
+        with open(DAEMON_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _detach(argv: List[str]) -> int:
+    """Relaunch `launcher.py daemon ...` in its own session, logging to data/daemon.log."""
+    log_path = DAEMON_FILE.with_name("daemon.log")
+    args = [sys.executable, str(BASE_DIR / "launcher.py")] + [a for a in argv if a != "--detach"]
+    kwargs = {}
+    if temporary.IS_WINDOWS:
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    with open(log_path, "a") as log:
+        proc = subprocess.Popen(args, stdout=log, stderr=log, stdin=subprocess.DEVNULL,
+                                cwd=str(BASE_DIR), **kwargs)
+    print(f"DownLord daemon started in the background (pid {proc.pid}); log: {log_path}")
+    return EXIT_CODES["ok"]
+
+
+def cmd_daemon(args, argv: List[str]) -> int:
+    if args.detach:
+        return _detach(argv)
+    if DaemonClient().available():
+        print("A DownLord daemon is already running.")
+        return EXIT_CODES["failed"]
+    if args.events:
+        EVENTS.open(args.events)
+        EVENTS.start_progress()
+    return Daemon(max_parallel=args.parallel).serve(port=args.port)
+
+
+def cmd_queue(args) -> int:
+    """`launcher.py queue add|list|stats|pause|resume|priority|remove`, printing JSON."""
+    client = DaemonClient()
+    try:
+        if args.action == "add":
+            urls, problems = list(args.targets), {}
+            if not args.no_expand:
+                from .shards import expand_shards
+                with contextlib.redirect_stdout(sys.stderr):
+                    urls, problems = expand_shards(urls)
+            result = [client.add(url, str(args.dest) if args.dest else None, args.priority, None)
+                      for url in urls]
+            result += [{"url": url, "error": f"Pre-flight: {problem}"} for url, problem in problems.items()]
+        elif args.action == "list":
+            result = client.jobs()
+        elif args.action == "stats":
+            result = client.stats()
+        elif args.action == "priority":
+            if len(args.targets) != 2:
+                raise ValueError("usage: queue priority JOB_ID N")
+            result = client.action(args.targets[0], "priority", {"priority": int(args.targets[1])})
+        else:
+            result = [client.action(job_id, args.action) for job_id in args.targets]
+    except ValueError as e:
+        print(json.dumps({"error": str(e)}))
+        return EXIT_CODES["usage"]
+    except (OSError, RuntimeError) as e:
+        print(json.dumps({"error": str(e)}))
+        return EXIT_CODES["failed"]
+    print(json.dumps(result, indent=2))
+    return EXIT_CODES["ok"]
@@ -0,0 +1,335 @@
+# Script: `.\scripts\delta.py`
+
+# Imports
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from .temporary import DEFAULT_HEADERS, DELTA_SETTINGS, RUNTIME_CONFIG
+
+# ── Delta updates ────────────────────────────────────────────────────────────
+# `launcher.py get URL --delta`.  Model repos re-upload a file with a changed
+# header or one retrained tensor, and the whole thing used to come down again.
+#
+# The serving side publishes a manifest next to the file (FILE.dlsum, made by
+# `launcher.py manifest FILE`): its size and SHA-256, and for every
+# block_size block a weak rolling checksum and a strong 64-bit BLAKE2b.  With
+# --delta, DownLord fetches the manifest, finds which of those blocks the old
+# copy at the destination already holds, copies them into a new file, fetches
+# only the missing ranges with Range requests on one pooled connection, checks
+# the result against the manifest's SHA-256 and swaps it in.  The `delta`
+# event reports the bytes reused, fetched and saved.
+#
+# Finding the blocks, zsync fashion:
+#   1. every block is tried where it was, and where the block before it was
+#      found (a header that grew by 300 bytes shifts everything after it), at
+#      hashlib speed;
+#   2. only if blocks are still missing, the old file is searched byte by byte
+#      with the rsync rolling checksum, skipping what step 1 already matched;
+#      a hit is confirmed by the strong hash and followed block by block.
+# The rolling checksum covers only the first weak_span bytes of a block: it
+# is a filter in front of the strong hash, and a full-block checksum would
+# make building a manifest cost pure-Python time per byte.  Step 2 runs at
+# ~1 MB/s in pure Python, so it stops after roll_limit bytes and whatever it
+# has not found is fetched.
+#
+# No manifest, a server that ignores Range, or a result that fails the hash:
+# the `delta` event carries the reason, the old copy is left alone, and the
+# download goes ahead exactly as it would have without --delta.
+
+
+STRONG_BYTES = 8          # BLAKE2b digest size per block
+RANGE_ATTEMPTS = 3        # per missing range, resuming where it broke off
+COPY_STEP = 4 * 1024 * 1024
+
+
+# Classes
+class DeltaError(Exception):
+    """A delta update cannot be done; the caller downloads the file in full."""
+    pass
+
+
+# Functions
+def manifest_url(url: str) -> str:
+    """Where the manifest for `url` is published: the same path plus the suffix."""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path=parts.path + DELTA_SETTINGS["suffix"]))
+
+
+def weak_parts(data) -> Tuple[int, int]:
+    """The rsync rolling checksum halves (a, b) of `data`."""
+    return sum(data) & 0xFFFF, sum(accumulate(data)) & 0xFFFF
+
+
+def strong_hash(data) -> str:
+    return hashlib.blake2b(data, digest_size=STRONG_BYTES).hexdigest()
+
+
+def build_manifest(path: Path, block_size: Optional[int] = None) -> Dict:
+    """Block checksums and SHA-256 of `path`, as published in FILE.dlsum."""
+    block_size = block_size or DELTA_SETTINGS["block_size"]
+    span = DELTA_SETTINGS["weak_span"]
+    digest = hashlib.sha256()
+    blocks = []
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+            a, b = weak_parts(block[:span])
+            blocks.append([(b << 16) | a, strong_hash(block)])
+    return {"format": "downlord-delta", "version": 1, "size": os.path.getsize(path),
+            "sha256": digest.hexdigest(), "block_size": block_size, "weak_span": span,
+            "blocks": blocks}
+
+
+def write_manifest(path: Path, block_size: Optional[int] = None) -> Tuple[Path, Dict]:
+    """Write FILE.dlsum beside `path`; returns its path and the manifest."""
+    manifest = build_manifest(path, block_size)
+    out = path.with_name(path.name + DELTA_SETTINGS["suffix"])
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp, out)
+    return out, manifest
+
+
+def load_manifest(source: str) -> Dict:
+    """A manifest from a URL or a local path, checked for consistency."""
+    try:
+        if source.lower().startswith(("http://", "https://")):
+            from .transport import get_transport
+            response = get_transport().get(source, headers=DEFAULT_HEADERS.copy(),
+                                           timeout=RUNTIME_CONFIG["download"]["timeout"])
+            if response.status_code != 200:
+                raise DeltaError(f"no manifest at {source} (HTTP {response.status_code})")
+            manifest = response.json()
+        else:
+            with open(source, "r") as f:
+                manifest = json.load(f)
+    except DeltaError:
+        raise
+    except (OSError, ValueError) as e:
+        raise DeltaError(f"manifest unavailable: {e}")
+    try:
+        size, block_size = int(manifest["size"]), int(manifest["block_size"])
+        ok = (manifest.get("format") == "downlord-delta" and block_size > 0
+              and int(manifest["weak_span"]) > 0 and len(manifest["sha256"]) == 64
+              and len(manifest["blocks"]) == -(-size // block_size))
+    except (KeyError, TypeError, ValueError):
+        ok = False
+    if not ok:
+        raise DeltaError(f"not a DownLord delta manifest: {source}")
+    return manifest
+
+
+def match_blocks(old_path: Path, manifest: Dict) -> List[Optional[int]]:
+    """For each manifest block, the offset in `old_path` holding it, or None."""
+    size, block_size = manifest["size"], manifest["block_size"]
+    span, blocks = manifest["weak_span"], manifest["blocks"]
+    found: List[Optional[int]] = [None] * len(blocks)
+    old_size = os.path.getsize(old_path)
+    if not blocks or not old_size:
+        return found
+
+    def length(i: int) -> int:
+        return min(block_size, size - i * block_size)
+
+    with open(old_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as old:
+        def holds(i: int, offset: int) -> bool:
+            end = offset + length(i)
+            return 0 <= offset and end <= old_size and strong_hash(old[offset:end]) == blocks[i][1]
+
+        # 1. Where it was, or shifted like the block before it.
+        shift = 0
+        for i in range(len(blocks)):
+            for s in ((shift, 0) if shift else (0,)):
+                if holds(i, i * block_size + s):
+                    found[i], shift = i * block_size + s, s
+                    break
+        last = len(blocks) - 1
+        if found[last] is None and holds(last, old_size - length(last)):
+            found[last] = old_size - length(last)
+
+        # 2. Rolling search for the rest.
+        index: Dict[int, List[int]] = {}
+        for i, (weak, _) in enumerate(blocks):
+            if found[i] is None and length(i) >= span:
+                index.setdefault(weak, []).append(i)
+        if not index or old_size < span:
+            return found
+        covered = sorted((o, o + length(i)) for i, o in enumerate(found) if o is not None)
+        limit = DELTA_SETTINGS["roll_limit"]
+        pos, rolled, c = 0, 0, 0
+        a = b = None
+        while index and rolled < limit and pos + span <= old_size:
+            while c < len(covered) and covered[c][1] <= pos:
+                c += 1
+            if c < len(covered) and covered[c][0] <= pos:
+                pos, a = covered[c][1], None          # already matched: jump over it
+                continue
+            if a is None:
+                a, b = weak_parts(old[pos:pos + span])
+            hits = index.get((b << 16) | a)
+            if hits:
+                end = pos
+                for i in list(hits):
+                    if found[i] is None and holds(i, pos):
+                        j, p = i, pos
+                        while j < len(blocks) and found[j] is None and holds(j, p):
+                            found[j], p = p, p + length(j)
+                            _unindex(index, blocks[j][0], j)
+                            j += 1
+                        end = max(end, p)
+                if end > pos:
+                    pos, a = end, None
+                    continue
+            if pos + span >= old_size:
+                break
+            out, new = old[pos], old[pos + span]
+            a = (a - out + new) & 0xFFFF
+            b = (b - span * out + a) & 0xFFFF
+            pos += 1
+            rolled += 1
+    return found
+
+
+def missing_ranges(manifest: Dict, found: List[Optional[int]]) -> List[Tuple[int, int]]:
+    """Byte ranges [start, end) of the new file that the old copy does not hold."""
+    size, block_size = manifest["size"], manifest["block_size"]
+    ranges: List[Tuple[int, int]] = []
+    for i, offset in enumerate(found):
+        if offset is not None:
+            continue
+        start, end = i * block_size, min(size, (i + 1) * block_size)
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def delta_update(url: str, old_path: Path, manifest: Dict, temp_dir: Path,
+                 abort_event: Optional[threading.Event] = None) -> Dict:
+    """Rebuild `old_path` as the file the manifest describes; returns the figures.
+
+    Raises DeltaError if it cannot; `old_path` is untouched then.
+    """
+    started = time.perf_counter()
+    size, block_size = manifest["size"], manifest["block_size"]
+    found = match_blocks(old_path, manifest)
+    ranges = missing_ranges(manifest, found)
+    fetched = sum(end - start for start, end in ranges)
+    result = {"size": size, "reused": size - fetched, "fetched": fetched, "ranges": len(ranges),
+              "saved": size - fetched}
+
+    if not ranges and os.path.getsize(old_path) == size and all(
+            offset == i * block_size for i, offset in enumerate(found)):
+        if _sha256(old_path) == manifest["sha256"]:
+            result["seconds"] = round(time.perf_counter() - started, 3)
+            return result                       # already the published version
+
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    temp_path = temp_dir / f"{old_path.name}.delta"
+    try:
+        with open(temp_path, "wb") as out:
+            out.truncate(size)
+            with open(old_path, "rb") as old:
+                for start, source, count in _copy_runs(manifest, found):
+                    old.seek(source)
+                    out.seek(start)
+                    while count > 0:
+                        data = old.read(min(COPY_STEP, count))
+                        if not data:
+                            raise DeltaError(f"{old_path.name} changed while it was read")
+                        out.write(data)
+                        count -= len(data)
+            _fetch_ranges(url, ranges, out, abort_event)
+            out.flush()
+            os.fsync(out.fileno())
+        if _sha256(temp_path) != manifest["sha256"]:
+            raise DeltaError("the rebuilt file does not match the manifest's SHA-256")
+        os.replace(temp_path, old_path)
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        raise
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _unindex(index: Dict[int, List[int]], weak: int, i: int) -> None:
+    hits = index.get(weak)
+    if hits and i in hits:
+        hits.remove(i)
+        if not hits:
+            del index[weak]
+
+
+def _copy_runs(manifest: Dict, found: List[Optional[int]]) -> List[Tuple[int, int, int]]:
+    """(new offset, old offset, length) copies, consecutive blocks merged."""
+    size, block_size = manifest["size"], manifest["block_size"]
+    runs: List[Tuple[int, int, int]] = []
+    for i, source in enumerate(found):
+        if source is None:
+            continue
+        start, count = i * block_size, min(block_size, size - i * block_size)
+        if runs and runs[-1][0] + runs[-1][2] == start and runs[-1][1] + runs[-1][2] == source:
+            runs[-1] = (runs[-1][0], runs[-1][1], runs[-1][2] + count)
+        else:
+            runs.append((start, source, count))
+    return runs
+
+
+def _fetch_ranges(url: str, ranges: List[Tuple[int, int]], out,
+                  abort_event: Optional[threading.Event]) -> None:
+    """Write the bytes of each range of `url` at the same offset in `out`."""
+    if not ranges:
+        return
+    from requests.exceptions import RequestException
+    from .transport import get_transport
+    timeout = RUNTIME_CONFIG["download"]["timeout"]
+    with get_transport().session() as session:
+        for start, end in ranges:
+            pos, attempt = start, 0
+            while pos < end:
+                if abort_event is not None and abort_event.is_set():
+                    raise DeltaError("stopped")
+                headers = DEFAULT_HEADERS.copy()
+                headers["Range"] = f"bytes={pos}-{end - 1}"
+                try:
+                    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+                        if response.status_code != 206:
+                            raise DeltaError(f"the server answered HTTP {response.status_code} "
+                                             f"to a range request")
+                        if not response.headers.get("Content-Range", "").startswith(f"bytes {pos}-"):
+                            raise DeltaError("the server sent a different range than asked for")
+                        out.seek(pos)
+                        for data in response.iter_content(1024 * 1024):
+                            data = data[:end - pos]
+                            out.write(data)
+                            pos += len(data)
+                            if abort_event is not None and abort_event.is_set():
+                                raise DeltaError("stopped")
+                    error = "the body ended early"
+                except RequestException as e:
+                    error = str(e)
+                if pos < end:
+                    attempt += 1
+                    if attempt >= RANGE_ATTEMPTS:
+                        raise DeltaError(f"range {start}-{end - 1} failed: {error}")
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,203 @@
+# Script: `.\scripts\events.py`
+
+# Imports
+import errno
+import json
+import os
+import stat
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Union
+
+# ── Event stream ─────────────────────────────────────────────────────────────
+# Machine-readable JSON lines, one event per line, for monitoring:
+#
+#   probe      result of get_remote_file_info (size, etag, type, attempts, seconds)
+#   resume     Available / Unavailable / N/A from _resolve_response_mode
+#   progress   periodic, one per active download
+#   retry      attempt number, reason (exception type), what happens next
+#   stall      no bytes landed for STALL_AFTER seconds; `recovered` when they do
+#   complete   final size, session average and peak throughput, elapsed
+#   failed / stopped   stopped carries the offset to resume from
+#   paused / unpaused  a warm pause began / ended (scripts/cancel.py)
+#   timings    per-phase breakdown of a download, with detailed_logging on
+#   extracted / extract_failed   auto_extract results (scripts/extract.py)
+#   deduplicated   linked from the content store instead of downloaded (scripts/store.py)
+#   delta      an old copy updated from a block manifest: bytes reused and
+#              fetched, or the fallback reason (scripts/delta.py)
+#   preflight  a model or archive refused on its first bytes: what they turned
+#              out to be (scripts/preflight.py)
+#   shards     a sharded model URL expanded: files found, how many failed the
+#              header check (scripts/shards.py)
+#   member / zip   `launcher.py zip`: one per member listed, then the archive
+#              size, bytes fetched and requests, or the fallback reason
+#
+# The sink is a file (appended), a FIFO, or "-" for stdout (headless mode).
+#
+# Cost: emit() with no sink open and no observer (scripts/metrics.py
+# subscribes one) is two attribute tests.  Progress and stall
+# events are NOT emitted from the download loop at all -- a ticker thread reads
+# the progress registry once per interval -- so the stream costs the same at
+# ten chunks a second as at ten thousand.  Everything else is emitted only on
+# state changes (a probe, a retry, a completion), which are rare by nature.
+#
+# A FIFO is opened non-blocking.  With no reader attached, events are dropped
+# and the open is retried at most once a second; if the reader falls behind and
+# the pipe fills, events are dropped rather than stalling a download.
+
+STALL_AFTER = 30.0   # seconds without a chunk before a `stall` event
+
+
+# Classes
+class EventStream:
+    """JSON-lines event sink shared by the engine, headless mode and the daemon."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._target = None
+        self._stream = None
+        self._fifo_fd = None
+        self._next_open = 0.0
+        self._ticker = None
+        self._ticker_stop = threading.Event()
+        self._observers = ()
+        self.enabled = False
+
+    def open(self, target: Union[str, Path]) -> None:
+        """Start writing events to `target`: a file path, a FIFO, or "-" for stdout."""
+        self.close()
+        self._target = str(target)
+        if self._target == "-":
+            # Bound now: headless mode redirects sys.stdout to stderr for prose.
+            self._stream = sys.stdout
+        elif self._is_fifo(self._target):
+            self._open_fifo()
+        else:
+            path = Path(self._target).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream = open(path, "a", buffering=1)
+        self.enabled = True
+
+    def close(self) -> None:
+        self.stop_progress()
+        with self._lock:
+            if self._stream is not None and self._stream is not sys.stdout:
+                try:
+                    self._stream.close()
+                except OSError:
+                    pass
+            if self._fifo_fd is not None:
+                try:
+                    os.close(self._fifo_fd)
+                except OSError:
+                    pass
+            self._stream = None
+            self._fifo_fd = None
+            self.enabled = False
+
+    def subscribe(self, callback) -> None:
+        """Also hand every event to `callback(event, fields)`, sink or no sink (metrics)."""
+        with self._lock:
+            self._observers = self._observers + (callback,)
+
+    def emit(self, event: str, **fields) -> None:
+        """Write one event.  Never raises: monitoring must not break a download."""
+        for observer in self._observers:
+            try:
+                observer(event, fields)
+            except Exception:
+                pass
+        if not self.enabled:
+            return
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields}) + "\n"
+        with self._lock:
+            try:
+                if self._stream is not None:
+                    self._stream.write(line)
+                    self._stream.flush()
+                elif self._target is not None:
+                    self._write_fifo(line.encode("utf-8"))
+            except (OSError, ValueError):
+                pass
+
+    # Progress / stall ticker
+    def start_progress(self, interval: float = 1.0) -> None:
+        """Emit progress (and stall) events for every active download each `interval`."""
+        if self._ticker and self._ticker.is_alive():
+            return
+        self._ticker_stop.clear()
+        self._ticker = threading.Thread(target=self._tick, args=(interval,), daemon=True)
+        self._ticker.start()
+
+    def stop_progress(self) -> None:
+        self._ticker_stop.set()
+        if self._ticker and self._ticker.is_alive() and self._ticker is not threading.current_thread():
+            self._ticker.join(timeout=1)
+        self._ticker = None
+
+    def _tick(self, interval: float) -> None:
+        from .temporary import ACTIVE_DOWNLOADS
+        stalled = set()
+        while not self._ticker_stop.wait(interval):
+            if not self.enabled and not self._observers:
+                continue
+            now = time.time()
+            for record in ACTIVE_DOWNLOADS:
+                dl = record.snapshot(now)
+                self.emit("progress", file=dl['filename'], url=dl['url'], status=dl['status'],
+                          current=dl['current'], total=dl['total'], speed=round(dl['speed'], 1),
+                          average=round(dl['average_speed'], 1), eta=round(dl['remaining'], 1))
+                idle = now - record.last_chunk_time
+                if dl['status'] == "downloading" and idle >= STALL_AFTER:
+                    if record not in stalled:
+                        stalled.add(record)
+                        self.emit("stall", file=dl['filename'], seconds=round(idle, 1),
+                                  current=dl['current'], total=dl['total'])
+                elif record in stalled:
+                    stalled.discard(record)
+                    self.emit("recovered", file=dl['filename'], current=dl['current'])
+            stalled.intersection_update(ACTIVE_DOWNLOADS)
+
+    # FIFO handling
+    @staticmethod
+    def _is_fifo(target: str) -> bool:
+        try:
+            return stat.S_ISFIFO(os.stat(target).st_mode)
+        except OSError:
+            return False
+
+    def _open_fifo(self) -> None:
+        self._next_open = time.time() + 1.0
+        try:
+            self._fifo_fd = os.open(self._target, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            if e.errno != errno.ENXIO:   # ENXIO: no reader attached yet
+                raise
+            self._fifo_fd = None
+
+    def _write_fifo(self, data: bytes) -> None:
+        if self._fifo_fd is None:
+            if time.time() < self._next_open:
+                return
+            self._open_fifo()
+            if self._fifo_fd is None:
+                return
+        try:
+            os.write(self._fifo_fd, data)
+        except BlockingIOError:
+            pass   # reader is behind; drop rather than stall the download
+        except BrokenPipeError:
+            os.close(self._fifo_fd)
+            self._fifo_fd = None   # reader went away; reopen when one returns
+
+
+# Globals
+EVENTS = EventStream()
+
+
+# Functions
+def emit(event: str, **fields) -> None:
+    """Module-level shortcut for EVENTS.emit."""
+    EVENTS.emit(event, **fields)
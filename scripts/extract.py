@@ -0,0 +1,293 @@
+# Script: `.\scripts\extract.py`
+
+# Imports
+import contextlib
+import json
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .events import emit
+from .temporary import RUNTIME_CONFIG
+
+# ── Auto-extract ─────────────────────────────────────────────────────────────
+# RUNTIME_CONFIG["storage"]["auto_extract"] (`launcher.py get --extract`).
+#
+# Tarballs (.tar, .tar.gz/.tgz, .tar.bz2, .tar.xz, .tar.zst) are unpacked
+# WHILE they download.  A StreamingExtractor thread reads the .part file from
+# byte 0 as it grows -- never past what download_file has written and
+# fsynced -- through the decompressor and tarfile's stream mode, so the tree is
+# ready when the last byte lands instead of after a second full pass.  Reading
+# the .part rather than being handed chunks means a resumed download needs
+# nothing special: the prefix from the earlier session comes back off disk
+# (usually the page cache) and the live bytes follow.  If the download stops
+# or restarts from 0, the extractor is cancelled; the next attempt unpacks
+# again over the same folder.  .tar.zst needs the optional `zstandard` package.
+#
+# Zips cannot be streamed -- the central directory is at the end -- so they are
+# extracted from the finished file, member by member from the central
+# directory.  Each member is CRC-checked as it is written, and the ones done
+# are recorded in `.downlord-extract.json` in the target folder, so an
+# interrupted extraction carries on without re-reading what is already
+# verified.
+#
+# Either way the archive itself is kept, the target is a folder named after it
+# beside it, and a failed extraction is reported but never fails the download.
+#
+# Remote zips (`launcher.py zip URL [MEMBER ...]`): a zip does not have to be
+# downloaded to be read.  The same extract_zip runs over a transport.RangeFile
+# instead: one suffix request brings the end of central directory and usually
+# the whole directory, listing costs nothing more, and each selected member is
+# one Range request spanning exactly its local header and compressed data --
+# 200 MB out of a 20 GB archive fetches about 200 MB.  Members are matched by
+# name or glob, CRC-checked and recorded in the manifest as usual, so a re-run
+# fetches only what is missing.  A server that refuses ranges gets the old
+# way, announced: the whole archive is downloaded, then only the selected
+# members are extracted from it.
+
+TAR_SUFFIXES = {
+    ".tar": "r|",
+    ".tar.gz": "r|gz", ".tgz": "r|gz",
+    ".tar.bz2": "r|bz2", ".tbz2": "r|bz2",
+    ".tar.xz": "r|xz", ".txz": "r|xz",
+    ".tar.zst": "zst", ".tzst": "zst",
+}
+ZIP_SUFFIXES = (".zip",)
+ZIP_MANIFEST = ".downlord-extract.json"
+
+
+# Classes
+class _GrowingFile:
+    """Read-only view of a file another thread is still appending to."""
+
+    def __init__(self, path: Path, follower: "PartFollower"):
+        self._f = open(path, "rb")
+        self._follower = follower
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        follower = self._follower
+        while True:
+            if follower.cancelled.is_set():
+                raise _Cancelled()
+            follower.wake.clear()   # before looking, so an advance() in between still wakes us
+            available = follower.available - self._pos
+            if available > 0:
+                data = self._f.read(available if size is None or size < 0 else min(size, available))
+                self._pos += len(data)
+                follower.consumed = self._pos
+                return data
+            if follower.complete.is_set():
+                return b""
+            follower.wake.wait(0.5)
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class PartFollower:
+    """A thread that reads a .part from byte 0 while download_file appends to it.
+
+    download_file calls advance(written) after each chunk, finish() once the
+    last byte is on disk and cancel() if the attempt ends any other way.
+    Subclasses implement consume(stream); see StreamingExtractor here and
+    StreamingHasher in scripts/store.py.
+    """
+
+    def __init__(self, part_path: Path):
+        self.part_path = part_path
+        self.available = 0          # bytes of the .part that are written and synced
+        self.consumed = 0           # bytes of it read so far
+        self.error: Optional[str] = None
+        self.wake = threading.Event()
+        self.complete = threading.Event()
+        self.cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "PartFollower":
+        self._thread.start()
+        return self
+
+    def advance(self, written: int) -> None:
+        self.available = written
+        self.wake.set()
+
+    def finish(self, timeout: Optional[float] = None) -> Tuple[bool, str]:
+        """The last byte is on disk: drain, wait for the thread, report."""
+        self.complete.set()
+        self.wake.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False, "still running"
+        return self.error is None, self.error or ""
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        self.wake.set()
+
+    def needs_from(self) -> int:
+        """Offset below which this follower will not read again."""
+        return self.consumed if self._thread.is_alive() else self.available
+
+    def consume(self, stream) -> None:
+        raise NotImplementedError
+
+    def failed(self) -> None:
+        """Called on the follower's thread after consume() raised; self.error is set."""
+
+    def _run(self) -> None:
+        source = _GrowingFile(self.part_path, self)
+        try:
+            self.consume(source)
+        except _Cancelled:
+            self.error = "cancelled"
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.failed()
+        finally:
+            source.close()
+
+
+class StreamingExtractor(PartFollower):
+    """Unpacks a tarball from its growing .part file."""
+
+    def __init__(self, part_path: Path, archive_name: str, target: Path, mode: str):
+        super().__init__(part_path)
+        self.archive_name = archive_name
+        self.target = target
+        self.mode = mode
+        self.members = 0
+
+    def consume(self, source) -> None:
+        started = time.time()
+        stream = source
+        if self.mode == "zst":
+            try:
+                import zstandard
+            except ImportError:
+                raise RuntimeError(".tar.zst needs the zstandard package (pip install zstandard)")
+            stream = zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True)
+        mode = "r|" if self.mode == "zst" else self.mode
+        self.target.mkdir(parents=True, exist_ok=True)
+        with tarfile.open(fileobj=stream, mode=mode) as tar:
+            for member in tar:
+                _extract_tar_member(tar, member, self.target)
+                self.members += 1
+        emit("extracted", file=self.archive_name, path=str(self.target), members=self.members,
+             seconds=round(time.time() - started, 3), streamed=True)
+
+    def failed(self) -> None:
+        emit("extract_failed", file=self.archive_name, error=self.error)
+
+
+# Functions
+def auto_extract_enabled() -> bool:
+    return bool(RUNTIME_CONFIG["storage"].get("auto_extract"))
+
+
+def archive_kind(filename: str) -> Tuple[Optional[str], str]:
+    """("tar", mode) / ("zip", "") / (None, "") for a filename, by suffix."""
+    lower = filename.lower()
+    for suffix in sorted(TAR_SUFFIXES, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return "tar", TAR_SUFFIXES[suffix]
+    if lower.endswith(ZIP_SUFFIXES):
+        return "zip", ""
+    return None, ""
+
+
+def extract_target(out_path: Path) -> Path:
+    """`data.tar.gz` -> `data/` beside it."""
+    name = out_path.name
+    lower = name.lower()
+    for suffix in sorted(list(TAR_SUFFIXES) + list(ZIP_SUFFIXES), key=len, reverse=True):
+        if lower.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return out_path.parent / (name or f"{out_path.name}.d")
+
+
+def start_streaming(part_path: Path, out_path: Path) -> Optional[StreamingExtractor]:
+    """A running extractor for a tarball download, or None for anything else."""
+    kind, mode = archive_kind(out_path.name)
+    if kind != "tar":
+        return None
+    return StreamingExtractor(part_path, out_path.name, extract_target(out_path), mode).start()
+
+
+def extract_zip(path: Path, target: Optional[Path] = None,
+                select: Optional[Callable[[str], bool]] = None,
+                archive: Optional[zipfile.ZipFile] = None) -> Tuple[bool, str]:
+    """Extract a finished zip, skipping members a previous run already verified.
+
+    `select(name)` limits it to some members; `archive` is an already open
+    ZipFile to read instead of `path` (a remote one, over a RangeFile).
+    """
+    target = target or extract_target(path)
+    manifest_path = target / ZIP_MANIFEST
+    started = time.time()
+    try:
+        done: Dict[str, int] = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    except (OSError, ValueError):
+        done = {}
+    extracted = skipped = 0
+    try:
+        target.mkdir(parents=True, exist_ok=True)
+        with (contextlib.nullcontext(archive) if archive is not None
+              else zipfile.ZipFile(path)) as archive:
+            for info in archive.infolist():
+                if select is not None and not select(info.filename):
+                    continue
+                dest = target / info.filename
+                if (done.get(info.filename) == info.CRC and not info.is_dir()
+                        and dest.is_file() and dest.stat().st_size == info.file_size):
+                    skipped += 1
+                    continue
+                # ZipExtFile checks the CRC as the last byte is read, so a member
+                # only reaches the manifest once it is known good.
+                archive.extract(info, target)
+                done[info.filename] = info.CRC
+                extracted += 1
+                if extracted % 64 == 0:
+                    _write_manifest(manifest_path, done)
+        _write_manifest(manifest_path, done)
+    except Exception as e:
+        _write_manifest(manifest_path, done)
+        error = f"{type(e).__name__}: {e}"
+        emit("extract_failed", file=path.name, error=error)
+        return False, error
+    emit("extracted", file=path.name, path=str(target), members=extracted, skipped=skipped,
+         seconds=round(time.time() - started, 3), streamed=False)
+    return True, ""
+
+
+def _write_manifest(manifest_path: Path, done: Dict[str, int]) -> None:
+    try:
+        tmp = manifest_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(done))
+        os.replace(tmp, manifest_path)
+    except OSError:
+        pass
+
+
+def _extract_tar_member(tar: tarfile.TarFile, member: tarfile.TarInfo, target: Path) -> None:
+    if hasattr(tarfile, "data_filter"):
+        # Python 3.12+ (and 3.8.17+/3.9.17+/3.10.12+/3.11.4+): no absolute
+        # paths, no "..", no links out of the tree, no device files.
+        tar.extract(member, target, filter="data")
+        return
+    resolved = (target / member.name).resolve()
+    if not str(resolved).startswith(str(target.resolve())) or member.isdev():
+        raise tarfile.TarError(f"Refusing unsafe member: {member.name}")
+    if (member.issym() or member.islnk()) and not str(
+            (resolved.parent / member.linkname).resolve()).startswith(str(target.resolve())):
+        raise tarfile.TarError(f"Refusing link out of the archive: {member.name}")
+    tar.extract(member, target)
@@ -0,0 +1,480 @@
+# Script: `.\scripts\headless.py`
+
+# Imports
+import argparse
+import contextlib
+import fnmatch
+import hashlib
+import sys
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from . import temporary
+from .events import EVENTS, emit
+from .profiling import PROFILER
+from .scheduler import Scheduler
+from .temporary import (APP_TITLE, BASE_DIR, BUFFER_SETTINGS, DAEMON_SETTINGS, DELTA_SETTINGS,
+                        EXIT_CODES, METRICS_SETTINGS, PARTIAL_DIRNAME, PERSISTENT_FILE,
+                        RUNTIME_CONFIG, SCHEDULER_SETTINGS)
+
+# ── Headless mode ────────────────────────────────────────────────────────────
+# `launcher.py get URL... [--dest DIR] [--parallel N] [--sha256 HEX ...]`
+#
+# For cron jobs and CI that prefetch model weights.  It drives exactly the same
+# engine as the menu -- DownloadManager.download_file, with its resume, retry
+# and SourceForge handling -- but with interactive=False, so there is no key
+# listener, no cbreak mode, no screen clears, no display thread and no
+# 5-10 second summary countdown per file.
+#
+# stdout carries ONLY machine-readable output: the JSON-lines event stream
+# from scripts/events.py (probe, resume, progress, retry, stall, complete...),
+# plus start / verified / checksum / failed from this module.  `--events PATH`
+# sends it to a file or FIFO instead.  The engine's human-readable prints are
+# redirected to stderr for the duration, so `launcher.py get ... | jq` works
+# and the log still has the prose.
+#
+# Exit status is one of temporary.EXIT_CODES.
+#
+# `--timings` prints a per-phase breakdown for each download (and emits a
+# `timings` event); `--profile FILE` also runs the batch under cProfile.  See
+# scripts/profiling.py.  `--metrics [PORT]` serves Prometheus metrics while
+# it runs; see scripts/metrics.py.  `--buffer-budget MB` caps the receive
+# buffers of all downloads together; see scripts/buffers.py.
+#
+# `get --delta` updates a file already at the destination from the block
+# manifest published beside the URL, fetching only the changed ranges;
+# `launcher.py manifest FILE...` writes those manifests.  See scripts/delta.py.
+#
+# A shard of a sharded model, or its index.json, stands for the whole model:
+# every shard is queued, after a header check of each.  One --sha256 or
+# --manifest cannot cover them all, so it is refused for such a URL;
+# `--no-expand` takes URLs literally.  See scripts/shards.py.
+#
+# `launcher.py zip URL` lists a remote zip and `zip URL MEMBER...` fetches
+# only those members, with Range requests; see scripts/extract.py.
+#
+# `launcher.py daemon` and `launcher.py queue ...` share this parser; their
+# work is done in scripts/daemon.py.
+
+
+# Functions
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="launcher.py",
+        description=f"{APP_TITLE} headless mode. Emits JSON lines on stdout."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    get = commands.add_parser("get", help="Download one or more URLs without the menu.")
+    get.add_argument("urls", nargs="+", metavar="URL", help="http:// or https:// URL(s) to download.")
+    get.add_argument("--dest", type=Path, default=None,
+                     help="Destination folder (default: the configured downloads location).")
+    get.add_argument("--parallel", type=int, default=None,
+                     help=f"How many files to download at once (default: 1, or "
+                          f"{SCHEDULER_SETTINGS['max_parallel']} for the shards of a sharded model).")
+    get.add_argument("--per-host", type=int, default=None, metavar="N",
+                     help="At most N of those from any one host (default: same as --parallel).")
+    get.add_argument("--sha256", action="append", default=[], metavar="HEX",
+                     help="Expected SHA-256, once per URL in the same order (not for a URL that "
+                          "expands into a sharded model; see --no-expand).")
+    get.add_argument("--chunk", type=int, default=None,
+                     help="Read size in bytes (default: the configured chunk).")
+    get.add_argument("--retries", type=int, default=None,
+                     help="Maximum attempts per file (default: the configured retries).")
+    get.add_argument("--no-expand", action="store_true",
+                     help="Download a shard or shard index URL as it is, not the whole sharded model.")
+    get.add_argument("--extract", action="store_true",
+                     help="Unpack archives: tarballs while they download, zips when done (auto_extract).")
+    get.add_argument("--dedupe", action="store_true",
+                     help="Keep completed files once in a content store and link, not fetch, "
+                          "files already in it (content_store).")
+    get.add_argument("--organize", action="store_true",
+                     help="Also link completed files into model/, archive/... folders (organize_by_type).")
+    get.add_argument("--delta", action="store_true",
+                     help="Update a file already at the destination from its published block manifest, "
+                          "fetching only the changed ranges.")
+    get.add_argument("--manifest", action="append", default=[], metavar="URL|PATH",
+                     help=f"Manifest for --delta, once per URL in the same order "
+                          f"(default: the URL + {DELTA_SETTINGS['suffix']}).")
+    get.add_argument("--faults", type=Path, default=None, metavar="FILE",
+                     help="Test mode: replay a JSON fault script (see scripts/transport.py).")
+    get.add_argument("--interval", type=float, default=1.0,
+                     help="Seconds between progress events (default: 1).")
+    get.add_argument("--events", default="-", metavar="PATH",
+                     help='Event stream target: a file, a FIFO, or "-" for stdout (default).')
+
+    daemon = commands.add_parser("daemon", help="Run the download queue daemon with its localhost API.")
+    daemon.add_argument("--detach", action="store_true",
+                        help="Start in the background and return immediately.")
+    daemon.add_argument("--parallel", type=int, default=DAEMON_SETTINGS["max_parallel"],
+                        help=f"Jobs to run at once (default: {DAEMON_SETTINGS['max_parallel']}).")
+    daemon.add_argument("--port", type=int, default=DAEMON_SETTINGS["port"],
+                        help=f"Loopback port for the control API (default: {DAEMON_SETTINGS['port']}).")
+    daemon.add_argument("--events", default=None, metavar="PATH",
+                        help='Also write the JSON-lines event stream to a file, FIFO or "-".')
+    for command in (get, daemon):
+        command.add_argument("--timings", action="store_true",
+                             help="Per-phase timing breakdown for every download (detailed_logging).")
+        command.add_argument("--profile", type=Path, default=None, metavar="FILE",
+                             help="cProfile the downloads; merged stats to FILE, phases to FILE.folded.")
+        command.add_argument("--metrics", type=int, nargs="?", const=METRICS_SETTINGS["port"],
+                             default=None, metavar="PORT",
+                             help=f"Serve Prometheus metrics on 127.0.0.1:PORT/metrics "
+                                  f"(default port: {METRICS_SETTINGS['port']}).")
+        command.add_argument("--buffer-budget", type=float, default=None, metavar="MB",
+                             help=f"Receive buffer memory for all downloads together "
+                                  f"(default: {BUFFER_SETTINGS['budget'] // (1024 * 1024)}).")
+
+    manifest = commands.add_parser("manifest", help="Write delta manifests (FILE.dlsum) for files you publish.")
+    manifest.add_argument("files", nargs="+", type=Path, metavar="FILE")
+    manifest.add_argument("--block-size", type=int, default=DELTA_SETTINGS["block_size"] // 1024,
+                          metavar="KB", help=f"Block size (default: {DELTA_SETTINGS['block_size'] // 1024}).")
+
+    remote_zip = commands.add_parser("zip", help="List a remote zip, or fetch only some of its members.")
+    remote_zip.add_argument("url", metavar="URL", help="http:// or https:// URL of a .zip.")
+    remote_zip.add_argument("members", nargs="*", metavar="MEMBER",
+                            help="Member names or glob patterns to fetch; none lists the members.")
+    remote_zip.add_argument("--dest", type=Path, default=None,
+                            help="Destination folder; members go into a folder named after the archive.")
+    remote_zip.add_argument("--events", default="-", metavar="PATH",
+                            help='Event stream target: a file, a FIFO, or "-" for stdout (default).')
+
+    jobs = commands.add_parser("queue", help="Control a running daemon; prints JSON.")
+    jobs.add_argument("action", choices=("add", "list", "stats", "pause", "resume", "priority", "remove"))
+    jobs.add_argument("targets", nargs="*", metavar="ARG",
+                      help="URLs for add, job ids for pause/resume/remove, JOB_ID N for priority.")
+    jobs.add_argument("--dest", type=Path, default=None,
+                      help="Destination folder for add (default: the configured downloads location).")
+    jobs.add_argument("--priority", type=int, default=0,
+                      help="Priority for add; higher runs first (default: 0).")
+    jobs.add_argument("--no-expand", action="store_true",
+                      help="For add: queue a shard or shard index URL as it is, not the whole model.")
+    return parser
+
+
+def sha256_file(path: Path, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _default_dest() -> Path:
+    from .configure import Config_Manager, get_downloads_path
+    if PERSISTENT_FILE.exists():
+        return get_downloads_path(Config_Manager.load())
+    return BASE_DIR / "downloads"
+
+
+def output_key(url: str, dest: Path) -> Optional[str]:
+    """The file `url` will land in under `dest`, as a Scheduler key; None if only the probe can tell."""
+    from .shards import url_filename
+    name = url_filename(url)
+    return str((dest / name).resolve()) if "." in name else None
+
+
+def fetch(url: str, dest: Path, expected_sha256: Optional[str] = None,
+          chunk: Optional[int] = None, retries: Optional[int] = None,
+          abort_event: Optional[threading.Event] = None,
+          scheduled: bool = False, delta: bool = False,
+          manifest: Optional[str] = None) -> Tuple[str, Optional[Path], str]:
+    """
+    Download one URL into `dest` with the headless engine.  With `delta`, a
+    file already there is first updated from its block manifest.
+
+    Returns (outcome, path, error) where outcome is an EXIT_CODES key: "ok",
+    "failed" or "checksum".  Shared by `launcher.py get` and the daemon, which
+    both run it under a Scheduler (`scheduled=True`), so it may raise
+    RetryLater.
+    """
+    from .manage import DownloadManager, URLProcessor, get_file_name_from_url
+
+    dm = DownloadManager(dest, interactive=False, temp_dir=dest / PARTIAL_DIRNAME)
+    if retries:
+        dm.config["retries"] = retries
+    chunk_size = chunk or dm.config.get("chunk", 4096000)
+
+    emit("start", url=url)
+    download_url, metadata = URLProcessor.process_url(url, dm.config)
+    filename = metadata.get("filename") or get_file_name_from_url(download_url)
+    if not filename:
+        error = "Unable to extract filename from the URL."
+        emit("failed", url=url, error=error)
+        return "failed", None, error
+
+    if delta and (dest / filename).is_file():
+        outcome = _delta_fetch(url, download_url, dest / filename, manifest, expected_sha256,
+                               abort_event)
+        if outcome is not None:
+            return outcome
+
+    # The engine emits its own complete / failed / stopped events.
+    success, error = dm.download_file(url, dest / filename, chunk_size,
+                                      abort_event=abort_event, scheduled=scheduled,
+                                      expected_sha256=expected_sha256,
+                                      probed=(download_url, metadata))
+    if not success:
+        return "failed", None, error or "unknown error"
+
+    path = dm.completed_path or dest / filename
+    if expected_sha256:
+        # Hashed while it downloaded (StreamingHasher) unless it was already there.
+        actual = dm.completed_sha256 or sha256_file(path)
+        if actual != expected_sha256.lower():
+            emit("checksum", url=url, file=path.name, path=str(path),
+                 expected=expected_sha256.lower(), actual=actual)
+            return "checksum", path, f"SHA-256 mismatch: got {actual}"
+        emit("verified", url=url, file=path.name, sha256=actual)
+    return "ok", path, ""
+
+
+def _delta_fetch(url: str, download_url: str, path: Path, manifest_source: Optional[str],
+                 expected_sha256: Optional[str], abort_event: Optional[threading.Event]
+                 ) -> Optional[Tuple[str, Optional[Path], str]]:
+    """Update `path` from its manifest; None means download it in full instead."""
+    from .delta import DeltaError, delta_update, load_manifest, manifest_url
+
+    try:
+        manifest = load_manifest(manifest_source or manifest_url(download_url))
+        if expected_sha256 and manifest["sha256"] != expected_sha256.lower():
+            raise DeltaError("the manifest describes another version than --sha256")
+        result = delta_update(download_url, path, manifest, path.parent / PARTIAL_DIRNAME, abort_event)
+    except DeltaError as e:
+        if abort_event is not None and abort_event.is_set():
+            emit("stopped", url=url, file=path.name)
+            return "failed", None, "Download stopped by user"
+        emit("delta", url=url, file=path.name, fallback=str(e))
+        print(f"Delta update of {path.name} not possible ({e}); downloading it in full.")
+        return None
+
+    emit("delta", url=url, file=path.name, **result)
+    print(f"Delta update of {path.name}: reused {result['reused']} bytes, fetched "
+          f"{result['fetched']} in {result['ranges']} range(s).")
+    emit("complete", file=path.name, url=url, path=str(path), size=result["size"],
+         elapsed=result["seconds"], delta=True)
+    if expected_sha256:
+        emit("verified", url=url, file=path.name, sha256=manifest["sha256"])
+    return "ok", path, ""
+
+
+def cmd_manifest(args: argparse.Namespace) -> int:
+    from .delta import write_manifest
+
+    for path in args.files:
+        if not path.is_file():
+            emit("failed", file=str(path), error="No such file.")
+            return EXIT_CODES["usage"]
+    for path in args.files:
+        out, manifest = write_manifest(path, max(1, args.block_size) * 1024)
+        emit("manifest", file=path.name, path=str(out), size=manifest["size"],
+             sha256=manifest["sha256"], blocks=len(manifest["blocks"]),
+             block_size=manifest["block_size"])
+    return EXIT_CODES["ok"]
+
+
+def cmd_zip(args: argparse.Namespace) -> int:
+    import zipfile
+    from .extract import extract_target, extract_zip
+    from .manage import DownloadManager, URLProcessor, get_file_name_from_url
+    from .temporary import DEFAULT_HEADERS
+    from .transport import RangeError, RangeFile
+
+    if not URLProcessor.validate_url(args.url):
+        emit("failed", error=f"Invalid URL: {args.url}")
+        return EXIT_CODES["usage"]
+    dest = (args.dest or _default_dest()).expanduser().resolve()
+    dest.mkdir(parents=True, exist_ok=True)
+    dm = DownloadManager(dest, interactive=False, temp_dir=dest / PARTIAL_DIRNAME)
+    download_url, metadata = URLProcessor.process_url(args.url, dm.config)
+    filename = metadata.get("filename") or get_file_name_from_url(download_url) or "archive.zip"
+    target = extract_target(dest / filename)
+
+    def select(name: str) -> bool:
+        return any(name == p or fnmatch.fnmatchcase(name, p) for p in args.members)
+
+    try:
+        remote = RangeFile(download_url, headers=DEFAULT_HEADERS,
+                           timeout=RUNTIME_CONFIG["download"]["timeout"])
+    except (RangeError, OSError) as e:
+        if not args.members:
+            emit("failed", url=args.url, file=filename,
+                 error=f"Cannot list without byte ranges ({e}); name the members to download "
+                       f"the whole archive and extract just those.")
+            return EXIT_CODES["failed"]
+        emit("zip", url=args.url, file=filename, fallback=str(e))
+        print(f"{filename}: no byte ranges ({e}); downloading the whole archive, "
+              f"then extracting the selected members.")
+        outcome, path, error = fetch(args.url, dest)
+        if outcome != "ok":
+            return EXIT_CODES["failed"]
+        ok, _ = extract_zip(path, target, select)
+        return EXIT_CODES["ok" if ok else "failed"]
+
+    with remote:
+        try:
+            archive = zipfile.ZipFile(remote)
+        except (zipfile.BadZipFile, RangeError, OSError) as e:
+            emit("failed", url=args.url, file=filename, error=f"Not a readable zip: {e}")
+            return EXIT_CODES["failed"]
+        with archive:
+            infos = archive.infolist()
+            if not args.members:
+                for info in infos:
+                    emit("member", file=filename, name=info.filename, size=info.file_size,
+                         compressed=info.compress_size, dir=info.is_dir())
+                emit("zip", url=args.url, file=filename, size=remote.size, members=len(infos),
+                     fetched=remote.fetched, requests=remote.requests)
+                return EXIT_CODES["ok"]
+            chosen = [info for info in infos if select(info.filename) and not info.is_dir()]
+            if not chosen:
+                emit("failed", url=args.url, file=filename, error="No member matches.")
+                return EXIT_CODES["failed"]
+            # Each member's bytes end where the next local header (or the
+            # central directory) begins: one exact Range request per member.
+            remote.boundaries = sorted({info.header_offset for info in infos}
+                                       | {archive.start_dir, remote.size})
+            ok, _ = extract_zip(dest / filename, target, select, archive=archive)
+        emit("zip", url=args.url, file=filename, size=remote.size, members=len(chosen),
+             fetched=remote.fetched, requests=remote.requests, saved=remote.size - remote.fetched)
+    return EXIT_CODES["ok" if ok else "failed"]
+
+
+def cmd_get(args: argparse.Namespace) -> int:
+    from .manage import URLProcessor
+
+    bad = [u for u in args.urls if not URLProcessor.validate_url(u)]
+    if bad:
+        emit("failed", error=f"Invalid URL(s): {', '.join(bad)}")
+        return EXIT_CODES["usage"]
+    if len(args.sha256) > len(args.urls):
+        emit("failed", error="More --sha256 values than URLs.")
+        return EXIT_CODES["usage"]
+    if len(args.manifest) > len(args.urls):
+        emit("failed", error="More --manifest values than URLs.")
+        return EXIT_CODES["usage"]
+
+    options = {url: (args.sha256[i] if i < len(args.sha256) else None,
+                     args.manifest[i] if i < len(args.manifest) else None)
+               for i, url in enumerate(args.urls)}
+    urls, problems = list(args.urls), {}
+    if not args.no_expand:
+        from .shards import expand_shards, sharded
+        # One hash or manifest cannot vouch for every shard of a model.
+        claimed = [url for url, values in options.items() if any(values) and sharded(url)]
+        if claimed:
+            emit("failed", error=f"--sha256/--manifest given for a sharded model ({', '.join(claimed)}): "
+                                 f"pass each shard URL with its own value, and --no-expand.")
+            return EXIT_CODES["usage"]
+        urls, problems = expand_shards(urls)
+        for url, problem in problems.items():
+            emit("failed", url=url, error=f"Pre-flight: {problem}")
+        if not urls:
+            return EXIT_CODES["failed"]
+
+    dest = (args.dest or _default_dest()).expanduser().resolve()
+    dest.mkdir(parents=True, exist_ok=True)
+    if args.extract:
+        RUNTIME_CONFIG["storage"]["auto_extract"] = True
+    if args.dedupe:
+        RUNTIME_CONFIG["storage"]["content_store"] = True
+    if args.organize:
+        RUNTIME_CONFIG["storage"]["organize_by_type"] = True
+    if args.faults:
+        from .transport import FaultInjectingTransport, set_transport
+        try:
+            set_transport(FaultInjectingTransport.from_file(args.faults))
+        except (OSError, ValueError, TypeError) as e:
+            emit("failed", error=f"Bad fault script {args.faults}: {e}")
+            return EXIT_CODES["usage"]
+
+    def run(job) -> Tuple[str, Optional[Path], str]:
+        url, expected, manifest = job.payload
+        return fetch(url, dest, expected, chunk=args.chunk, retries=args.retries,
+                     abort_event=job.abort, scheduled=True, delta=args.delta, manifest=manifest)
+
+    parallel = args.parallel or (SCHEDULER_SETTINGS["max_parallel"] if len(urls) > len(args.urls) else 1)
+    parallel = max(1, min(parallel, len(urls)))
+    scheduler = Scheduler(run, max_parallel=parallel, per_host=args.per_host or parallel)
+    jobs = [scheduler.submit(url, payload=(url,) + options.get(url, (None, None)),
+                             key=output_key(url, dest)) for url in urls]
+
+    EVENTS.start_progress(args.interval)
+    try:
+        # Waited on with a timeout so Ctrl-C reaches the main thread.
+        while not scheduler.wait(timeout=0.2):
+            pass
+    except KeyboardInterrupt:
+        # Running jobs stop at their next chunk and keep what they have.
+        scheduler.stop()
+        scheduler.wait()
+        return EXIT_CODES["interrupted"]
+    finally:
+        scheduler.stop()
+        EVENTS.stop_progress()
+
+    outcomes: List[str] = []
+    for job in jobs:
+        if job.error is not None:
+            emit("failed", url=job.url, error=str(job.error))
+        outcomes.append(job.result[0] if job.result else "failed")
+
+    if "failed" in outcomes or problems:
+        return EXIT_CODES["failed"]
+    if "checksum" in outcomes:
+        return EXIT_CODES["checksum"]
+    return EXIT_CODES["ok"]
+
+
+def run_cli(argv: List[str]) -> int:
+    """Entry point for `launcher.py <command> ...`; returns the process exit code."""
+    temporary.HEADLESS = True
+    args = build_parser().parse_args(argv)
+    if args.command == "queue":
+        from .daemon import cmd_queue
+        return cmd_queue(args)
+    if args.command == "manifest":
+        EVENTS.open("-")
+        try:
+            return cmd_manifest(args)
+        finally:
+            EVENTS.close()
+    if args.command == "zip":
+        EVENTS.open(args.events)
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                return cmd_zip(args)
+        finally:
+            EVENTS.close()
+    if args.timings:
+        RUNTIME_CONFIG["interface"]["detailed_logging"] = True
+    if args.buffer_budget:
+        from .buffers import BUFFERS
+        BUFFERS.budget = int(args.buffer_budget * 1024 * 1024)
+    if args.profile:
+        PROFILER.start()
+    if args.metrics is not None:
+        from .metrics import METRICS
+        try:
+            port = METRICS.serve(port=args.metrics)
+        except OSError as e:
+            print(f"Metrics endpoint unavailable on port {args.metrics}: {e}", file=sys.stderr)
+            return EXIT_CODES["usage"]
+        print(f"Metrics on http://{METRICS_SETTINGS['host']}:{port}/metrics", file=sys.stderr)
+    try:
+        if args.command == "daemon":
+            from .daemon import cmd_daemon
+            return cmd_daemon(args, argv)
+        EVENTS.open(args.events)
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.command == "get":
+                return cmd_get(args)
+        return EXIT_CODES["usage"]
+    finally:
+        EVENTS.close()
+        if args.profile and not getattr(args, "detach", False):
+            written = PROFILER.dump(args.profile)
+            print(f"Profile: {written}, {written}.folded" if written else "Profile: nothing ran",
+                  file=sys.stderr)
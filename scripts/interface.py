@@ -3,6 +3,7 @@
 # Imports
 import json
 import os
+import threading
 import time
 from pathlib import Path
 from typing import Dict, Optional, Union
@@ -14,10 +15,11 @@ from .temporary import (
     FILE_STATE_MESSAGES,
     PERSISTENT_FILE,
     DOWNLOADS_DIR,
-    TEMP_DIR,
     DEFAULT_CHUNK_SIZES,
     SPEED_DISPLAY,
     DOWNLOAD_TRACKING,
+    HISTORY_ENTRY,
+    HISTORY_FILE,
     BASE_DIR
 )
 from . import temporary 
@@ -37,7 +39,7 @@ MULTI_HEADER = f'''{SEPARATOR_THICK}
 {SEPARATOR_THIN}'''
 
 MAIN_MENU_FOOTER = f"""{SEPARATOR_THICK}
-Selection; New URL = 0, Continue = 1-9, Refresh = R, Delete = D, Browse = B, Setup = S, Quit = Q: """
+Selection; New URL = 0, Continue = 1-9, Refresh = R, Delete = D, Browse = B, Jobs = J, Setup = S, Quit = Q: """
 
 SETUP_MENU = f"""
 
@@ -88,6 +90,11 @@ def clear_screen_multi(title="Main Menu", use_logo=True, pause: float = 1.0):
     _clear_terminal()
     print(MULTI_HEADER % title)
 
+def pause(seconds: float) -> None:
+    """Hold a message on screen for `seconds`; a no-op in headless runs."""
+    if not temporary.HEADLESS:
+        time.sleep(seconds)
+
 def display_separator():
     """
     Display a menu separator line.
@@ -133,7 +140,7 @@ def get_file_status(config: Dict, index: int, downloads_path: Path) -> tuple:
         return "empty", None, None
     
     file_path = downloads_path / filename
-    temp_path = Path(TEMP_DIR) / f"{filename}.part"
+    temp_path = configure.get_partials_path(config) / f"{filename}.part"
     
     if file_path.exists():
         total_size = config.get(f"total_size_{index}", 0)
@@ -170,6 +177,18 @@ def format_file_size(size: int) -> str:
     return f"{size:.2f} TB"
 
 
+def format_buffer_usage() -> str:
+    """Receive buffers in use against the global budget; see scripts/buffers.py."""
+    from .buffers import BUFFERS
+    usage = BUFFERS.snapshot()
+    text = f"{format_file_size(usage['granted'] + usage['idle'])} of {format_file_size(usage['budget'])}"
+    if usage['waiting']:
+        text += f", {usage['waiting']} waiting"
+    if usage['dirty']:
+        text += f" (+{format_file_size(usage['dirty'])} unsynced)"
+    return text
+
+
 def format_connection_speed(chunk_size: int) -> str:
     """
     Format connection speed for display.
@@ -177,6 +196,11 @@ def format_connection_speed(chunk_size: int) -> str:
     return SPEED_DISPLAY.get(chunk_size, "Custom")
 
 
+def format_waiting_until(timestamp: float) -> str:
+    """'waiting until 14:05:09 (37s)' for a scheduler wake-up time."""
+    seconds = max(0, int(timestamp - time.time()))
+    return f"waiting until {datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')} ({seconds}s)"
+
 def format_file_state(state: str, info: Dict = None) -> str:
     """
     Format file state for display.
@@ -205,7 +229,7 @@ def delete_file(config: Dict, index: int) -> bool:
         downloads_path = BASE_DIR / downloads_path
     downloads_path = downloads_path.resolve()
     file_path = downloads_path / filename
-    temp_path = Path(TEMP_DIR) / f"{filename}.part"
+    temp_path = configure.get_partials_path(config) / f"{filename}.part"
     
     try:
         # Both are removed, not one-or-the-other.  The old `elif` left a stale
@@ -279,6 +303,9 @@ def prompt_for_download():
                 display_error(message)
             time.sleep(3)
             continue
+        if choice == 'j':
+            display_daemon_jobs()
+            continue
         if choice == 'q':
             exit_sequence()
             break
@@ -300,7 +327,29 @@ def prompt_for_download():
                     display_error("No valid URLs provided")
                     time.sleep(2)
                     continue
+                # A shard or shard index stands for the whole sharded model.
+                from .shards import expand_shards, url_filename
+                requested = len(valid_urls)
+                valid_urls, problems = expand_shards(valid_urls)
+                for url, problem in problems.items():
+                    display_error(f"Skipped {url_filename(url)}: {problem}")
+                    time.sleep(1)
+                if not valid_urls:
+                    continue
+                # With a daemon running, the menu is a thin client: the URLs go
+                # on its queue and keep downloading after this window closes.
+                if enqueue_on_daemon(valid_urls, downloads_path):
+                    break
                 free_slots = configure.Config_Manager.get_available_slots()
+                # The menu has nine slots and a sharded model can have dozens
+                # of files: take what fits and say what was left out.
+                if free_slots and len(valid_urls) > free_slots and len(valid_urls) > requested:
+                    skipped = valid_urls[free_slots:]
+                    valid_urls = valid_urls[:free_slots]
+                    display_error(f"Only {free_slots} slots free: {len(skipped)} files not downloaded, "
+                                  f"{url_filename(skipped[0])} onwards. "
+                                  "Use `python launcher.py get URL`, which has no slot limit.")
+                    time.sleep(3)
                 if len(valid_urls) > free_slots:
                     display_error(f"Need {len(valid_urls)} slots, only {free_slots} available")
                     time.sleep(3)
@@ -378,6 +427,49 @@ def prompt_for_download():
             display_error("Invalid choice. Please try again.")
             time.sleep(3)
 
+def enqueue_on_daemon(urls: list, downloads_path: Path) -> bool:
+    """Submit `urls` to a running daemon.  False when there is none to talk to."""
+    from .daemon import DaemonClient
+    client = DaemonClient(timeout=2.0)
+    if not client.available():
+        return False
+    for url in urls:
+        try:
+            job = client.add(url, str(downloads_path))
+            display_success(f"Queued on daemon as job {job['id']}: {url}")
+        except (OSError, RuntimeError) as e:
+            display_error(f"Daemon refused {url}: {e}")
+    time.sleep(2)
+    return True
+
+def display_daemon_jobs():
+    """List the daemon's queue with live progress for running jobs."""
+    from .daemon import DaemonClient
+    clear_screen("Daemon Jobs", pause=0)
+    client = DaemonClient(timeout=2.0)
+    try:
+        jobs = client.jobs()
+    except (OSError, RuntimeError) as e:
+        display_error(f"{e}  Start one with: launcher.py daemon --detach")
+        time.sleep(3)
+        return
+    print()
+    if not jobs:
+        print("    The daemon queue is empty.")
+    for job in jobs:
+        name = job.get('filename') or job['url']
+        line = f"    {job['id']}  {job['state']:<9} p{job['priority']:<3} {truncate_filename(name, 70)}"
+        progress = job.get('progress')
+        if progress and progress['total']:
+            line += f"  {progress['current'] / progress['total'] * 100:.1f}% {format_file_size(int(progress['speed']))}/s"
+        elif job.get('waiting_until'):
+            line += f"  {format_waiting_until(job['waiting_until'])}"
+        elif job['state'] == "failed" and job.get('error'):
+            line += f"  ({job['error']})"
+        print(line)
+    print()
+    input("    Press Enter to return to the menu...")
+
 def exit_sequence():
     """
     Display the exit sequence with timed messages and an overwriting countdown with 's'.
@@ -504,6 +596,9 @@ def display_download_state(multiple: list = None) -> None:
 
                 print(f"    Filename:\n        {dl['filename']}\n")
                 print(f"    Resume:\n        {resume_str}\n")
+                if dl.get('waiting_until'):
+                    # Backing off under the scheduler; the other files carry on.
+                    print(f"    Retry:\n        {format_waiting_until(dl['waiting_until'])}\n")
                 print(f"    Progress:\n        {progress_pct:.1f}%\n")
                 print(f"    Speed:\n        {speed_str}\n")
                 print(f"    Received/Total:\n        {size_str}\n")
@@ -527,14 +622,17 @@ def display_download_state(multiple: list = None) -> None:
         print(f"    Elapsed/Remaining:\n        {elapsed_str}<{remaining_str}\n")
         print()  # One blank line before separator
 
+    print(f"    Buffers:\n        {format_buffer_usage()}\n")
     print(SEPARATOR_THIN)
     if temporary.ABORT_EVENT.is_set():
         # The key listener sets ABORT_EVENT the moment "A" is seen.  The loop
-        # itself can only stop once the in-flight chunk has finished landing,
-        # so say so rather than leaving the prompt up looking ignored.
-        print("Stopping the active download, finishing current chunk...", end="", flush=True)
+        # stops within moments (scripts/cancel.py), once what had arrived is on
+        # disk, so say so rather than leaving the prompt up looking ignored.
+        print("Stopping the active download, saving what has arrived...", end="", flush=True)
+    elif temporary.PAUSE_EVENT.is_set():
+        print("Paused; Continue = P, Abandon Download = A: ", end="", flush=True)
     else:
-        print("Selection; Abandon Download = A, Wait for Completion = >_>: ", end="", flush=True)
+        print("Selection; Abandon Download = A, Pause = P, Wait for Completion = >_>: ", end="", flush=True)
 
 # Possibly to stop circular import
 from pathlib import Path
@@ -546,7 +644,8 @@ def display_download_summary(
     elapsed: float,
     timestamp: datetime,
     destination: str,
-    batch_mode: bool = False
+    batch_mode: bool = False,
+    peak_speed: float = 0.0
 ) -> None:
     import time
     from .interface import clear_screen, SEPARATOR_THIN
@@ -558,6 +657,7 @@ def display_download_summary(
     elapsed_str = time.strftime("%H:%M:%S", time.gmtime(elapsed))
     size_str = format_file_size(total_size)
     speed_str = f"{format_file_size(average_speed)}/s"
+    peak_str = f"{format_file_size(peak_speed)}/s" if peak_speed > 0 else "-"
     destination_dir = str(Path(destination).parent)
 
     # Build the summary content
@@ -571,6 +671,8 @@ def display_download_summary(
         f"        {size_str}\n",
         f"    Average Speed:",
         f"        {speed_str}\n",
+        "    Peak Speed:",
+        f"        {peak_str}\n",
         f"    Download Time:",
         f"        {elapsed_str}\n",
         f"    Saved To:",
@@ -707,6 +809,45 @@ def _sync_slots(config: Dict, fresh: Dict) -> None:
             config[key] = fresh[key]
 
 
+def record_history_entry(filename: str, url: str, size: int, average_speed: float,
+                         peak_speed: float, started: float, attempts: int = 1,
+                         resume_position: int = 0, phases: Optional[Dict] = None) -> None:
+    """
+    Append a completed download to data/history.jsonl, shaped like HISTORY_ENTRY.
+
+    The 9 slots only remember what is on disk; this is the log of how each
+    download went.  Speeds come from the session's RateEstimator, so a resumed
+    download reports the rate it actually achieved, not total size / time.
+    With detailed_logging on, `phases` (the PhaseTimings summary) goes under
+    metadata.
+    Never raises: losing a history line is not worth failing a download over.
+    """
+    try:
+        entry = json.loads(json.dumps(HISTORY_ENTRY))
+        entry.update({
+            "id": f"{int(started)}-{filename}",
+            "filename": filename,
+            "url": url,
+            "timestamp_start": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+            "timestamp_end": datetime.now().isoformat(timespec="seconds"),
+            "status": "complete",
+            "attempts": attempts,
+            "resume_position": resume_position,
+        })
+        entry["size"] = {"total": size, "downloaded": max(0, size - resume_position)}
+        entry["speed"] = {"average": round(average_speed, 1), "peak": round(peak_speed, 1)}
+        if phases:
+            entry["metadata"]["phases"] = phases
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+    except Exception as e:
+        display_error(f"Error recording history: {e}")
+
+
+# Scheduled batches finish several files at once; slot writes take turns.
+_SLOT_LOCK = threading.RLock()
+
 def update_history(config: Dict, filename: str, url: str, total_size: int = 0) -> bool:
     """
     Register or update a download entry.  Returns True if the entry is present
@@ -734,6 +875,11 @@ def update_history(config: Dict, filename: str, url: str, total_size: int = 0) -
     renumbered the list under the user between one menu draw and the next --
     unhelpful when the menu is driven by slot number.
     """
+    with _SLOT_LOCK:
+        return _update_history(config, filename, url, total_size)
+
+def _update_history(config: Dict, filename: str, url: str, total_size: int = 0) -> bool:
+    """update_history() itself; the caller holds _SLOT_LOCK."""
     try:
         if not filename:
             return False
@@ -762,7 +908,7 @@ def update_history(config: Dict, filename: str, url: str, total_size: int = 0) -
                 fresh[f"filename_{i}"] = filename
                 fresh[f"url_{i}"] = url
                 if total_size <= 0:
-                    temp_path = Path(TEMP_DIR) / f"{filename}.part"
+                    temp_path = configure.get_partials_path(fresh) / f"{filename}.part"
                     if temp_path.exists():
                         total_size = 0  # size unknown; leave 0 rather than
                                         # recording the partial size as the total
@@ -1,17 +1,16 @@
 # Script: `.\scripts\manage.py`
 
 # Imports
-import os, re, time, requests, json, random, socket, threading, sys
+import os, re, time, json, random, socket, threading, sys
+import errno
+import itertools
 import shutil
 import subprocess
 import gc
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple
+from typing import TYPE_CHECKING, Optional, Dict, List, Tuple
 from urllib.parse import urlparse, parse_qs, unquote
-from requests.exceptions import RequestException, Timeout, ConnectionError, ChunkedEncodingError
-from tqdm import tqdm
-from urllib3.exceptions import IncompleteRead
 from .temporary import (
     URL_PATTERNS,
     CONTENT_TYPES,
@@ -38,12 +37,23 @@ from .temporary import (
     FS_UPDATE_INTERVAL,
     DISPLAY_REFRESH,
     _pending_handlers,
-    ACTIVE_DOWNLOADS
+    ACTIVE_DOWNLOADS,
+    PREFLIGHT_SETTINGS,
+    PARTIAL_DIRNAME,
+    SCHEDULER_SETTINGS
 )
 from . import configure  # Add this line
-from .configure import Config_Manager, get_downloads_path
-from .interface import display_download_state, display_download_summary, clear_screen, format_file_size, display_success, display_error, SEPARATOR_THIN
+from .configure import Config_Manager, get_downloads_path, get_partials_path
+from .interface import display_download_state, display_download_summary, clear_screen, format_file_size, display_success, display_error, pause, SEPARATOR_THIN
 from . import temporary 
+from .progress import ProgressRecord
+from .buffers import BUFFERS, JOURNAL_SUFFIX, discard_journal, part_writer, partial_size
+from .resume import (VALIDATOR_SUFFIX, discard_validator, if_range, load_validator, move_validator,
+                     same_version, save_validator, tail_matches, tail_overlap)
+from .events import emit
+from .preflight import check_header, checked, header_length, preflight_enabled
+from .profiling import NO_TIMINGS, PROFILER, new_timings
+from .scheduler import RetryLater, Scheduler, current_job
 
 # Conditional Imports
 # Keyed off temporary.IS_WINDOWS (the real host OS), NOT temporary.PLATFORM.
@@ -58,6 +68,9 @@ else:
     import select
     import termios
     import tty
+# requests itself loads inside download_file; annotations only need the name.
+if TYPE_CHECKING:
+    import requests
 
 # Classes
 class DownloadError(Exception):
@@ -85,9 +98,11 @@ class DownloadError(Exception):
 #
 # Now: a daemon thread polls at 100 ms regardless of chunk size, sets
 # ABORT_EVENT the instant it sees the key, prints the notice immediately, and
-# swallows every remaining keystroke so nothing leaks back to the menu.  The
-# download loop checks ABORT_EVENT after each chunk is written, so the chunk in
-# flight still completes and is kept -- no re-downloading that data on resume.
+# swallows every remaining keystroke so nothing leaks back to the menu.
+# Setting ABORT_EVENT wakes the read in flight (scripts/cancel.py), so the
+# download stops within moments whatever the chunk size, and what had arrived
+# is written and kept -- no re-downloading that data on resume.  "P" toggles
+# PAUSE_EVENT, a warm pause that keeps the connection open.
 
 def _stdin_is_tty() -> bool:
     """True only if we can actually read keystrokes from stdin."""
@@ -136,16 +151,42 @@ def read_key(timeout: float = 0.1) -> Optional[str]:
         return None
 
 
+def enter_cbreak() -> Tuple[Optional[int], Optional[list]]:
+    """Put the terminal into cbreak mode for KeyListener; returns what restore_terminal needs.
+
+    Guarded: termios.tcgetattr() raises if stdin is not a real terminal, so
+    piping anything into launcher.py, or running it from a service/cron with
+    stdin redirected, used to kill every download before a byte was fetched.
+    Without a tty there is simply no key to listen for.
+    """
+    if temporary.IS_WINDOWS or not _stdin_is_tty():
+        return None, None
+    try:
+        fd = sys.stdin.fileno()
+        old_term = termios.tcgetattr(fd)
+        tty.setcbreak(fd)
+        return fd, old_term
+    except Exception:
+        return None, None
+
+
+def restore_terminal(fd: Optional[int], old_term: Optional[list]) -> None:
+    if not temporary.IS_WINDOWS and old_term is not None and fd is not None:
+        termios.tcsetattr(fd, termios.TCSADRAIN, old_term)
+
+
 class KeyListener:
     """Watches for the abandon key on a background thread during a download."""
 
-    def __init__(self, keys=('a',)):
+    def __init__(self, keys=('a',), pause_keys=('p',)):
         self.keys = {k.lower() for k in keys}
+        self.pause_keys = {k.lower() for k in pause_keys}
         self._stop = threading.Event()
         self.thread = None
 
     def start(self) -> None:
         temporary.ABORT_EVENT.clear()
+        temporary.PAUSE_EVENT.clear()
         self._stop.clear()
         if not _stdin_is_tty():
             return   # nothing to listen to; downloads still run normally
@@ -167,10 +208,18 @@ class KeyListener:
                 temporary.ABORT_EVENT.set()
                 # Immediate feedback: the display thread will repaint this on its
                 # next 1s refresh, but say it now so there is zero dead air.
-                print("\nStopping the active download, finishing current chunk...",
+                print("\nStopping the active download, saving what has arrived...",
                       flush=True)
                 flush_input_buffer()   # eat the repeats from key-mashing
                 return
+            if key and key in self.pause_keys:
+                if temporary.PAUSE_EVENT.is_set():
+                    temporary.PAUSE_EVENT.clear()
+                    print("\nContinuing...", flush=True)
+                else:
+                    temporary.PAUSE_EVENT.set()
+                    print("\nPaused; the connection is kept open. Continue = P", flush=True)
+                flush_input_buffer()
 
 def register_handler(platform: str):
     """Decorator to collect URL handlers to be registered later."""
@@ -193,9 +242,14 @@ class URLProcessor:
     def get_remote_file_info(url: str, headers: Dict, config: Dict) -> Dict:
         """Get metadata about a remote file with timeout countdown."""
         from .interface import display_error  # Deferred import to avoid circular dependency
+        from requests.exceptions import Timeout, ConnectionError
+        from .transport import get_transport
         timeout_length = config.get("timeout_length", 120)
         start_time = time.time()
-        attempt = 0
+        # Under a scheduler a failed attempt is retried by re-running the job
+        # later (RetryLater), not by sleeping here; the count carries over.
+        job = current_job()
+        attempt = job.retry_state.get("probe_attempts", 0) if job else 0
         base_delay = 1
         max_attempts = 5
         last_update = 0
@@ -218,7 +272,7 @@ class URLProcessor:
                         print_status(status_msg)
                         last_update = current_time
 
-                    response = requests.head(
+                    response = get_transport().head(
                         url,
                         headers=headers,
                         allow_redirects=True,
@@ -228,7 +282,7 @@ class URLProcessor:
 
                     content_length = int(response.headers.get('content-length', 0))
                     if content_length == 0:
-                        get_response = requests.get(
+                        get_response = get_transport().get(
                             url,
                             headers={**headers, "Range": "bytes=0-0"},
                             allow_redirects=True,
@@ -246,6 +300,11 @@ class URLProcessor:
 
                     elapsed = time.time() - start_time
                     print_status(f"Connection established in {elapsed:.1f}s")
+                    if job:
+                        job.retry_state.pop("probe_attempts", None)
+                    emit("probe", url=url, size=total_size, etag=response.headers.get('etag'),
+                         content_type=response.headers.get('content-type'),
+                         attempts=attempt, seconds=round(elapsed, 3))
                     
                     return {
                         'size': total_size,
@@ -258,15 +317,22 @@ class URLProcessor:
                     delay = min(base_delay * (2 ** attempt) + random.uniform(0, 1), 10)
                     status_msg = f"Connection attempt {attempt}/{max_attempts} failed. Retrying in {delay:.1f}s..."
                     print_status(status_msg)
+                    if job and attempt < max_attempts:
+                        job.retry_state["probe_attempts"] = attempt
+                        raise RetryLater(delay, f"probe {type(e).__name__}")
                     time.sleep(delay)
                     continue
                     
             print_status(f"Connection timed out after {timeout_length}s")
             raise Timeout(f"Connection timed out after {timeout_length}s")
-            
+
+        except RetryLater:
+            raise
+
         except Exception as e:
             display_error(f"Remote info error: {str(e)}")
-            time.sleep(3)
+            emit("probe_failed", url=url, attempts=attempt, reason=type(e).__name__, message=str(e))
+            pause(3)
             return {}
 
     @staticmethod
@@ -295,7 +361,8 @@ class URLProcessor:
             file_id = file_id_match.group(1)
             download_url = f"https://drive.google.com/uc?id={file_id}&export=download"
             
-            session = requests.Session()
+            from .transport import get_transport
+            session = get_transport().session()
             response = session.get(download_url, stream=True)
             if "confirm=" in response.url:
                 confirm_param = re.search(r"confirm=([^&]+)", response.url).group(1)
@@ -341,11 +408,13 @@ def calculate_retry_delay(retries: int) -> float:
 
 
 
-def get_download_headers(existing_size: int = 0) -> Dict:
-    """Generate HTTP headers for download requests."""
+def get_download_headers(existing_size: int = 0, validator: Optional[str] = None) -> Dict:
+    """Generate HTTP headers for download requests; `validator` becomes If-Range."""
     headers = DEFAULT_HEADERS.copy()
     if existing_size:
         headers["Range"] = f"bytes={existing_size}-"
+        if validator:
+            headers["If-Range"] = validator
     return headers
 
 def extract_filename_from_disposition(disposition: str) -> Optional[str]:
@@ -370,7 +439,7 @@ def extract_filename_from_disposition(disposition: str) -> Optional[str]:
 
     except Exception as e:
         display_error(f"Filename extraction error: {str(e)}")
-        time.sleep(3)
+        pause(3)
         return None
 
 # Download handling
@@ -445,22 +514,81 @@ def handle_download(url: str, config: dict, batch_index: Optional[int] = None, b
             return False, "Invalid choice"
 
 def handle_multiple_downloads(urls: list, config: dict) -> int:
-    """Handle batch downloads sequentially"""
-    from .manage import handle_download
-    from .interface import display_error
-    
-    success_count = 0
+    """Download a batch through the Scheduler; returns how many completed.
+
+    This used to walk the list one file at a time and give up on the rest at
+    the first failure.  Now up to SCHEDULER_SETTINGS["max_parallel"] files run
+    at once (per-host capped, hosts served round-robin), a failure costs only
+    that file, and a rate-limited host is parked while the others carry on.
+    One display thread, one cbreak terminal and one Abandon key serve the whole
+    batch: "A" stops every file mid-chunk, writes what each had received, and
+    keeps the .part.
+    """
+    from .interface import display_error, update_history
+
+    downloads_path = get_downloads_path(config)
+    chunk_size = config.get("chunk", 4096000)
     total = len(urls)
+
+    # Resolve names and take slots up front, as handle_download does, so every
+    # file of the batch can be resumed from the menu whatever happens to it.
+    batch = []
     for idx, url in enumerate(urls, 1):
         print(f"\rProcessing download {idx}/{total}", end="", flush=True)
-        success, error_msg = handle_download(url, config, batch_index=idx, batch_total=total)
+        try:
+            download_url, metadata = URLProcessor.process_url(url, config)
+        except DownloadError as e:
+            display_error(str(e))
+            continue
+        filename = metadata.get("filename") or get_file_name_from_url(download_url)
+        if not filename:
+            display_error(f"Unable to extract filename from: {url}")
+            continue
+        if update_history(config, filename, url, metadata.get('size', 0)):
+            batch.append((idx, url, filename))
+    if not batch:
+        return 0
+
+    def run(job):
+        idx, url, filename = job.payload
+        dm = DownloadManager(downloads_path, shared_display=True)
+        return dm.download_file(url, downloads_path / filename, chunk_size,
+                                batch_index=idx, batch_total=total,
+                                abort_event=job.abort, scheduled=True)
+
+    scheduler = Scheduler(run)
+    jobs = [scheduler.submit(url, payload=(idx, url, filename),
+                             key=str((downloads_path / filename).resolve()))
+            for idx, url, filename in batch]
+
+    display = DownloadManager(downloads_path)
+    fd, old_term = enter_cbreak()
+    key_listener = KeyListener(keys=('a',))
+    key_listener.start()
+    display._start_display_updater()
+    try:
+        while not scheduler.wait(timeout=0.2):
+            if temporary.ABORT_EVENT.is_set():
+                scheduler.stop()
+    finally:
+        scheduler.stop()
+        display._stop_display_updater()
+        key_listener.stop()
+        restore_terminal(fd, old_term)
+
+    success_count = 0
+    failed = False
+    for job in jobs:
+        if job.result is None and job.error is None:
+            continue   # dropped by Abandon before it ran; its slot is kept
+        success, error = job.result if job.result else (False, str(job.error))
         if success:
             success_count += 1
-            display_download_state(get_active_downloads())
-        else:
-            display_error(error_msg)
-            time.sleep(3)
-            return success_count  # Exit early on failure or abandonment
+        elif error not in ("Download saved for later", "Download stopped by user"):
+            display_error(f"{job.payload[2]}: {error}")
+            failed = True
+    if failed:
+        time.sleep(2)   # once, so the errors are read before the menu redraws
     return success_count
 
 # NOTE: a second, module-level copy of get_remote_file_info used to live here,
@@ -480,7 +608,8 @@ def get_file_name_from_url(url: str) -> Optional[str]:
             return filename
 
         # If not found in URL, try from Content-Disposition header
-        response = requests.head(url, allow_redirects=True, timeout=5)
+        from .transport import get_transport
+        response = get_transport().head(url, allow_redirects=True, timeout=5)
         if 'Content-Disposition' not in response.headers:
             return filename if filename else None
 
@@ -489,7 +618,7 @@ def get_file_name_from_url(url: str) -> Optional[str]:
 
     except Exception as e:
         display_error(f"Error extracting filename from URL: {str(e)}")
-        time.sleep(3)
+        pause(3)
         return None
 
 # Helper: resolve open-mode and corrected total_size from actual HTTP response
@@ -497,7 +626,8 @@ def _resolve_response_mode(
     response: "requests.Response",
     requested_offset: int,
     total_size: int,
-    temp_path: Path
+    temp_path: Path,
+    validator: Optional[Dict] = None
 ) -> Tuple[str, int, int]:
     """
     Decide how to open the .part file and what the true total_size is,
@@ -505,7 +635,13 @@ def _resolve_response_mode(
 
     Returns (file_mode, effective_existing_size, corrected_total_size, resume_status).
 
-    resume_status is a human-readable string: "Available", "Unavailable", or "N/A".
+    resume_status is a human-readable string: "Available", "Unavailable",
+    "Changed" or "N/A".
+
+    "Changed" is a 200 to a Range + If-Range request that carries a different
+    validator from the one the .part was started with (scripts/resume.py):
+    the file was replaced on the server.  The .part goes, as for
+    "Unavailable", but the server can still resume later.
 
     The critical case: we sent  Range: bytes=N-  but the server replied 200.
     That means it is sending the *whole* file again and does not support
@@ -531,22 +667,29 @@ def _resolve_response_mode(
             return 'ab', requested_offset, total_size, "Available"
 
         elif status == 200:
-            # Server ignored the Range header and is sending the full file.
-            # Appending would corrupt the output — start fresh.
-            print(
-                f"\n[Resume] Server returned 200 (range not supported). "
-                f"Discarding existing partial file and restarting..."
-            )
+            # Server ignored the Range header, or the If-Range validator no
+            # longer matches, and is sending the full file.  Appending would
+            # corrupt the output — start fresh.
+            changed = same_version(validator, response.headers) is False
+            if changed:
+                print("\n[Resume] The file changed on the server since the partial was saved. "
+                      "Discarding it and restarting...")
+            else:
+                print(
+                    "\n[Resume] Server returned 200 (range not supported). "
+                    "Discarding existing partial file and restarting..."
+                )
             try:
                 if temp_path.exists():
                     temp_path.unlink()
             except OSError as exc:
                 display_error(f"Could not remove stale .part file: {exc}")
+            discard_journal(temp_path)
             # Update total_size from Content-Length if available
             cl = int(response.headers.get('content-length', 0))
             if cl > 0:
                 total_size = cl
-            return 'wb', 0, total_size, "Unavailable"
+            return 'wb', 0, total_size, "Changed" if changed else "Unavailable"
 
         else:
             # Unexpected status — let raise_for_status() handle it upstream.
@@ -562,31 +705,101 @@ def _resolve_response_mode(
         return 'wb', 0, total_size, "N/A"
 
 
+# Helper: the pooled receive loop's chunks, as views of one reused buffer
+def _read_chunks(reader, lease, hold, abort):
+    """Yield view[:n] for each readinto() until the body ends or hold() says stop.
+
+    See scripts/buffers.py for the lease and scripts/cancel.py for hold(),
+    which sits out a warm pause, and for the abort callback.
+    """
+    unsubscribe = abort.on_set(reader.interrupt) if hasattr(abort, "on_set") else None
+    try:
+        while hold():
+            view = lease.view()   # capacity first: the chunk may shrink or grow
+            n = reader.readinto(view)
+            if not n:
+                return
+            yield view[:n]
+    finally:
+        if unsubscribe is not None:
+            unsubscribe()
+
+
+def _read_prefix(response, reader, n: int) -> bytes:
+    """The next `n` bytes of a body, through `reader` (or response.raw); fewer if it ends."""
+    data = bytearray(n)
+    view = memoryview(data)
+    got = 0
+    while got < n:
+        if reader is not None:
+            k = reader.readinto(view[got:])
+        else:
+            chunk = response.raw.read(n - got, decode_content=True)
+            k = len(chunk)
+            view[got:got + k] = chunk
+        if not k:
+            break
+        got += k
+    return bytes(data[:got])
+
+
+def _held(chunks, hold):
+    """iter_content's chunks, with hold() between them."""
+    for chunk in chunks:
+        yield chunk
+        if not hold():
+            return
+
+
 # Get Active Downloads (keep above DownloadManager)
 def get_active_downloads() -> list:
-    """Get sanitized list of active downloads with calculated metrics and batch info"""
-    return [{
-        'filename': d.get('filename', 'Unknown'),
-        'current': d.get('current', 0),
-        'total': d.get('total', 1),
-        'speed': d.get('speed', 0),
-        'elapsed': time.time() - d.get('start_time', time.time()),
-        'remaining': (d.get('total', 1) - d.get('current', 0)) / d['speed'] if d.get('speed', 0) > 0 else 0,
-        'batch_index': d.get('batch_index'),
-        'batch_total': d.get('batch_total'),
-        'resume_status': d.get('resume_status', 'Pending')
-    } for d in ACTIVE_DOWNLOADS if 'current' in d]
+    """Consistent snapshot of every active download, with elapsed/remaining derived."""
+    return ACTIVE_DOWNLOADS.snapshot()
 
 # DownloadManager (keep below the above functions)
 class DownloadManager:
-    def __init__(self, downloads_location: Path):
+    def __init__(self, downloads_location: Path, interactive: bool = True,
+                 temp_dir: Optional[Path] = None, shared_display: bool = False):
+        """
+        `interactive=False` is the headless engine used by `launcher.py get`:
+        no key listener, no terminal mode changes, no display thread, no summary
+        countdown, and the 9 menu slots are neither read nor written.  Everything
+        that actually moves bytes -- probing, resume, retries, verification -- is
+        the same code either way.
+
+        `shared_display=True` is one file of a scheduled menu batch: slots are
+        kept up to date as usual, but the key listener, terminal mode and
+        progress display belong to the batch, and there is no per-file summary.
+        """
         from .configure import Config_Manager
-        self.config = Config_Manager.load()
+        self.interactive = interactive
+        self.shared_display = shared_display
+        # A headless run on a fresh box may have no persistent.json yet; it only
+        # needs the download settings, so the defaults will do.
+        if interactive or PERSISTENT_FILE.exists():
+            self.config = Config_Manager.load()
+        else:
+            self.config = Config_Manager.validate({})
         self.downloads_location = downloads_location
-        TEMP_DIR.mkdir(parents=True, exist_ok=True)
-        self._register_existing_temp_files()
+        # Partials sit next to the finished files (<downloads>/.incomplete), so
+        # completion is a rename on one filesystem, never a multi-GB copy.
+        self.temp_dir = (Path(temp_dir) if temp_dir is not None
+                         else Path(downloads_location) / PARTIAL_DIRNAME)
+        self.temp_dir.mkdir(parents=True, exist_ok=True)
+        if interactive:
+            self._register_existing_temp_files()
         self.display_thread = None
         self.display_refresh_active = False  # Added control flag
+        self.completed_path = None   # where the last successful download landed
+        # Phase timings of the download in progress (NO_TIMINGS unless
+        # detailed_logging is on); see scripts/profiling.py.
+        self.timings = new_timings()
+        # Threads reading the .part as it grows: a tarball being unpacked
+        # (scripts/extract.py), the SHA-256 for the content store
+        # (scripts/store.py).  Replaced on every attempt.
+        self.followers = []
+        self.remote_etag = None
+        self.completed_sha256 = None   # set when a StreamingHasher ran
 
     def _start_display_updater(self):
         """Start display refresh thread with control flag"""
@@ -601,9 +814,11 @@ class DownloadManager:
     def _update_display_loop(self, refresh_rate=1):
         """Controlled display updater"""
         while self.display_refresh_active:
+            started = time.perf_counter()
             active = get_active_downloads()
             if active:
                 display_download_state(active)
+            self.timings.add("display", time.perf_counter() - started)
             time.sleep(refresh_rate)
 
     def _stop_display_updater(self):
@@ -625,7 +840,7 @@ class DownloadManager:
                 self._remove_from_persistent(i)
                 break
 
-        temp_path = TEMP_DIR / f"{filename}.part"
+        temp_path = self.temp_dir / f"{filename}.part"
         if temp_path.exists():
             return True, temp_path, {'has_temp': True, 'temp_path': temp_path}
 
@@ -636,7 +851,7 @@ class DownloadManager:
 
     def _register_existing_temp_files(self):
         """Register any .part files in temp directory."""
-        for temp_file in TEMP_DIR.glob("*.part"):
+        for temp_file in self.temp_dir.glob("*.part"):
             filename = temp_file.stem
             if not any(self.config.get(f"filename_{i}") == filename for i in range(1, 10)):
                 # total_size 0, not the .part's current size.  Passing the partial
@@ -690,11 +905,9 @@ class DownloadManager:
             display_error(f"Error registering early metadata: {str(e)}")
             time.sleep(3)
 
-    def _handle_rate_limit(self, response: requests.Response) -> bool:
-        """Handle rate limiting with exponential backoff."""
-        if response.status_code != 429:
-            return False
-
+    @staticmethod
+    def _retry_after(response: "requests.Response") -> float:
+        """Seconds the server asked us to wait (Retry-After), capped at max_delay."""
         retry_after = response.headers.get('Retry-After')
         if retry_after:
             try:
@@ -707,16 +920,204 @@ class DownloadManager:
                     delay = RETRY_STRATEGY["initial_delay"]
         else:
             delay = RETRY_STRATEGY["initial_delay"]
+        return min(max(1, delay), RETRY_STRATEGY["max_delay"])
+
+    def _handle_rate_limit(self, response: "requests.Response",
+                           abort: Optional[threading.Event] = None) -> bool:
+        """Wait out a 429 in place.  Scheduled downloads raise RetryLater instead.
 
-        display_error(f"Rate limited. Waiting {delay} seconds before retry")
-        time.sleep(max(1, delay))
+        This existed but was never called: a 429 went through raise_for_status
+        into the generic retry path, which ignored Retry-After and came back
+        after two seconds.
+        """
+        if response.status_code != 429:
+            return False
+        delay = self._retry_after(response)
+        display_error(f"Rate limited. Waiting {delay:.0f} seconds before retry")
+        (abort or temporary.ABORT_EVENT).wait(delay)
+        return True
+
+    @staticmethod
+    def _report_timings(timings, filename: str, source_url: str) -> None:
+        """Per-phase breakdown of a finished (or given up) download."""
+        print(f"\n{timings.format_breakdown(filename)}")
+        emit("timings", file=filename, url=source_url, total=round(timings.total(), 4),
+             phases=timings.summary())
+        PROFILER.record(filename, timings)
+
+    def _store_completed(self, out_path: Path, source_url: str) -> None:
+        """Content store and type folders for a finished file; see scripts/store.py."""
+        from .store import ContentStore, content_store_enabled, organize, organize_enabled
+        try:
+            if content_store_enabled() and self.completed_sha256:
+                ContentStore(self.downloads_location).add(
+                    out_path, self.completed_sha256, source_url, self.remote_etag)
+            if organize_enabled():
+                organize(out_path, self.downloads_location)
+        except OSError as e:
+            display_error(f"Could not file {out_path.name} in the store: {e}")
+
+    def _link_from_store(self, out_path: Path, total_size: int,
+                         expected_sha256: Optional[str]) -> bool:
+        """Satisfy a download from the content store instead of the network."""
+        from .store import ContentStore, link_file, organize, organize_enabled
+        stored = ContentStore(self.downloads_location).lookup(
+            sha256=expected_sha256, size=total_size, etag=self.remote_etag)
+        if stored is None:
+            return False
+        try:
+            how = link_file(stored, out_path)
+        except OSError as e:
+            display_error(f"Could not link {out_path.name} from the store: {e}")
+            return False
+        if organize_enabled():
+            organize(out_path, self.downloads_location)
+        print(f"Already in the store: {out_path.name} ({how})")
+        emit("deduplicated", file=out_path.name, path=str(out_path), sha256=stored.name,
+             size=stored.stat().st_size, link=how)
+        self.completed_path = out_path
+        self.completed_sha256 = stored.name
+        return True
+
+    def _finalize_download(self, temp_path: Path, out_path: Path, filename: str, source_url: str,
+                           tracking_data: Optional[ProgressRecord], start_time: float,
+                           batch_mode: bool, attempts: int, resume_position: int) -> Tuple[bool, Optional[str]]:
+        """Move a verified .part into place, then summarise and record it.
+
+        Shared by the clean-exit path and the missing-terminating-chunk path in
+        download_file, which used to carry two copies of this.
+        """
+        from .interface import update_history, record_history_entry
+        from .extract import archive_kind, auto_extract_enabled, extract_target, extract_zip
+        from .store import StreamingHasher
+        # Every byte is on disk; the followers only have to catch up.
+        for follower in self.followers:
+            ok, error = follower.finish()
+            if isinstance(follower, StreamingHasher):
+                self.completed_sha256 = follower.digest if ok else None
+            elif ok:
+                print(f"Extracted {follower.members} entries to {follower.target}")
+            else:
+                display_error(f"Extraction of {filename} failed ({error}); the archive is kept.")
+        self.followers = []
+        if not move_with_retry(temp_path, out_path):
+            return False, "Failed to move downloaded file"
+        discard_validator(temp_path)
+        self.timings.mark("finalize")
+        self._store_completed(out_path, source_url)
+        if auto_extract_enabled() and archive_kind(out_path.name)[0] == "zip":
+            ok, error = extract_zip(out_path)
+            print(f"Extracted to {extract_target(out_path)}" if ok else
+                  f"Extraction of {filename} failed ({error}); the archive is kept.")
+
+        # Stop display updates
+        self._stop_display_updater()
+
+        final_size = out_path.stat().st_size
+        elapsed_total = time.time() - start_time
+        # The estimator counts only bytes received this session, which on a
+        # no_resume restart correctly includes the re-download from byte 0.
+        avg_speed, peak_speed, _ = (tracking_data.rate.summary()
+                                    if tracking_data is not None else (0.0, 0.0, 0))
+
+        if self.interactive and not self.shared_display:
+            display_download_summary(
+                filename=filename,
+                total_size=final_size,
+                average_speed=avg_speed,
+                elapsed=elapsed_total,
+                timestamp=datetime.now(),
+                destination=str(out_path),
+                batch_mode=batch_mode,
+                peak_speed=peak_speed
+            )
+            update_history(self.config, filename, source_url, final_size)
+        elif self.interactive:
+            update_history(self.config, filename, source_url, final_size)
+        else:
+            print(f"Saved {out_path} ({format_file_size(final_size)}, "
+                  f"{format_file_size(avg_speed)}/s average)")
+        self.timings.mark("config")
+
+        record_history_entry(filename, source_url, final_size, avg_speed, peak_speed,
+                             start_time, attempts=attempts, resume_position=resume_position,
+                             phases=self.timings.summary() if self.timings is not NO_TIMINGS else None)
+        emit("complete", file=filename, url=source_url, path=str(out_path), size=final_size,
+             average=round(avg_speed, 1), peak=round(peak_speed, 1),
+             elapsed=round(elapsed_total, 3), attempts=attempts, resumed_from=resume_position)
+        self.completed_path = out_path
+        return True, None
+
+    def _warm_pause(self, pause: threading.Event, abort: threading.Event, tracking_data,
+                    filename: str, source_url: str) -> bool:
+        """Sit out a pause with the response, .part and buffer kept open.
+
+        True to carry on reading; False to stop -- aborted, or paused for longer
+        than warm_pause seconds.  See scripts/cancel.py.
+        """
+        if not pause.is_set():
+            return not abort.is_set()
+        offset = tracking_data.current
+        tracking_data.update(status="paused")
+        emit("paused", file=filename, url=source_url, offset=offset)
+        deadline = time.time() + RUNTIME_CONFIG["download"].get("warm_pause", 300)
+        while pause.is_set() and not abort.is_set():
+            if time.time() >= deadline:
+                return False
+            abort.wait(0.2)
+        if abort.is_set():
+            return False
+        tracking_data.update(status="downloading")
+        emit("unpaused", file=filename, url=source_url, offset=offset)
         return True
 
     def download_file(self, remote_url: str, out_path: Path, chunk_size: int, batch_mode: bool = False, 
-                     batch_index: Optional[int] = None, batch_total: Optional[int] = None) -> Tuple[bool, Optional[str]]:
-        """Download a file from a remote URL with progress tracking and resumption support."""
-        from .interface import display_error, display_success, update_history, format_file_size, display_download_summary
-        start_time = time.time()
+                     batch_index: Optional[int] = None, batch_total: Optional[int] = None,
+                     abort_event: Optional[threading.Event] = None,
+                     scheduled: bool = False,
+                     expected_sha256: Optional[str] = None,
+                     probed: Optional[Tuple[str, Dict]] = None) -> Tuple[bool, Optional[str]]:
+        """Download a file from a remote URL with progress tracking and resumption support.
+
+        `abort_event` stops just this download, interrupting the read in
+        flight (see scripts/cancel.py); it defaults to the process-wide
+        temporary.ABORT_EVENT that the key listener sets.  The daemon gives
+        every job its own so one can be paused without touching the others.
+
+        `scheduled=True` means a Scheduler is running this: a rate limit or a
+        retry backoff raises RetryLater, so the thread is released rather than
+        put to sleep, and the next run carries on from the job's retry_state.
+
+        `expected_sha256` lets the content store satisfy the download without
+        fetching it, and has the hash computed while downloading.
+
+        `probed` is the (download_url, metadata) of a process_url(remote_url)
+        the caller has just made; the first attempt uses it instead of
+        probing the server a second time.
+        """
+        from .interface import display_error, display_success, format_file_size
+        # requests / urllib3 (and http.server) load here, when a download
+        # starts, not at launch.
+        from requests.exceptions import ConnectionError, ChunkedEncodingError
+        from urllib3.exceptions import IncompleteRead
+        from urllib3.util.retry import Retry
+        from .metrics import METRICS
+        from .transport import BodyReader, get_transport
+        # tarfile / zipfile / hashlib too, through these.
+        from .extract import auto_extract_enabled, start_streaming
+        from .store import StreamingHasher, content_store_enabled
+        job = current_job() if scheduled else None
+        retry_state = job.retry_state if job is not None else {}
+        start_time = retry_state.setdefault("start_time", time.time())
+        # One set of phase timings per download, across scheduler re-runs.
+        timings = self.timings = retry_state.setdefault("timings", self.timings)
+        timings.restart()
+        write_latency = METRICS.write_histogram()   # None unless --metrics
+        # One receive buffer lease for the whole download, every attempt, sized
+        # against the global budget before each read; see scripts/buffers.py.
+        pooled = RUNTIME_CONFIG["download"].get("receive", "pooled") == "pooled"
+        lease = BUFFERS.lease(chunk_size)
+        keep_record = False
         temp_path = None
         filename = None
         tracking_data = None
@@ -733,35 +1134,34 @@ class DownloadManager:
         # RUNTIME_CONFIG["download"]["max_retries"], a hard-coded 10.
         max_retries = int(self.config.get("retries", RUNTIME_CONFIG["download"]["max_retries"]) or 10)
 
+        # In a scheduled batch the caller owns the terminal, the key listener
+        # and the one shared display; see handle_multiple_downloads.
+        owns_terminal = self.interactive and not self.shared_display
+
         # Terminal setup for non-Windows platforms.
-        # Guarded: termios.tcgetattr() raises if stdin is not a real terminal, so
-        # piping anything into launcher.py, or running it from a service/cron with
-        # stdin redirected, used to kill every download at this line before a byte
-        # was fetched.  Without a tty there is simply no key to listen for.
-        old_term = None
-        fd = None
-        if not temporary.IS_WINDOWS and _stdin_is_tty():
-            try:
-                fd = sys.stdin.fileno()
-                old_term = termios.tcgetattr(fd)
-                tty.setcbreak(fd)
-            except Exception:
-                old_term = None
-                fd = None
+        fd, old_term = enter_cbreak() if owns_terminal else (None, None)
+
+        abort = abort_event if abort_event is not None else temporary.ABORT_EVENT
+        pause = job.pause if job is not None else temporary.PAUSE_EVENT
+        lease.abort = abort
 
         # Watch for the abandon key on its own thread; see KeyListener above.
         key_listener = KeyListener(keys=('a',))
-        key_listener.start()
+        if owns_terminal:
+            key_listener.start()
 
         try:
-            retries = 0
-            no_resume = False  # Set True once server confirms it won't honour Range requests.
-                               # Persists across retries so we stop sending Range headers
-                               # and stop treating the stale partial as resumable data.
+            retries = retry_state.get("retries", 0)
+            pre_loop_existing_size = 0
+            # Set True once server confirms it won't honour Range requests.
+            # Persists across retries (and scheduler re-runs) so we stop sending
+            # Range headers and stop treating the stale partial as resumable data.
+            no_resume = retry_state.get("no_resume", False)
 
             while retries < max_retries:
                 try:
-                    if temporary.ABORT_EVENT.is_set():
+                    if abort.is_set():
+                        emit("stopped", file=filename, url=source_url)
                         return False, "Download stopped by user"
 
                     # Get file metadata
@@ -770,15 +1170,61 @@ class DownloadManager:
                     # config["timeout_length"], and RUNTIME_CONFIG has no such key,
                     # so the user's configured timeout was silently replaced by the
                     # 120s default on every single request.
-                    download_url, metadata = URLProcessor.process_url(remote_url, self.config)
+                    if probed is not None:
+                        (download_url, metadata), probed = probed, None
+                    else:
+                        download_url, metadata = URLProcessor.process_url(remote_url, self.config)
                     total_size = metadata.get('size', 0)
                     print("Done")
+                    timings.mark("probe")
 
                     filename = metadata.get("filename") or get_file_name_from_url(download_url)
                     if not filename:
                         return False, ERROR_HANDLING["messages"]["filename_error"]
 
-                    temp_path = TEMP_DIR / f"{filename}.part"
+                    temp_path = self.temp_dir / f"{filename}.part"
+
+                    # One transfer per output file.  The record is keyed by
+                    # the resolved path and claimed before the .part is
+                    # touched; a second job for the same file waits for the
+                    # first under a scheduler, and is refused otherwise.
+                    if tracking_data is None:
+                        tracking_data = retry_state.pop("record", None)
+                    if tracking_data is None:
+                        record = ProgressRecord(
+                            out_path.name,
+                            path=str(out_path.resolve()),
+                            url=remote_url,
+                            total=total_size,
+                            start_time=start_time,
+                            batch_index=batch_index if batch_mode else None,
+                            batch_total=batch_total if batch_mode else None
+                        )
+                        if ACTIVE_DOWNLOADS.claim(record) is not None:
+                            busy = f"{out_path} is already being downloaded"
+                            if scheduled:
+                                raise RetryLater(SCHEDULER_SETTINGS["busy_delay"], busy)
+                            emit("failed", file=filename, url=source_url, error=busy)
+                            return False, busy
+                        tracking_data = record
+
+                    # Headless prefetch runs again and again from cron; a file
+                    # that is already there at the advertised size is done.
+                    if (not self.interactive and total_size > 0 and out_path.exists()
+                            and out_path.stat().st_size == total_size):
+                        print(f"Already complete: {out_path}")
+                        self.completed_path = out_path
+                        return True, None
+
+                    # The same bytes under another name, downloaded before?
+                    self.remote_etag = metadata.get('etag')
+                    if content_store_enabled() and self._link_from_store(out_path, total_size,
+                                                                         expected_sha256):
+                        if temp_path.exists():
+                            temp_path.unlink()
+                        if self.interactive:
+                            self._register_file_entry(filename, source_url, total_size)
+                        return True, None
 
                     # If the server is known to not support resume, any .part file that
                     # exists is leftover from a previous interrupted fresh download and
@@ -790,56 +1236,57 @@ class DownloadManager:
                                 temp_path.unlink()
                             except OSError:
                                 pass
+                        discard_journal(temp_path)
                         existing_size = 0
                     else:
-                        existing_size = temp_path.stat().st_size if temp_path.exists() else 0
-
-                    # Check for existing tracking data
-                    tracking_data = next((d for d in ACTIVE_DOWNLOADS if d['filename'] == out_path.name), None)
-                    if not tracking_data:
-                        tracking_data = {
-                            'filename': out_path.name,
-                            'url': remote_url,
-                            'status': 'connecting',
-                            'current': existing_size,
-                            'total': total_size,
-                            'speed': 0.0,
-                            'elapsed': time.time() - start_time,
-                            'remaining': 0.0,
-                            'start_time': start_time
-                        }
-                        if batch_mode:
-                            tracking_data['batch_index'] = batch_index
-                            tracking_data['batch_total'] = batch_total
-                        ACTIVE_DOWNLOADS.append(tracking_data)
-                    else:
-                        tracking_data.update({
-                            'current': existing_size,
-                            'total': total_size,
-                            'status': 'restarting' if no_resume and retries > 0 else 'connecting',
-                            'start_time': start_time
-                        })
-                        if batch_mode:
-                            tracking_data['batch_index'] = batch_index
-                            tracking_data['batch_total'] = batch_total
+                        existing_size = partial_size(temp_path)
+
+                    tracking_data.update(
+                        current=existing_size,
+                        total=total_size,
+                        status='restarting' if no_resume and retries > 0 else 'connecting',
+                        start_time=start_time,
+                        wake_at=None
+                    )
 
                     # Start display thread if needed
-                    if not self.display_thread or not self.display_thread.is_alive():
+                    if owns_terminal and (not self.display_thread or not self.display_thread.is_alive()):
                         self._start_display_updater()
 
+                    # A resume names the version it continues (If-Range) and
+                    # starts `overlap` bytes early, to compare with the local
+                    # tail; see scripts/resume.py.
+                    validator = load_validator(temp_path) if existing_size else None
+                    overlap = tail_overlap(existing_size)
+
                     # Begin download
-                    with requests.Session() as session:
-                        adapter = requests.adapters.HTTPAdapter(max_retries=5)
-                        session.mount('https://', adapter)
-                        session.mount('http://', adapter)
+                    # Connection-level retries only.  With a bare max_retries=5
+                    # urllib3 also honours Retry-After itself, sleeping out a
+                    # 429 inside session.get() before we ever see it.
+                    with get_transport().session(
+                        max_retries=Retry(total=5, respect_retry_after_header=False)
+                    ) as session:
 
                         with session.get(
                             download_url,
                             stream=True,
-                            headers=get_download_headers(existing_size),
+                            headers=get_download_headers(existing_size - overlap, if_range(validator)),
                             timeout=RUNTIME_CONFIG["download"]["timeout"],
                             verify=False
                         ) as response:
+                            # 429: under the scheduler the job is parked with its
+                            # host until Retry-After and the thread is released;
+                            # otherwise wait here (abortably) and go round again.
+                            if response.status_code == 429:
+                                delay = self._retry_after(response)
+                                emit("rate_limited", file=filename, url=source_url, delay=round(delay, 1))
+                                if scheduled:
+                                    retry_state.update(retries=retries, no_resume=no_resume)
+                                    raise RetryLater(delay, "HTTP 429", host_wide=True)
+                                self._handle_rate_limit(response, abort)
+                                timings.mark("backoff")
+                                retries += 1
+                                continue
                             response.raise_for_status()
 
                             # ── Critical: honour (or detect lack of) range support ──
@@ -848,14 +1295,57 @@ class DownloadManager:
                             # sending the whole file and we must NOT append — that is
                             # what caused the 151% progress bug on SourceForge CDN URLs.
                             file_mode, existing_size, total_size, resume_status = _resolve_response_mode(
-                                response, existing_size, total_size, temp_path
+                                response, existing_size - overlap, total_size, temp_path, validator
                             )
+                            reader = BodyReader(response) if pooled else None
+                            # A model or archive fetched from byte 0 has its
+                            # first bytes checked before any is written; an
+                            # HTML page or an LFS pointer is not worth
+                            # retrying.  See scripts/preflight.py.
+                            head = b""
+                            if existing_size == 0 and preflight_enabled() and checked(filename):
+                                wanted = PREFLIGHT_SETTINGS["prefix"]
+                                head = _read_prefix(response, reader, wanted)
+                                needed = header_length(filename, head)
+                                if (len(head) < needed <= PREFLIGHT_SETTINGS["max_header"]
+                                        and (not total_size or needed <= total_size)):
+                                    wanted = needed
+                                    head += _read_prefix(response, reader, needed - len(head))
+                                if total_size and len(head) < min(wanted, total_size):
+                                    raise ChunkedEncodingError("Body ended inside the header check")
+                                problem = check_header(filename, head, total_size)
+                                if problem:
+                                    print(f"Pre-flight check of {filename} failed: {problem}")
+                                    emit("preflight", file=filename, url=source_url, problem=problem)
+                                    emit("failed", file=filename, url=source_url,
+                                         error=f"Pre-flight: {problem}")
+                                    return False, f"Pre-flight check failed: {problem}"
+                            if resume_status == "Available" and overlap:
+                                tail = _read_prefix(response, reader, overlap)
+                                if len(tail) < overlap:
+                                    raise ChunkedEncodingError("Body ended inside the resume overlap")
+                                if not tail_matches(temp_path, existing_size, tail):
+                                    print(f"\n[Resume] The last {format_file_size(overlap)} on disk differ "
+                                          f"from the server's. Discarding the partial and restarting...")
+                                    emit("resume", file=filename, status="Changed",
+                                         http_status=response.status_code, offset=existing_size + overlap,
+                                         total=total_size)
+                                    temp_path.unlink(missing_ok=True)
+                                    discard_validator(temp_path)
+                                    discard_journal(temp_path)
+                                    continue
+                                existing_size += overlap
+                            elif existing_size == 0:
+                                # Byte 0 onwards: this is the version the .part holds.
+                                save_validator(temp_path, response.headers, total_size)
 
                             # Persist the no-resume determination for the lifetime of this
                             # download.  Once the server has demonstrated it ignores Range,
                             # every subsequent retry must start fresh with no Range header.
                             if resume_status == "Unavailable":
                                 no_resume = True
+                            emit("resume", file=filename, status=resume_status, http_status=response.status_code,
+                                 offset=existing_size, total=total_size)
 
                             # Check Content-Disposition for a server-provided filename
                             # (important for CDN-redirected URLs that change the path)
@@ -863,13 +1353,14 @@ class DownloadManager:
                             if cd_header:
                                 cd_filename = extract_filename_from_disposition(cd_header)
                                 if cd_filename and cd_filename != filename:
-                                    new_temp = TEMP_DIR / f"{cd_filename}.part"
+                                    new_temp = self.temp_dir / f"{cd_filename}.part"
                                     if temp_path.exists() and not new_temp.exists():
                                         try:
                                             temp_path.rename(new_temp)
                                         except OSError:
                                             pass
                                         else:
+                                            move_validator(temp_path, new_temp)
                                             temp_path = new_temp
                                     filename = cd_filename
                                     out_path = out_path.parent / filename
@@ -880,40 +1371,75 @@ class DownloadManager:
                             pre_loop_existing_size = existing_size
 
                             # Propagate corrected total_size and resume_status to the tracking dict
-                            tracking_data.update({'total': total_size, 'resume_status': resume_status})
-
-                            # Download loop
-                            with open(temp_path, file_mode) as out_file:
-                                for chunk in response.iter_content(chunk_size=chunk_size):
+                            tracking_data.update(total=total_size, resume_status=resume_status)
+                            timings.mark("connect")
+
+                            # Download loop.  Writes are positional (at
+                            # existing_size), so a resume opens the .part for
+                            # update and part_writer cuts anything past the
+                            # resume point; see scripts/buffers.py.
+                            resuming = file_mode == 'ab' and temp_path.exists()
+                            # (Read-write either way: the mmap writer needs it.)
+                            with open(temp_path, 'r+b' if resuming else 'w+b') as out_file, \
+                                    part_writer(out_file, temp_path, existing_size) as writer:
+                                # Followers read the .part from byte 0, so every
+                                # attempt (a restart from 0 truncates it) gets fresh
+                                # ones, started once the file exists.
+                                for follower in self.followers:
+                                    follower.cancel()
+                                followers = self.followers = []
+                                if auto_extract_enabled():
+                                    extractor = start_streaming(temp_path, out_path)
+                                    if extractor is not None:
+                                        followers.append(extractor)
+                                if content_store_enabled() or expected_sha256:
+                                    followers.append(StreamingHasher(temp_path).start())
+                                for follower in followers:
+                                    follower.advance(existing_size)
+
+                                # Stop or pause mid-chunk; see scripts/cancel.py.
+                                def hold() -> bool:
+                                    return self._warm_pause(pause, abort, tracking_data, filename, source_url)
+                                if pooled:
+                                    reader.stop = lambda: abort.is_set() or pause.is_set()
+                                    chunks = _read_chunks(reader, lease, hold, abort)
+                                else:
+                                    chunks = _held(response.iter_content(chunk_size=lease.reserve()), hold)
+                                if head:
+                                    chunks = itertools.chain((head,), chunks)   # checked above, not yet written
+                                for chunk in chunks:
+                                    timings.mark("read")
                                     if not chunk:
                                         continue
 
                                     # Process chunk
-                                    out_file.write(chunk)
-                                    out_file.flush()
-                                    os.fsync(out_file.fileno())
-                                    written_size = out_file.tell()
-                                    now = time.time()
-                                    elapsed_chunk = now - tracking_data.get('last_chunk_time', now)
-                                    tracking_data.update({
-                                        'current': written_size,
-                                        'total': total_size,
-                                        'status': 'downloading',
-                                        'speed': len(chunk) / elapsed_chunk if elapsed_chunk > 0 else 0,
-                                        'last_chunk_time': now
-                                    })
+                                    if write_latency is not None:
+                                        write_started = time.perf_counter()
+                                    written_size = writer.write(memoryview(chunk), existing_size)
+                                    timings.mark("write")
+                                    writer.commit()
+                                    # Keeps what the followers have yet to read.
+                                    writer.drop_behind(min([written_size] + [f.needs_from() for f in followers]))
+                                    timings.mark("fsync")
+                                    if write_latency is not None:
+                                        write_latency.observe(time.perf_counter() - write_started)
+                                    tracking_data.advance(written_size, total_size, len(chunk), time.time())
                                     existing_size = written_size
-
-                                    # Abandon check AFTER the write+fsync: the
-                                    # chunk that was in flight when "A" was pressed
-                                    # is completed and kept, so resuming does not
-                                    # re-fetch it.  KeyListener has already set this
-                                    # (and printed the notice) the moment the key was
-                                    # pressed -- all that is waited on here is the
-                                    # current chunk finishing, not a poll.
-                                    if temporary.ABORT_EVENT.is_set():
-                                        self._register_file_entry(filename, source_url, total_size)
-                                        return False, "Download saved for later"
+                                    for follower in followers:
+                                        follower.advance(written_size)
+                                    timings.mark("progress")
+
+                            # Abandoned, or paused past warm_pause.  The read
+                            # in flight was cut short, and what it had got is
+                            # written and synced above, so the .part ends at
+                            # exactly the offset to resume from.
+                            if (abort.is_set() or pause.is_set()) and not 0 < total_size <= existing_size:
+                                if self.interactive:
+                                    self._register_file_entry(filename, source_url, total_size)
+                                    timings.mark("config")
+                                emit("stopped", file=filename, url=source_url, offset=existing_size,
+                                     reason="paused" if pause.is_set() and not abort.is_set() else "abort")
+                                return False, "Download saved for later"
 
                             # ── Post-download size verification ──
                             # Note: this block only runs when iter_content exits cleanly
@@ -928,7 +1454,11 @@ class DownloadManager:
                                     # Content-Length promised.  Retry.
                                     missing = format_file_size(total_size - actual_temp_size)
                                     print(f"\n[Incomplete] Got {format_file_size(actual_temp_size)} of {format_file_size(total_size)} — {missing} missing. Retrying...")
-                                    raise IncompleteRead(b'', total_size - actual_temp_size)
+                                    # partial is a byte COUNT: IncompleteRead(b'', n)
+                                    # made str(e) raise TypeError in the retry path,
+                                    # which turned a retryable short body into a
+                                    # hard failure.  Found with the fault transport.
+                                    raise IncompleteRead(actual_temp_size, total_size - actual_temp_size)
                                 else:
                                     # Received slightly more than expected — can happen
                                     # with some CDN edge caches.  Warn but proceed.
@@ -939,32 +1469,14 @@ class DownloadManager:
                                     )
 
                             # Verify and move completed file
-                            if not move_with_retry(temp_path, out_path):
-                                return False, "Failed to move downloaded file"
-
-                            # Stop display updates
-                            self._stop_display_updater()
-
-                            final_size = out_path.stat().st_size
-                            bytes_this_session = final_size - pre_loop_existing_size
-                            elapsed_total = time.time() - start_time
-                            avg_speed = bytes_this_session / elapsed_total if elapsed_total > 0 else 0
-
-                            # Show summary
-                            display_download_summary(
-                                filename=filename,
-                                total_size=final_size,
-                                average_speed=avg_speed,
-                                elapsed=elapsed_total,
-                                timestamp=datetime.now(),
-                                destination=str(out_path),
-                                batch_mode=batch_mode
+                            return self._finalize_download(
+                                temp_path, out_path, filename, source_url, tracking_data,
+                                start_time, batch_mode, attempts=retries + 1,
+                                resume_position=pre_loop_existing_size
                             )
 
-                            update_history(self.config, filename, source_url, final_size)
-                            return True, None
-
                 except (ConnectionError, ChunkedEncodingError, IncompleteRead) as e:
+                    timings.mark("read")
                     # ── SourceForge / chunked-CDN completion check ──────────────────
                     # These CDNs use Transfer-Encoding: chunked but drop the TCP
                     # connection without sending the final zero-length terminating
@@ -981,27 +1493,11 @@ class DownloadManager:
                             f"\n[Complete] Received all {format_file_size(total_size)} despite "
                             f"connection drop (missing terminating chunk) — finalizing..."
                         )
-                        if not move_with_retry(temp_path, out_path):
-                            return False, "Failed to move downloaded file"
-                        self._stop_display_updater()
-                        final_size = out_path.stat().st_size
-                        elapsed_total = time.time() - start_time
-                        # Use total bytes received this session for speed calculation.
-                        # pre_loop_existing_size may be 0 on a no_resume restart, which
-                        # is correct — we re-downloaded from byte 0.
-                        session_bytes = final_size - (pre_loop_existing_size if 'pre_loop_existing_size' in dir() else 0)
-                        avg_speed = session_bytes / elapsed_total if elapsed_total > 0 else 0
-                        display_download_summary(
-                            filename=filename,
-                            total_size=final_size,
-                            average_speed=avg_speed,
-                            elapsed=elapsed_total,
-                            timestamp=datetime.now(),
-                            destination=str(out_path),
-                            batch_mode=batch_mode
+                        return self._finalize_download(
+                            temp_path, out_path, filename, source_url, tracking_data,
+                            start_time, batch_mode, attempts=retries + 1,
+                            resume_position=pre_loop_existing_size
                         )
-                        update_history(self.config, filename, source_url, final_size)
-                        return True, None
                     # ── end completion check ─────────────────────────────────────────
 
                     # Network-level failures: connection reset, TCP drop, truncated body.
@@ -1017,41 +1513,78 @@ class DownloadManager:
                                 temp_path.unlink()
                             except OSError:
                                 pass
+                            discard_journal(temp_path)
                         print(f"\n[Retry {retries}] {err_type}: server does not support resume — restarting from 0...")
+                        written = 0
                     else:
-                        written = temp_path.stat().st_size if (temp_path is not None and temp_path.exists()) else 0
+                        written = partial_size(temp_path) if temp_path is not None else 0
                         print(f"\n[Retry {retries}] {err_type}: will resume from {format_file_size(written)}...")
                     if retries >= RUNTIME_CONFIG["download"]["max_retries"]:
                         raise
-                    time.sleep(min(2 ** retries, 30))
+                    delay = min(2 ** retries, 30)
+                    emit("retry", file=filename, attempt=retries, reason=err_type, message=str(e),
+                         resume_from=written, delay=delay)
+                    if scheduled:
+                        retry_state.update(retries=retries, no_resume=no_resume)
+                        raise RetryLater(delay, err_type)
+                    abort.wait(delay)   # a sleep that a pause/abandon cuts short
+                    timings.mark("backoff")
+
+                except RetryLater:
+                    raise
 
                 except Exception as e:
                     retries += 1
                     if retries >= max_retries:
                         raise
-                    time.sleep(min(2 ** retries, 10))
+                    delay = min(2 ** retries, 10)
+                    emit("retry", file=filename, attempt=retries, reason=type(e).__name__,
+                         message=str(e), delay=delay)
+                    if scheduled:
+                        retry_state.update(retries=retries, no_resume=no_resume)
+                        raise RetryLater(delay, type(e).__name__)
+                    abort.wait(delay)
+                    timings.mark("backoff")
 
             # Reachable now that the loop has a real exit condition.  The old
             # condition was `while pre_registration_attempts < max_pre_attempts
             # or retries < ...` and pre_registration_attempts was never
             # incremented, so the left side was permanently True and the loop
             # could only ever be left by an exception.
+            emit("failed", file=filename, url=source_url, attempts=retries,
+                 error=f"Download failed after {max_retries} attempts")
             return False, f"Download failed after {max_retries} attempts"
 
+        except RetryLater as e:
+            # The scheduler re-runs this job later.  Its progress record stays
+            # on show meanwhile, as "waiting until ..."; the next run picks it
+            # up again from retry_state, or the scheduler drops it if cancelled.
+            if tracking_data is not None:
+                tracking_data.update(status="waiting", wake_at=time.time() + e.delay)
+                retry_state["record"] = tracking_data
+                keep_record = True
+            raise
+
         except Exception as e:
             display_error(f"Unexpected error: {str(e)}")
+            emit("failed", file=filename, url=source_url, reason=type(e).__name__, error=str(e))
             return False, str(e)
 
         finally:
             # Clean up
             key_listener.stop()
             self._stop_display_updater()
-            if tracking_data and tracking_data in ACTIVE_DOWNLOADS:
+            if tracking_data is not None and not keep_record:
                 ACTIVE_DOWNLOADS.remove(tracking_data)
+            if timings is not NO_TIMINGS and not keep_record:
+                self._report_timings(timings, filename or out_path.name, source_url)
+            for follower in self.followers:
+                follower.cancel()   # no-op once finished
+            self.followers = []
+            lease.release()
 
             # Restore terminal settings on non-Windows platforms
-            if not temporary.IS_WINDOWS and old_term is not None and fd is not None:
-                termios.tcsetattr(fd, termios.TCSADRAIN, old_term)
+            restore_terminal(fd, old_term)
 
             if 'gc' in locals() or 'gc' in globals():
                 gc.collect()
@@ -1072,6 +1605,8 @@ def handle_orphaned_files(config: dict) -> None:
             registered_files.add(f"{filename}.part")
 
     downloads_path = get_downloads_path(config)
+    partials_path = get_partials_path(config)
+    adopt_legacy_partials(partials_path)
 
     # Sweep ONLY `incomplete\`, and only .part files.
     #
@@ -1085,8 +1620,9 @@ def handle_orphaned_files(config: dict) -> None:
     # loop below does.  Deleting the user's files was never part of that.
     #
     # incomplete\ is DownLord's own scratch space, so an unregistered .part there
-    # really is garbage and is still cleared.
-    for file in TEMP_DIR.glob("*.part"):
+    # really is garbage and is still cleared.  (It is <downloads>\.incomplete
+    # now; see adopt_legacy_partials.)
+    for file in partials_path.glob("*.part"):
         if file.name in registered_files or file.stem in registered_files:
             continue
         try:
@@ -1095,11 +1631,21 @@ def handle_orphaned_files(config: dict) -> None:
         except Exception as e:
             display_error(f"Error removing file {file}: {str(e)}")
             time.sleep(3)
+    # mmap-writer journals (scripts/buffers.py) and resume validators
+    # (scripts/resume.py) whose .part is gone.
+    for suffix in (JOURNAL_SUFFIX, VALIDATOR_SUFFIX):
+        for sidecar in partials_path.glob(f"*.part{suffix}"):
+            if not sidecar.with_name(sidecar.name[:-len(suffix)]).exists():
+                try:
+                    sidecar.unlink()
+                except OSError:
+                    pass
 
     
     # Check each config entry and remove if the file is missing.
     # This is the "auto-removing items from its list" behaviour: the file was
     # moved out of downloads\ or deleted, so the slot is released.
+    changed = False
     for i in range(1, 10):
         filename = config.get(f"filename_{i}", "Empty")
         if filename == "Empty":
@@ -1107,23 +1653,26 @@ def handle_orphaned_files(config: dict) -> None:
 
         # Check if the file exists in downloads or as .part in temp
         file_path = downloads_path / filename
-        temp_path = TEMP_DIR / f"{filename}.part"
+        temp_path = partials_path / f"{filename}.part"
         
         if not file_path.exists() and not temp_path.exists():
             # Clear the entry
             config[f"filename_{i}"] = "Empty"
             config[f"url_{i}"] = ""
             config[f"total_size_{i}"] = 0
+            changed = True
             print(f"Removed missing file entry: {filename}")
     
-    # Save the updated config
-    Config_Manager.save(config)
+    # Save the updated config -- only if something went; this runs on every
+    # launch, and an unchanged config needs no rewrite (or backup rotation).
+    if changed:
+        Config_Manager.save(config)
 
 def cleanup_temp_files() -> None:
     """
     Clean temporary download files.
     """
-    temp_dir = Path(TEMP_DIR)
+    temp_dir = get_partials_path(Config_Manager.load())
     if temp_dir.exists():
         for file in temp_dir.glob("*.part"):
             try:
@@ -1159,7 +1708,17 @@ def move_with_retry(src: Path, dst: Path, max_retries: int = 10, delay: float =
             dst.parent.mkdir(parents=True, exist_ok=True)
             
             # Use replace() which works cross-platform
-            src.replace(dst)
+            try:
+                src.replace(dst)
+            except OSError as e:
+                # replace() cannot cross filesystems (EXDEV; WinError 17 maps to
+                # it too).  That used to land in "Unexpected error" below and
+                # fail the download at 100%.  Partials live beside the downloads
+                # now, so this is only reached for a custom temp_dir or a legacy
+                # incomplete\ partial.
+                if e.errno != errno.EXDEV:
+                    raise
+                copy_across_filesystems(src, dst)
             return True
             
         except PermissionError as e:
@@ -1175,6 +1734,69 @@ def move_with_retry(src: Path, dst: Path, max_retries: int = 10, delay: float =
     return False
 
 
+# Kernel-side copy for the rare move that has to cross filesystems.  copy_file_range
+# (Linux 4.5+, cross-filesystem from 5.3) and sendfile (Linux 2.6.33+ to a regular
+# file) move the bytes inside the kernel, without a trip through Python buffers;
+# where neither is available or the kernel refuses, a plain 16 MB-block copy.
+_KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                            getattr(errno, "ENOTSUP", errno.EINVAL),
+                            getattr(errno, "EOPNOTSUPP", errno.EINVAL)}
+
+
+def _kernel_copy(src_fd: int, dst_fd: int, size: int) -> int:
+    """Copy `size` bytes from offset 0; returns how many the kernel managed."""
+    copied = 0
+    for name in ("copy_file_range", "sendfile"):
+        call = getattr(os, name, None)
+        if call is None:
+            continue
+        try:
+            os.lseek(dst_fd, copied, os.SEEK_SET)
+            while copied < size:
+                count = min(size - copied, 1 << 30)
+                if name == "copy_file_range":
+                    n = call(src_fd, dst_fd, count, copied, copied)
+                else:
+                    n = call(dst_fd, src_fd, copied, count)
+                if n == 0:
+                    break
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+    return copied
+
+
+def copy_across_filesystems(src: Path, dst: Path) -> None:
+    """Move `src` to another filesystem: copy beside `dst`, fsync, rename, unlink."""
+    staging = dst.with_name(f".{dst.name}.moving")
+    print(f"Copying {src.name} across filesystems ({format_file_size(src.stat().st_size)})...")
+    with open(src, "rb") as fin, open(staging, "wb") as fout:
+        size = os.fstat(fin.fileno()).st_size
+        copied = _kernel_copy(fin.fileno(), fout.fileno(), size)
+        if copied < size:
+            fin.seek(copied)
+            fout.seek(copied)
+            shutil.copyfileobj(fin, fout, 16 * 1024 * 1024)
+        fout.flush()
+        os.fsync(fout.fileno())
+    os.replace(staging, dst)   # same filesystem as dst, so atomic
+    src.unlink()
+
+
+def adopt_legacy_partials(partials_path: Path) -> None:
+    """Move .part files from the old BASE_DIR/incomplete into <downloads>/.incomplete."""
+    if not TEMP_DIR.is_dir() or TEMP_DIR.resolve() == partials_path.resolve():
+        return
+    for part in TEMP_DIR.glob("*.part"):
+        target = partials_path / part.name
+        if target.exists():
+            continue
+        if move_with_retry(part, target, max_retries=1):
+            print(f"Moved partial {part.name} to {partials_path}")
+
+
 # File Browser Integration
 def _is_wsl() -> bool:
     """True when running under WSL, where there is no Linux file manager."""
@@ -0,0 +1,254 @@
+# Script: `.\scripts\metrics.py`
+
+# Imports
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .buffers import BUFFERS
+from .temporary import ACTIVE_DOWNLOADS, METRICS_SETTINGS
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+# Prometheus text format on http://127.0.0.1:9477/metrics, for prefetch boxes
+# that run the daemon for weeks.  `launcher.py daemon --metrics [PORT]`,
+# `get --metrics [PORT]`, or RUNTIME_CONFIG["interface"]["metrics_port"] for
+# the menu.  Read-only and unauthenticated, so loopback only.
+#
+# Nothing here is fed per chunk under a lock.  There are three sources:
+#   events     counters (retries by reason, stalls, resume unavailable,
+#              outcomes) come from the same emit() calls as the event stream;
+#              those fire on state changes only, and the stall detector is the
+#              event ticker that already reads the progress registry
+#   registry   gauges (transfers by status, current and average throughput)
+#              and bytes per host are read from the ProgressRecords at scrape
+#              time, through the same lock-free snapshots the display uses;
+#              bytes of finished transfers are kept by ProgressRegistry.remove
+#   histogram  disk write latency (write + flush + fsync per chunk) goes into a
+#              Histogram owned by the download thread, which is its only
+#              writer -- a bisect and three adds.  A scrape sums the per-thread
+#              histograms; those of finished threads are folded into a base.
+# Queue depth comes from every live Scheduler, each of which registers itself.
+
+WRITE_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                         0.1, 0.25, 0.5, 1.0, 2.5, 5.0)   # seconds
+
+
+# Classes
+class Histogram:
+    """Cumulative-bucket histogram with exactly one writer thread."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(WRITE_LATENCY_BUCKETS) + 1)   # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(WRITE_LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def merge(self, other: "Histogram") -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.sum += other.sum
+        self.count += other.count
+
+
+class Metrics:
+    """Process-wide counters, plus the registry and schedulers read at scrape time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.started = time.time()
+        self.retries = Counter()        # reason -> count
+        self.rate_limited = Counter()   # host -> count
+        self.outcomes = Counter()       # complete / failed / stopped
+        self.stalls = 0
+        self.resume_unavailable = 0
+        self.preemptions = 0
+        self._schedulers = weakref.WeakSet()
+        self._local = threading.local()
+        self._histograms: List[Tuple[weakref.ref, Histogram]] = []
+        self._histogram_base = Histogram()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # Feeds
+    def observe(self, event: str, fields: Dict) -> None:
+        """EventStream observer; called for every event, so ignore what is not ours."""
+        if event == "retry":
+            key = ("retries", fields.get("reason") or "unknown")
+        elif event == "rate_limited":
+            key = ("rate_limited", urlparse(fields.get("url") or "").netloc.lower())
+        elif event in ("complete", "failed", "stopped"):
+            key = ("outcomes", event)
+        elif event == "stall":
+            key = ("stalls", None)
+        elif event == "resume" and fields.get("status") == "Unavailable":
+            key = ("resume_unavailable", None)
+        elif event == "preempted":
+            key = ("preemptions", None)
+        else:
+            return
+        with self._lock:
+            name, label = key
+            if label is None:
+                setattr(self, name, getattr(self, name) + 1)
+            else:
+                getattr(self, name)[label] += 1
+
+    def track(self, scheduler) -> None:
+        """Count `scheduler`'s jobs in the queue gauges for as long as it lives."""
+        self._schedulers.add(scheduler)
+
+    def write_histogram(self) -> Optional[Histogram]:
+        """This thread's write-latency histogram, or None while metrics are off."""
+        if not self.enabled:
+            return None
+        histogram = getattr(self._local, "histogram", None)
+        if histogram is None:
+            histogram = self._local.histogram = Histogram()
+            with self._lock:
+                self._histograms.append((weakref.ref(threading.current_thread()), histogram))
+        return histogram
+
+    # Exposition
+    def serve(self, port: int = METRICS_SETTINGS["port"], host: str = METRICS_SETTINGS["host"]) -> int:
+        """Start the /metrics listener on a daemon thread; returns the bound port."""
+        from .events import EVENTS
+        if self._server is not None:
+            return self._server.server_address[1]
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.metrics = self
+        self.enabled = True
+        EVENTS.subscribe(self.observe)
+        EVENTS.start_progress()   # the stall detector
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def render(self) -> str:
+        """Everything, in Prometheus text exposition format 0.0.4."""
+        now = time.time()
+        active = ACTIVE_DOWNLOADS.snapshot()
+        statuses = Counter(dl['status'] for dl in active)
+        jobs = Counter()
+        for scheduler in list(self._schedulers):
+            jobs.update(job['state'] for job in scheduler.snapshot())
+        with self._lock:
+            retries = dict(self.retries)
+            rate_limited = dict(self.rate_limited)
+            outcomes = dict(self.outcomes)
+            stalls, unavailable, preemptions = self.stalls, self.resume_unavailable, self.preemptions
+            histogram = self._fold_histograms()
+
+        out: List[str] = []
+        _family(out, "downlord_bytes_downloaded_total", "counter",
+                "Body bytes received, by host (re-fetched bytes included).",
+                [({"host": host}, n) for host, n in sorted(ACTIVE_DOWNLOADS.bytes_by_host().items())])
+        _family(out, "downlord_active_transfers", "gauge",
+                "Transfers currently receiving data.", [({}, statuses.get("downloading", 0))])
+        _family(out, "downlord_transfers", "gauge", "Transfers with a progress record, by status.",
+                [({"status": s}, n) for s, n in sorted(statuses.items())])
+        _family(out, "downlord_throughput_current_bytes_per_second", "gauge",
+                "Sum of the smoothed rates of all active transfers.",
+                [({}, round(sum(dl['speed'] for dl in active), 1))])
+        _family(out, "downlord_throughput_average_bytes_per_second", "gauge",
+                "Sum of the session average rates of all active transfers.",
+                [({}, round(sum(dl['average_speed'] for dl in active), 1))])
+        _family(out, "downlord_queue_depth", "gauge", "Jobs queued or backing off, not yet running.",
+                [({}, jobs.get("queued", 0) + jobs.get("waiting", 0))])
+        _family(out, "downlord_jobs", "gauge", "Scheduler jobs by state.",
+                [({"state": s}, n) for s, n in sorted(jobs.items())])
+        _family(out, "downlord_retries_total", "counter", "Download retries, by reason.",
+                [({"reason": r}, n) for r, n in sorted(retries.items())])
+        _family(out, "downlord_rate_limited_total", "counter", "HTTP 429 responses, by host.",
+                [({"host": h}, n) for h, n in sorted(rate_limited.items())])
+        _family(out, "downlord_stalls_total", "counter", "Transfers that went quiet (see events.STALL_AFTER).",
+                [({}, stalls)])
+        _family(out, "downlord_resume_unavailable_total", "counter",
+                "Resumes the server refused (Range ignored), each costing a restart from 0.",
+                [({}, unavailable)])
+        _family(out, "downlord_preemptions_total", "counter", "Running jobs preempted by higher priority.",
+                [({}, preemptions)])
+        _family(out, "downlord_downloads_total", "counter", "Finished downloads, by outcome.",
+                [({"outcome": o}, n) for o, n in sorted(outcomes.items())])
+
+        out.append("# HELP downlord_write_latency_seconds Per-chunk disk write (write + flush + fsync).")
+        out.append("# TYPE downlord_write_latency_seconds histogram")
+        cumulative = 0
+        for bound, n in zip(WRITE_LATENCY_BUCKETS + (float("inf"),), histogram.counts):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            out.append(f'downlord_write_latency_seconds_bucket{{le="{le}"}} {cumulative}')
+        out.append(f"downlord_write_latency_seconds_sum {histogram.sum:.6f}")
+        out.append(f"downlord_write_latency_seconds_count {histogram.count}")
+
+        buffers = BUFFERS.snapshot()
+        _family(out, "downlord_buffer_bytes", "gauge", "Receive buffer memory, granted to downloads or idle.",
+                [({"state": "granted"}, buffers["granted"]), ({"state": "idle"}, buffers["idle"])])
+        _family(out, "downlord_buffer_budget_bytes", "gauge", "Global receive buffer budget.",
+                [({}, buffers["budget"])])
+        _family(out, "downlord_buffer_waiting", "gauge", "Readers waiting for buffer capacity.",
+                [({}, buffers["waiting"])])
+        _family(out, "downlord_uptime_seconds", "gauge", "Seconds since the process started.",
+                [({}, round(now - self.started, 1))])
+        return "\n".join(out) + "\n"
+
+    def _fold_histograms(self) -> Histogram:
+        """Sum of every write histogram; finished threads' are folded into the base.  Needs _lock."""
+        live = []
+        for thread_ref, histogram in self._histograms:
+            thread = thread_ref()
+            if thread is None or not thread.is_alive():
+                self._histogram_base.merge(histogram)
+            else:
+                live.append((thread_ref, histogram))
+        self._histograms = live
+        total = Histogram()
+        total.merge(self._histogram_base)
+        for _, histogram in live:
+            total.merge(histogram)
+        return total
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server_version = "DownLord"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.server.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+# Globals
+METRICS = Metrics()
+
+
+# Functions
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _family(out: List[str], name: str, kind: str, help_text: str, samples) -> None:
+    out.append(f"# HELP {name} {help_text}")
+    out.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        label_text = ",".join(f'{k}="{_label_value(v)}"' for k, v in labels.items())
+        out.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
@@ -0,0 +1,210 @@
+# Script: `.\scripts\preflight.py`
+
+# Imports
+import json
+import re
+import struct
+from typing import Optional, Tuple
+
+from .temporary import CONTENT_TYPES, DEFAULT_HEADERS, PREFLIGHT_SETTINGS, RUNTIME_CONFIG
+
+# ── Pre-flight header checks ─────────────────────────────────────────────────
+# Nothing used to stop a download from spending hours on an HTML error page,
+# or on a 130-byte Git LFS pointer, saved under a .safetensors name; the
+# loader found out afterwards.  Now, whenever a CONTENT_TYPES["model"] or
+# ["archive"] file is fetched from byte 0, download_file reads the first
+# PREFLIGHT_SETTINGS["prefix"] bytes of the body and checks them before
+# anything is written (RUNTIME_CONFIG["download"]["preflight"]) -- no extra
+# request, the same bytes are then written as the first chunk.  The shards of
+# a sharded model are all checked before any is queued (scripts/shards.py),
+# with a Range request each through probe_header().
+#
+# Any of those types is refused if it is a Git LFS pointer stub, an HTML page
+# or an XML error document.  Then, by suffix:
+#
+#   .safetensors  8-byte little-endian header length, sane and inside the
+#                 file; a JSON object after it; and when the whole header is
+#                 at hand (fetched up to max_header), tensor data that ends
+#                 exactly at the end of the file -- a truncated upload fails
+#   .gguf         "GGUF" magic, version 1-3, plausible tensor and KV counts
+#   .pt .pth .ckpt  a zip local header (torch.save) or a pickle (legacy)
+#   .h5           the HDF5 signature at 0, 512, 1024 or 2048
+#   archives      zip, gzip, bzip2, xz, 7z, RAR, tar ("ustar") and ISO 9660
+#                 magic
+#
+# .bin and .onnx have no magic of their own and get the generic checks only.
+# check_header() works on bytes alone; probe_header() fetches them.  Network
+# trouble during a probe is not a verdict: the download goes ahead and deals
+# with it as usual.  A refused download fails at once, without retries --
+# the same URL would serve the same bytes again.
+
+
+GGUF_VERSIONS = (1, 2, 3)
+SAFETENSORS_MAX_HEADER = 100 * 1024 * 1024   # the format's own limit
+LFS_POINTER = b"version https://git-lfs.github.com/spec/"
+HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
+
+# suffix -> ((offset, magic), ...), any of which will do
+MAGIC = {
+    ".zip": ((0, b"PK\x03\x04"), (0, b"PK\x05\x06"), (0, b"PK\x07\x08")),
+    ".gz": ((0, b"\x1f\x8b"),),
+    ".bz2": ((0, b"BZh"),),
+    ".xz": ((0, b"\xfd7zXZ\x00"),),
+    ".7z": ((0, b"7z\xbc\xaf\x27\x1c"),),
+    ".rar": ((0, b"Rar!\x1a\x07"),),
+    ".tar": ((257, b"ustar"),),
+    ".iso": ((32769, b"CD001"),),
+    ".pt": ((0, b"PK\x03\x04"), (0, b"\x80")),
+    ".pth": ((0, b"PK\x03\x04"), (0, b"\x80")),
+    ".ckpt": ((0, b"PK\x03\x04"), (0, b"\x80")),
+    ".h5": ((0, HDF5_SIGNATURE), (512, HDF5_SIGNATURE), (1024, HDF5_SIGNATURE), (2048, HDF5_SIGNATURE)),
+}
+
+
+# Functions
+def checked(filename: str) -> bool:
+    """Whether check_header() knows anything about this kind of file."""
+    return filename.lower().endswith(tuple(CONTENT_TYPES["model"] + CONTENT_TYPES["archive"]))
+
+
+def preflight_enabled() -> bool:
+    return bool(RUNTIME_CONFIG["download"].get("preflight", True))
+
+
+def check_header(filename: str, prefix: bytes, total_size: int = 0) -> Optional[str]:
+    """What is wrong with `prefix` as the start of `filename`; None if nothing is."""
+    lower = filename.lower()
+    problem = _check_generic(prefix)
+    if problem:
+        return problem
+    if lower.endswith(".safetensors"):
+        return _check_safetensors(prefix, total_size)
+    if lower.endswith(".gguf"):
+        return _check_gguf(prefix)
+    suffix = lower[lower.rfind("."):] if "." in lower else ""
+    return _check_magic(suffix, prefix, total_size)
+
+
+def header_length(filename: str, prefix: bytes) -> int:
+    """Bytes needed to check `filename` fully, judging by its first bytes."""
+    if filename.lower().endswith(".safetensors") and len(prefix) >= 8:
+        return 8 + int.from_bytes(prefix[:8], "little")
+    return len(prefix)
+
+
+def fetch_prefix(url: str, n: int, session=None, start: int = 0) -> Tuple[bytes, int]:
+    """Bytes [start, start + n) of `url` and the file's total size (0 if unknown)."""
+    from .transport import get_transport
+
+    headers = DEFAULT_HEADERS.copy()
+    headers["Range"] = f"bytes={start}-{start + n - 1}"
+    headers["Accept-Encoding"] = "identity"
+    owner = session is None
+    session = session or get_transport().session()
+    try:
+        with session.get(url, headers=headers, stream=True,
+                         timeout=RUNTIME_CONFIG["download"]["timeout"]) as response:
+            response.raise_for_status()
+            match = re.match(r"bytes (\d+)-\d+/(\d+)", response.headers.get("Content-Range", ""))
+            if response.status_code == 206 and match:
+                if int(match.group(1)) != start:
+                    return b"", int(match.group(2))
+                total = int(match.group(2))
+            elif start:
+                return b"", 0                     # no ranges: only the start is reachable
+            else:
+                total = int(response.headers.get("Content-Length") or 0)
+            data = response.raw.read(n)
+            return data, total
+    finally:
+        if owner:
+            session.close()
+
+
+def probe_header(url: str, filename: str, session=None) -> Optional[str]:
+    """Range-fetch the start of `url` and check it as `filename`; the problem, or None."""
+    from requests.exceptions import HTTPError, RequestException
+
+    try:
+        prefix, total = fetch_prefix(url, PREFLIGHT_SETTINGS["prefix"], session)
+        needed = header_length(filename, prefix)
+        if len(prefix) < needed <= PREFLIGHT_SETTINGS["max_header"] and (not total or needed <= total):
+            rest, _ = fetch_prefix(url, needed - len(prefix), session, start=len(prefix))
+            prefix += rest
+    except HTTPError as e:
+        status = e.response.status_code if e.response is not None else 0
+        # Missing or forbidden will not change by retrying; anything else might.
+        return f"HTTP {status}" if 400 <= status < 500 and status not in (408, 429) else None
+    except (RequestException, OSError):
+        return None
+    return check_header(filename, prefix, total)
+
+
+def _check_generic(prefix: bytes) -> Optional[str]:
+    if prefix.startswith(LFS_POINTER):
+        match = re.search(rb"^size (\d+)", prefix, re.MULTILINE)
+        size = f" to a {int(match.group(1))}-byte file" if match else ""
+        return f"a Git LFS pointer{size}, not the file itself"
+    head = prefix[:1024].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if head.startswith((b"<!doctype html", b"<html", b"<head", b"<body")):
+        return "an HTML page, not the file"
+    if head.startswith(b"<?xml") and b"<error>" in head:
+        return "an XML error response, not the file"
+    return None
+
+
+def _check_magic(suffix: str, prefix: bytes, total_size: int) -> Optional[str]:
+    signatures = MAGIC.get(suffix)
+    if not signatures:
+        return None
+    reachable = [(offset, magic) for offset, magic in signatures
+                 if offset + len(magic) <= (total_size or offset + len(magic))]
+    if not reachable:
+        return f"only {total_size} bytes, too short for a {suffix} file"
+    seen = [(offset, magic) for offset, magic in reachable if offset + len(magic) <= len(prefix)]
+    if len(seen) < len(reachable):
+        return None                              # not fetched far enough to say
+    if any(prefix[offset:offset + len(magic)] == magic for offset, magic in seen):
+        return None
+    return f"not a {suffix} file (starts with {prefix[:8]!r})"
+
+
+def _check_safetensors(prefix: bytes, total_size: int) -> Optional[str]:
+    if len(prefix) < 9:
+        return f"only {len(prefix)} bytes, too short for a safetensors header"
+    length = int.from_bytes(prefix[:8], "little")
+    if not 2 <= length <= SAFETENSORS_MAX_HEADER:
+        return f"safetensors header length {length} is impossible"
+    if total_size and 8 + length > total_size:
+        return f"safetensors header of {length} bytes does not fit in a {total_size}-byte file"
+    if prefix[8:9] != b"{":
+        return "no JSON header after the safetensors length"
+    if len(prefix) < 8 + length:
+        return None                              # checked as far as it was fetched
+    try:
+        header = json.loads(prefix[8:8 + length])
+        data_end = max([int(entry["data_offsets"][1]) for name, entry in header.items()
+                        if name != "__metadata__"] or [0])
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        return "the safetensors header is not valid JSON tensor metadata"
+    if total_size and 8 + length + data_end != total_size:
+        return (f"the safetensors header describes {8 + length + data_end} bytes, "
+                f"the file has {total_size}")
+    return None
+
+
+def _check_gguf(prefix: bytes) -> Optional[str]:
+    if len(prefix) < 24:
+        return f"only {len(prefix)} bytes, too short for a GGUF header"
+    if prefix[:4] != b"GGUF":
+        return f"no GGUF magic (starts with {prefix[:4]!r})"
+    version = struct.unpack_from("<I", prefix, 4)[0]
+    if version not in GGUF_VERSIONS:
+        return f"unknown GGUF version {version}"
+    if version == 1:
+        tensors, kvs = struct.unpack_from("<II", prefix, 8)
+    else:
+        tensors, kvs = struct.unpack_from("<QQ", prefix, 8)
+    if tensors > 1 << 24 or kvs > 1 << 24:
+        return f"implausible GGUF counts ({tensors} tensors, {kvs} metadata keys)"
+    return None
@@ -0,0 +1,177 @@
+# Script: `.\scripts\profiling.py`
+
+# Imports
+import contextlib
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .temporary import RUNTIME_CONFIG
+
+# ── Phase timings ────────────────────────────────────────────────────────────
+# Where does the time inside download_file go?  With
+# RUNTIME_CONFIG["interface"]["detailed_logging"] on (`launcher.py get
+# --timings` / `daemon --timings` turn it on for one run) every download
+# carries a PhaseTimings and the engine marks the boundaries between phases:
+#
+#   probe     get_remote_file_info / process_url
+#   connect   session.get() until the response headers are in
+#   read      waiting on iter_content for the next chunk (socket + requests)
+#   write     out_file.write()
+#   fsync     flush + os.fsync
+#   progress  the ProgressRecord update
+#   display   the progress display refresh (its own thread, added separately)
+#   config    persistent.json slot saves
+#   finalize  the .part -> destination move
+#   backoff   retry and rate-limit waits spent on the download thread
+#
+# mark(phase) charges everything since the previous mark to `phase`: one
+# perf_counter() call and two dict updates per boundary, so four per chunk.
+# With detailed_logging off the engine gets NO_TIMINGS, whose methods do
+# nothing.  Times survive scheduler re-runs (they live in job.retry_state), so
+# the breakdown printed at the end covers every attempt of a download.
+#
+# `--profile FILE` additionally runs every scheduled job under cProfile (one
+# profiler per worker thread -- cProfile only sees the thread it was enabled
+# on) and writes the merged stats to FILE when the batch ends, for pstats,
+# snakeviz or flameprof.  FILE.folded gets the phase timings as collapsed
+# stacks ("file;phase microseconds"), which flamegraph.pl and speedscope read.
+
+PHASES = ("probe", "connect", "read", "write", "fsync", "progress",
+          "display", "config", "finalize", "backoff")
+
+
+# Classes
+class PhaseTimings:
+    """Accumulated seconds and counts per phase for one download."""
+
+    __slots__ = ("seconds", "counts", "_last")
+
+    def __init__(self):
+        # Every key exists up front, so the display thread's add() never
+        # resizes the dict under the download thread's mark().
+        self.seconds: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.counts: Dict[str, int] = dict.fromkeys(PHASES, 0)
+        self._last = time.perf_counter()
+
+    def restart(self) -> None:
+        """Start the clock afresh, e.g. when a scheduler re-runs the download."""
+        self._last = time.perf_counter()
+
+    def mark(self, phase: str) -> None:
+        """Charge the time since the previous mark to `phase`."""
+        now = time.perf_counter()
+        self.seconds[phase] += now - self._last
+        self.counts[phase] += 1
+        self._last = now
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Charge time measured elsewhere, e.g. on the display thread."""
+        self.seconds[phase] += seconds
+        self.counts[phase] += 1
+
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Non-empty phases as {phase: {"seconds", "count", "share"}}."""
+        total = self.total() or 1.0
+        return {phase: {"seconds": round(self.seconds[phase], 4),
+                        "count": self.counts[phase],
+                        "share": round(self.seconds[phase] / total, 4)}
+                for phase in PHASES if self.counts[phase]}
+
+    def format_breakdown(self, title: str) -> str:
+        lines = [f"Phase timings: {title} ({self.total():.2f}s)"]
+        for phase, row in self.summary().items():
+            lines.append(f"  {phase:<9}{row['seconds']:>10.3f}s {row['share'] * 100:>6.1f}%"
+                         f"  x{row['count']}")
+        return "\n".join(lines)
+
+
+class _NoTimings:
+    """What the engine gets when detailed_logging is off."""
+
+    __slots__ = ()
+
+    def restart(self) -> None:
+        pass
+
+    def mark(self, phase: str) -> None:
+        pass
+
+    def add(self, phase: str, seconds: float) -> None:
+        pass
+
+
+NO_TIMINGS = _NoTimings()
+
+
+class BatchProfiler:
+    """cProfile across scheduler worker threads, plus collected phase timings."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: List = []   # cProfile.Profile, one per worker thread
+        self._timings: List[Tuple[str, PhaseTimings]] = []
+        self.enabled = False
+
+    def start(self) -> None:
+        self.enabled = True
+
+    @contextlib.contextmanager
+    def thread(self):
+        """Profile the calling thread for the duration of the block, if enabled."""
+        if not self.enabled:
+            yield
+            return
+        import cProfile   # only with --profile; not worth loading at launch
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self._profiles.append(profile)
+
+    def record(self, name: str, timings: PhaseTimings) -> None:
+        if self.enabled:
+            with self._lock:
+                self._timings.append((name, timings))
+
+    def dump(self, path: Union[str, Path]) -> Optional[Path]:
+        """Write merged cProfile stats to `path` and phase stacks to `path`.folded."""
+        import pstats
+        with self._lock:
+            profiles, timings = list(self._profiles), list(self._timings)
+        if not profiles:
+            return None
+        path = Path(path)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(str(path))
+        with open(f"{path}.folded", "w") as f:
+            for name, phases in timings:
+                stack = (name or "unknown").replace(";", "_").replace(" ", "_")
+                for phase in PHASES:
+                    micros = int(phases.seconds[phase] * 1e6)
+                    if micros:
+                        f.write(f"{stack};{phase} {micros}\n")
+        return path
+
+
+# Globals
+PROFILER = BatchProfiler()
+
+
+# Functions
+def timings_enabled() -> bool:
+    return bool(RUNTIME_CONFIG["interface"].get("detailed_logging"))
+
+
+def new_timings():
+    """A PhaseTimings when detailed_logging is on, NO_TIMINGS otherwise."""
+    return PhaseTimings() if timings_enabled() else NO_TIMINGS
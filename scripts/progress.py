@@ -0,0 +1,274 @@
+# Script: `.\scripts\progress.py`
+
+# Imports
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+# ── Progress registry ────────────────────────────────────────────────────────
+# ACTIVE_DOWNLOADS used to be a plain list of plain dicts.  The download thread
+# mutated a dict with .update() once per chunk while the display thread walked
+# the list and read the same dict key by key, with nothing in between -- so a
+# refresh could pair the new `current` with the old `total` (progress briefly
+# over 100%), and a download finishing mid-refresh changed the list under the
+# reader's iterator.  get_active_downloads then rebuilt every dict from scratch
+# with a dozen .get() calls per refresh.
+#
+# Now each transfer owns one fixed-layout ProgressRecord (__slots__, no
+# per-instance dict).  Exactly one thread -- the one doing the download --
+# writes to it, and it brackets every multi-field write with a sequence counter
+# (a seqlock): odd while a write is in progress, even when it is consistent.  A
+# reader copies the fields, re-checks the counter, and retries on the rare
+# collision, so it never takes a lock and never sees a torn update.
+#
+# The registry itself is copy-on-write: add/remove swap in a new tuple under a
+# lock (a handful of times per download), and readers simply iterate whatever
+# tuple they picked up.  Records are keyed by the resolved output path, not
+# the file name: two jobs for `model.bin` into different folders are two
+# transfers, and two for the same file must not both be writing it -- claim()
+# admits a record only if no live one holds its path.  The TUI, logs and anything else that wants progress
+# read the same records through snapshot().
+#
+# Speed used to be len(last_chunk) / time_since_previous_chunk, so it swung by
+# an order of magnitude between refreshes, and the ETA divided by it.  Each
+# record now carries a RateEstimator fed from its cumulative byte counter:
+#   rate         exponentially weighted moving average (half-life below)
+#   window_rate  plain bytes/second over the last RATE_WINDOW seconds -- the
+#                ETA uses this; it is what "recently" means to a human
+#   average      session bytes / session time
+#   peak         highest smoothed rate seen, so one burst is not "peak"
+# Only bytes received in THIS session are counted.  A resumed 40 GB download
+# with 39 GB already on disk used to report its average as (40 GB - start) /
+# elapsed in one place and 40 GB / elapsed in another.
+# Sampling is time-gated, so the per-chunk cost is an add and a compare however
+# small the chunks get; and because it works off a cumulative counter it does
+# not care how many connections or segments feed that counter.
+
+RATE_SAMPLE_INTERVAL = 0.5   # seconds between estimator samples
+RATE_HALF_LIFE = 5.0         # seconds for the EWMA to forget half of the past
+RATE_WINDOW = 30.0           # seconds covered by window_rate
+
+
+# Classes
+class RateEstimator:
+    """Smoothed throughput for one download session."""
+
+    __slots__ = (
+        "session_start",
+        "session_bytes",
+        "rate",
+        "window_rate",
+        "average",
+        "peak",
+        "_samples",
+        "_last_time",
+        "_last_bytes",
+    )
+
+    def __init__(self, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.session_start = now
+        self.session_bytes = 0
+        self.rate = 0.0
+        self.window_rate = 0.0
+        self.average = 0.0
+        self.peak = 0.0
+        self._samples = deque([(now, 0)])
+        self._last_time = now
+        self._last_bytes = 0
+
+    def add(self, received: int, now: float) -> None:
+        """Count `received` new bytes; resample if RATE_SAMPLE_INTERVAL has passed."""
+        self.session_bytes += received
+        dt = now - self._last_time
+        if dt < RATE_SAMPLE_INTERVAL:
+            return
+        instant = (self.session_bytes - self._last_bytes) / dt
+        if self.rate == 0.0:
+            self.rate = instant
+        else:
+            weight = 1.0 - 0.5 ** (dt / RATE_HALF_LIFE)
+            self.rate += weight * (instant - self.rate)
+        self._last_time = now
+        self._last_bytes = self.session_bytes
+
+        samples = self._samples
+        samples.append((now, self.session_bytes))
+        # Keep one sample at or beyond the window edge so the span is full.
+        while len(samples) > 2 and samples[1][0] <= now - RATE_WINDOW:
+            samples.popleft()
+        first_time, first_bytes = samples[0]
+        if now > first_time:
+            self.window_rate = (self.session_bytes - first_bytes) / (now - first_time)
+        self.average = self.session_bytes / (now - self.session_start)
+        if self.rate > self.peak:
+            self.peak = self.rate
+
+    def summary(self, now: Optional[float] = None) -> Tuple[float, float, int]:
+        """(average, peak, session_bytes) as of `now`, for summaries and history."""
+        now = time.time() if now is None else now
+        elapsed = now - self.session_start
+        average = self.session_bytes / elapsed if elapsed > 0 else 0.0
+        return average, max(self.peak, self.rate, average), self.session_bytes
+
+
+class ProgressRecord:
+    """Live progress for one transfer.  Written only by its download thread."""
+
+    __slots__ = (
+        "filename",
+        "path",
+        "url",
+        "status",
+        "resume_status",
+        "total",
+        "current",
+        "rate",
+        "start_time",
+        "last_chunk_time",
+        "batch_index",
+        "batch_total",
+        "wake_at",
+        "_seq",
+    )
+
+    def __init__(self, filename: str, path: str = "", url: str = "", total: int = 0, current: int = 0,
+                 start_time: Optional[float] = None, batch_index: Optional[int] = None,
+                 batch_total: Optional[int] = None):
+        now = time.time()
+        self.filename = filename
+        self.path = path or filename
+        self.url = url
+        self.status = "connecting"
+        self.resume_status = "Pending"
+        self.total = total
+        self.current = current
+        self.rate = RateEstimator(now)
+        self.start_time = start_time if start_time is not None else now
+        self.last_chunk_time = now
+        self.batch_index = batch_index
+        self.batch_total = batch_total
+        self.wake_at = None   # set while status is "waiting" (scheduler backoff)
+        self._seq = 0
+
+    def update(self, **fields) -> None:
+        """Set several fields as one consistent write."""
+        self._seq += 1
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self._seq += 1
+
+    def advance(self, current: int, total: int, received: int, now: float) -> None:
+        """Record a chunk landing on disk.  This is the per-chunk hot path."""
+        self._seq += 1
+        self.current = current
+        self.total = total
+        self.status = "downloading"
+        self.rate.add(received, now)
+        self.last_chunk_time = now
+        self._seq += 1
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """Consistent copy of this record, with elapsed/remaining derived."""
+        while True:
+            seq = self._seq
+            if seq & 1:
+                time.sleep(0)   # writer is mid-update; let it finish
+                continue
+            rate = self.rate
+            values = (self.filename, self.url, self.status, self.resume_status,
+                      self.total, self.current, rate.rate, rate.window_rate,
+                      rate.average, rate.peak, rate.session_bytes, self.start_time,
+                      self.batch_index, self.batch_total, self.wake_at)
+            if self._seq == seq:
+                break
+        (filename, url, status, resume_status, total, current, speed, window_speed,
+         average_speed, peak_speed, session_bytes, start_time, batch_index, batch_total,
+         wake_at) = values
+        now = time.time() if now is None else now
+        # ETA from the windowed rate, which moves slowest; the EWMA stands in
+        # until the first window has filled.
+        eta_speed = window_speed or speed
+        return {
+            'filename': filename,
+            'url': url,
+            'status': status,
+            'current': current,
+            'total': total,
+            'speed': speed,
+            'average_speed': average_speed,
+            'peak_speed': peak_speed,
+            'session_bytes': session_bytes,
+            'elapsed': now - start_time,
+            'remaining': (total - current) / eta_speed if eta_speed > 0 and total > current else 0,
+            'batch_index': batch_index,
+            'batch_total': batch_total,
+            'resume_status': resume_status,
+            'waiting_until': wake_at
+        }
+
+
+class ProgressRegistry:
+    """The set of live transfers.  Copy-on-write, so readers never lock."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = ()
+        self._retired_bytes = Counter()   # host -> bytes of records already removed
+
+    def add(self, record: ProgressRecord) -> None:
+        with self._lock:
+            if record not in self._records:
+                self._records = self._records + (record,)
+
+    def remove(self, record: ProgressRecord) -> None:
+        with self._lock:
+            if any(r is record for r in self._records):
+                self._retired_bytes[_host(record.url)] += record.rate.session_bytes
+            self._records = tuple(r for r in self._records if r is not record)
+
+    def bytes_by_host(self) -> Dict[str, int]:
+        """Bytes received per host since start: finished transfers plus live ones."""
+        with self._lock:
+            totals = Counter(self._retired_bytes)
+            records = self._records
+        for record in records:
+            totals[_host(record.url)] += record.rate.session_bytes
+        return dict(totals)
+
+    def find(self, path: str) -> Optional[ProgressRecord]:
+        for record in self._records:
+            if record.path == path:
+                return record
+        return None
+
+    def claim(self, record: ProgressRecord) -> Optional[ProgressRecord]:
+        """Add `record` unless another live one has its path; return that one if so."""
+        with self._lock:
+            for other in self._records:
+                if other.path == record.path and other is not record:
+                    return other
+            if record not in self._records:
+                self._records = self._records + (record,)
+        return None
+
+    def snapshot(self) -> List[Dict]:
+        """Consistent copies of every live record, all taken at the same `now`."""
+        now = time.time()
+        return [record.snapshot(now) for record in self._records]
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, record) -> bool:
+        return any(r is record for r in self._records)
+
+
+# Functions
+def _host(url: str) -> str:
+    return urlparse(url or "").netloc.lower() or "unknown"
@@ -0,0 +1,117 @@
+# Script: `.\scripts\resume.py`
+
+# Imports
+import json
+import os
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from .temporary import RUNTIME_CONFIG
+
+# ── Resume validation ────────────────────────────────────────────────────────
+# A resume used to trust that the .part was a prefix of whatever the URL
+# serves now.  A file replaced on the server between sessions was noticed only
+# if the fresh probe happened to report another size; same size, new content,
+# and the two versions were spliced together without a word.
+#
+# Now the version a .part was started from is kept beside it, in
+# `name.part.validator`: the strong ETag and Last-Modified of the response
+# that delivered byte 0, and the total size.  Every resume sends
+#
+#   If-Range: <that ETag, or else that Last-Modified>
+#
+# with its Range, so a server whose file changed answers 200 with the new
+# file in the same round trip; _resolve_response_mode sees the new validator,
+# reports "Changed", and the .part is rewritten from byte 0 with that body.
+# A 200 carrying the OLD validator is still what it always was: a server that
+# ignores Range.
+#
+# Validators are only as good as the server's.  So, in addition, a resume
+# asks for RUNTIME_CONFIG["download"]["tail_check"] bytes (64 KB) BEFORE the
+# end of the .part and compares them with the local tail; a mismatch
+# ("Changed" again) discards the .part and starts over.  That costs 64 KB per
+# resume and no extra request, and it also covers partials left by older
+# versions that have no validator.
+
+
+VALIDATOR_SUFFIX = ".validator"
+
+
+# Functions
+def validator_path(part_path: Path) -> Path:
+    return part_path.with_name(part_path.name + VALIDATOR_SUFFIX)
+
+
+def save_validator(part_path: Path, headers: Mapping[str, str], total_size: int) -> None:
+    """Record the version a fresh .part is being filled from."""
+    etag = headers.get("ETag") or ""
+    data = {"etag": "" if etag.startswith("W/") else etag,   # weak ETags cannot be used in If-Range
+            "last_modified": headers.get("Last-Modified") or "",
+            "size": total_size}
+    path = validator_path(part_path)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def load_validator(part_path: Path) -> Optional[Dict]:
+    try:
+        with open(validator_path(part_path), "r") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def move_validator(part_path: Path, new_part_path: Path) -> None:
+    """Take the sidecar along when a .part is renamed."""
+    try:
+        os.replace(validator_path(part_path), validator_path(new_part_path))
+    except OSError:
+        pass
+
+
+def discard_validator(part_path: Path) -> None:
+    try:
+        validator_path(part_path).unlink()
+    except OSError:
+        pass
+
+
+def if_range(validator: Optional[Dict]) -> Optional[str]:
+    """The If-Range value for a resume: the strong ETag, else Last-Modified."""
+    if not validator:
+        return None
+    return validator.get("etag") or validator.get("last_modified") or None
+
+
+def same_version(validator: Optional[Dict], headers: Mapping[str, str]) -> Optional[bool]:
+    """Whether a response is the version the .part was started from; None if it cannot tell."""
+    if not validator:
+        return None
+    etag = headers.get("ETag") or ""
+    if validator.get("etag") and etag and not etag.startswith("W/"):
+        return etag == validator["etag"]
+    modified = headers.get("Last-Modified")
+    if validator.get("last_modified") and modified:
+        return modified == validator["last_modified"]
+    return None
+
+
+def tail_overlap(existing_size: int) -> int:
+    """How many bytes before the end of the .part to fetch again and compare."""
+    return max(0, min(int(RUNTIME_CONFIG["download"].get("tail_check") or 0), existing_size))
+
+
+def tail_matches(part_path: Path, offset: int, data: bytes) -> bool:
+    """Whether the .part holds exactly `data` at `offset`."""
+    try:
+        with open(part_path, "rb") as f:
+            f.seek(offset)
+            return f.read(len(data)) == data
+    except OSError:
+        return False
@@ -0,0 +1,315 @@
+# Script: `.\scripts\scheduler.py`
+
+# Imports
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from .cancel import AbortEvent
+from .events import emit
+from .profiling import PROFILER
+from .temporary import ACTIVE_DOWNLOADS, SCHEDULER_SETTINGS
+
+# ── Scheduler ────────────────────────────────────────────────────────────────
+# Decides which transfers run when more than one is wanted: menu batches
+# (handle_multiple_downloads), `launcher.py get --parallel N`, and the daemon.
+# handle_multiple_downloads used to walk its list in order, one file at a time,
+# and stop at the first failure.
+#
+#   priority     higher first; equal priorities keep submission order
+#   max_parallel global cap on running transfers
+#   per_host     cap per hostname, so one slow mirror cannot take every slot
+#   fairness     among equal priorities, the host with the fewest running jobs
+#                wins, then the host served least recently -- round-robin, so
+#                a 40-file batch from one host does not starve a single file
+#                from another
+#   preemption   when every slot is busy and a job arrives that outranks a
+#                running one, the lowest-priority running job has its abort
+#                event set.  download_file stops mid-chunk exactly as for the
+#                Abandon key (scripts/cancel.py), keeps its .part, and the job
+#                goes back in the queue to resume later
+#   parking      a job that raises RetryLater (HTTP 429 with Retry-After) comes
+#                back after the delay, and with host_wide set every job for
+#                that host waits too -- no thread sleeps through it, and other
+#                hosts carry on
+#   one writer   a job submitted with `key` (its output path, when the caller
+#                knows it) does not start while another job with that key is
+#                running or backing off -- two of them would share one .part.
+#                download_file claims the path itself as well (see
+#                scripts/progress.py), for names that are only known after
+#                the probe
+#
+# `run(job)` does the work on a thread of the scheduler's own and returns any
+# result; it must watch `job.abort` (and may honour `job.pause`).  A job is
+# finished once `job.done` is set.
+#
+# Backoff is the scheduler's too.  download_file's retry paths and the probe in
+# get_remote_file_info used to time.sleep() on the download thread -- the
+# probe up to 10 s per attempt, the body retries up to 30 s, a 429 up to
+# RETRY_STRATEGY["max_delay"] (300 s) -- and in a batch every later file
+# waited behind that.  Under a scheduler they raise RetryLater instead; the job
+# leaves the running set, its wake-up time goes on a heap, and the dispatcher
+# sleeps until the earliest one is due.  What a retry has to remember (attempt
+# counts, whether the server refused ranges) lives in `job.retry_state`, which
+# survives re-runs, and current_job() tells code deep in the engine whether it
+# is running under a scheduler at all.
+
+
+_local = threading.local()
+
+
+# Classes
+class RetryLater(Exception):
+    """Raised by a job that should be re-run after `delay` seconds, not failed."""
+
+    def __init__(self, delay: float, reason: str = "", host_wide: bool = False):
+        super().__init__(reason or f"retry in {delay:.0f}s")
+        self.delay = max(0.0, float(delay))
+        self.reason = reason
+        self.host_wide = host_wide
+
+
+class ScheduledJob:
+    """One unit of work.  `payload` is whatever the caller needs in run()."""
+
+    __slots__ = ("url", "host", "priority", "payload", "seq", "key", "abort", "pause", "state",
+                 "result", "error", "wake_at", "preempted", "done", "retry_state")
+
+    def __init__(self, url: str, priority: int, payload: Any, seq: int, key: Optional[str] = None):
+        self.url = url
+        self.host = urlparse(url).netloc.lower()   # host:port
+        self.priority = priority
+        self.payload = payload
+        self.seq = seq
+        self.key = key                   # output path; one job per key at a time
+        self.abort = AbortEvent()
+        self.pause = threading.Event()   # a warm pause; see scripts/cancel.py
+        self.state = "queued"        # queued / running / waiting / done / cancelled
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.wake_at = 0.0
+        self.preempted = False
+        self.done = threading.Event()
+        self.retry_state: Dict[str, Any] = {}   # kept across re-runs; see download_file
+
+
+class Scheduler:
+    """Priority queue with global and per-host caps, fairness and preemption."""
+
+    def __init__(self, run: Callable[[ScheduledJob], Any],
+                 max_parallel: int = SCHEDULER_SETTINGS["max_parallel"],
+                 per_host: int = SCHEDULER_SETTINGS["per_host"],
+                 preempt: bool = SCHEDULER_SETTINGS["preempt"],
+                 on_done: Optional[Callable[[ScheduledJob], None]] = None):
+        self.run = run
+        self.on_done = on_done
+        self.max_parallel = max(1, int(max_parallel))
+        self.per_host = max(1, int(per_host))
+        self.preempt = preempt
+        # Re-entrant: on_done callbacks may call back into the scheduler.
+        self._cond = threading.Condition(threading.RLock())
+        self._seq = itertools.count()
+        self._pending: List[ScheduledJob] = []
+        self._running: List[ScheduledJob] = []
+        self._waiting: List[ScheduledJob] = []   # backing off until job.wake_at
+        self._timers: List = []                  # heap of (when, seq, job or None)
+        self._timer_seq = itertools.count()
+        self._host_running = Counter()
+        self._host_served: Dict[str, int] = {}
+        self._host_parked: Dict[str, float] = {}
+        self._served = itertools.count(1)
+        self._stopping = False
+        from .metrics import METRICS   # http.server; not needed until something is scheduled
+        METRICS.track(self)
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+
+    # Public API
+    def submit(self, url: str, priority: int = 0, payload: Any = None,
+               key: Optional[str] = None) -> ScheduledJob:
+        with self._cond:
+            job = ScheduledJob(url, int(priority), payload, next(self._seq), key)
+            self._pending.append(job)
+            self._cond.notify_all()
+        return job
+
+    def cancel(self, job: ScheduledJob) -> None:
+        """Drop a queued job, or stop a running one (its read in flight is interrupted)."""
+        with self._cond:
+            if job in self._pending or job in self._waiting:
+                (self._pending if job in self._pending else self._waiting).remove(job)
+                self._finish(job, "cancelled")
+            elif job in self._running:
+                job.state = "cancelled"
+                job.abort.set()
+
+    def reprioritise(self, job: ScheduledJob, priority: int) -> None:
+        with self._cond:
+            job.priority = int(priority)
+            self._cond.notify_all()
+
+    def park_host(self, host: str, seconds: float) -> None:
+        with self._cond:
+            self._park(host, time.time() + seconds)
+            self._cond.notify_all()
+
+    def stop(self) -> None:
+        """Stop everything: queued jobs are dropped, running ones aborted.
+
+        Also what a finished batch calls to let the dispatcher thread exit.
+        """
+        with self._cond:
+            self._stopping = True
+            for job in self._pending + self._waiting:
+                self._finish(job, "cancelled")
+            self._pending = []
+            self._waiting = []
+            for job in self._running:
+                job.abort.set()
+            self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until nothing is queued or running.  False on timeout."""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._pending or self._running or self._waiting:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 0.5)
+        return True
+
+    def snapshot(self) -> List[Dict]:
+        """State of every job the scheduler still holds, for displays and the API."""
+        with self._cond:
+            return [{
+                'url': job.url,
+                'host': job.host,
+                'priority': job.priority,
+                'state': job.state,
+                'wake_at': max(job.wake_at, self._host_parked.get(job.host, 0.0)) or None
+            } for job in self._running + self._waiting + sorted(self._pending, key=self._order)]
+
+    # Internals
+    def _order(self, job: ScheduledJob):
+        return (-job.priority, self._host_running[job.host],
+                self._host_served.get(job.host, 0), job.seq)
+
+    def _runnable(self, job: ScheduledJob, now: float) -> bool:
+        return (self._host_parked.get(job.host, 0.0) <= now
+                and self._host_running[job.host] < self.per_host
+                and not (job.key is not None
+                         and any(j.key == job.key for j in self._running + self._waiting)))
+
+    def _park(self, host: str, until: float) -> None:
+        if until > self._host_parked.get(host, 0.0):
+            self._host_parked[host] = until
+            heapq.heappush(self._timers, (until, next(self._timer_seq), None))
+
+    def _fire_timers(self, now: float) -> Optional[float]:
+        """Wake every job that is due; return when the next timer fires, if any."""
+        while self._timers and self._timers[0][0] <= now:
+            _, _, job = heapq.heappop(self._timers)
+            if job is not None and job in self._waiting:   # else cancelled meanwhile
+                self._waiting.remove(job)
+                job.state = "queued"
+                self._pending.append(job)
+        return self._timers[0][0] if self._timers else None
+
+    def _dispatch(self) -> None:
+        with self._cond:
+            while not self._stopping:
+                now = time.time()
+                wake = self._fire_timers(now)
+                runnable = sorted((j for j in self._pending if self._runnable(j, now)), key=self._order)
+                if runnable and len(self._running) < self.max_parallel:
+                    self._start(runnable[0])
+                    continue
+                if runnable and self.preempt:
+                    self._maybe_preempt(runnable[0])
+                self._cond.wait(None if wake is None else max(0.05, wake - now))
+
+    def _maybe_preempt(self, candidate: ScheduledJob) -> None:
+        victims = [j for j in self._running if not j.preempted and not j.abort.is_set()]
+        if not victims:
+            return
+        victim = min(victims, key=lambda j: (j.priority, -j.seq))
+        if victim.priority < candidate.priority:
+            victim.preempted = True
+            victim.abort.set()
+            emit("preempted", url=victim.url, priority=victim.priority,
+                 by=candidate.url, by_priority=candidate.priority)
+
+    def _start(self, job: ScheduledJob) -> None:
+        self._pending.remove(job)
+        self._running.append(job)
+        self._host_running[job.host] += 1
+        self._host_served[job.host] = next(self._served)
+        job.state = "running"
+        threading.Thread(target=self._execute, args=(job,), daemon=True).start()
+
+    def _execute(self, job: ScheduledJob) -> None:
+        retry = None
+        _local.job = job
+        try:
+            with PROFILER.thread():   # no-op unless --profile
+                job.result = self.run(job)
+        except RetryLater as e:
+            retry = e
+        except Exception as e:
+            job.error = e
+        finally:
+            _local.job = None
+        with self._cond:
+            self._running.remove(job)
+            self._host_running[job.host] -= 1
+            if self._stopping or job.state == "cancelled":
+                self._finish(job, "cancelled")
+            elif retry is not None:
+                job.wake_at = time.time() + retry.delay
+                if retry.host_wide:
+                    self._park(job.host, job.wake_at)
+                self._requeue(job, "waiting")
+                self._pending.remove(job)
+                self._waiting.append(job)
+                heapq.heappush(self._timers, (job.wake_at, next(self._timer_seq), job))
+                emit("waiting", url=job.url, host=job.host, seconds=round(retry.delay, 1),
+                     until=round(job.wake_at, 3), reason=retry.reason, host_wide=retry.host_wide)
+            elif job.preempted:
+                self._requeue(job, "queued")
+            else:
+                self._finish(job, "done")
+            self._cond.notify_all()
+
+    def _requeue(self, job: ScheduledJob, state: str) -> None:
+        # Fresh ones: download_file hooks the read's interrupt onto
+        # AbortEvent.on_set, and a pause belongs to the run it stopped.
+        job.abort = AbortEvent()
+        job.pause = threading.Event()
+        job.preempted = False
+        job.state = state
+        self._pending.append(job)
+
+    def _finish(self, job: ScheduledJob, state: str) -> None:
+        job.state = state
+        # A job dropped while backing off still has its "waiting" progress
+        # record on show; download_file left it there for the next attempt.
+        record = job.retry_state.pop("record", None)
+        if record is not None:
+            ACTIVE_DOWNLOADS.remove(record)
+        job.done.set()
+        if self.on_done is not None:
+            try:
+                self.on_done(job)
+            except Exception:
+                pass
+
+
+# Functions
+def current_job() -> Optional[ScheduledJob]:
+    """The job this thread is running for a Scheduler, or None outside one."""
+    return getattr(_local, "job", None)
@@ -0,0 +1,148 @@
+# Script: `.\scripts\shards.py`
+
+# Imports
+import posixpath
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote, urljoin, urlsplit, urlunsplit
+
+from .events import emit
+from .preflight import checked, probe_header
+from .temporary import DEFAULT_HEADERS, RUNTIME_CONFIG
+
+# ── Sharded models ───────────────────────────────────────────────────────────
+# Big models come as model-00001-of-00009.safetensors ... plus
+# model.safetensors.index.json, or as GGUF splits (model-00001-of-00003.gguf),
+# and used to take one pasted URL per shard.
+#
+# expand_shards() turns either kind of URL into the whole set:
+#   - an index (*.safetensors.index.json, *.bin.index.json) is fetched and
+#     every file in its weight_map is taken, resolved beside it, index first;
+#   - a shard name NNNNN-of-MMMMM becomes all MMMMM shards with the same
+#     padding and query string, plus the index beside them if there is one.
+# Every other URL passes through untouched.
+#
+# Before anything is queued, each shard's header is range-fetched and checked
+# (scripts/preflight.py) over one keep-alive session, so a 404, a login page
+# or a truncated upload among nine shards is reported in seconds instead of
+# after the other eight have downloaded.  The batch then runs on the usual
+# Scheduler: several shards at once, within the per-host limit.
+#
+# `launcher.py get --no-expand` (and a URL that is not a shard) downloads
+# exactly what was given.
+
+SHARD_NAME = re.compile(r"^(?P<stem>.+)-(?P<index>\d+)-of-(?P<count>\d+)(?P<suffix>\.[A-Za-z0-9]+)$")
+INDEX_SUFFIXES = (".safetensors.index.json", ".bin.index.json")
+MAX_SHARDS = 10000
+
+
+# Functions
+def url_filename(url: str) -> str:
+    return unquote(posixpath.basename(urlsplit(url).path))
+
+
+def sibling_url(url: str, name: str) -> str:
+    """`url` with its last path segment replaced by `name`, query string kept."""
+    parts = urlsplit(url)
+    return urlunsplit(parts._replace(path=urljoin(parts.path, quote(name))))
+
+
+def sharded(url: str) -> bool:
+    """Whether expand_shards() turns `url` into a set of files; by its name alone."""
+    name = url_filename(url)
+    return name.lower().endswith(INDEX_SUFFIXES) or _shard_match(name) is not None
+
+
+def shard_set(url: str, session=None) -> Optional[List[str]]:
+    """Every file of the sharded model `url` belongs to, index first; None if it is not one."""
+    name = url_filename(url)
+    if name.lower().endswith(INDEX_SUFFIXES):
+        return [url] + [sibling_url(url, f) for f in _index_files(url, session)]
+    match = _shard_match(name)
+    if not match:
+        return None
+    count, width = int(match.group("count")), len(match.group("index"))
+    stem, suffix = match.group("stem"), match.group("suffix")
+    shards = [sibling_url(url, f"{stem}-{i:0{width}d}-of-{match.group('count')}{suffix}")
+              for i in range(1, count + 1)]
+    index = sibling_url(url, f"{stem}{suffix}.index.json")
+    if suffix.lower() in (".safetensors", ".bin") and _exists(index, session):
+        shards.insert(0, index)
+    return shards
+
+
+def expand_shards(urls: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """`urls` with sharded models expanded; returns them and {url: problem} for bad shards.
+
+    Shards with a problem are left out of the list.
+    """
+    from .transport import get_transport
+
+    expanded: List[str] = []
+    problems: Dict[str, str] = {}
+    with get_transport().session() as session:
+        for url in urls:
+            try:
+                files = shard_set(url, session)
+            except ValueError as e:
+                problems[url] = str(e)
+                continue
+            if files is None:
+                expanded.append(url)
+                continue
+            print(f"{url_filename(url)}: sharded model, {len(files)} files.")
+            bad = 0
+            for file_url in files:
+                if file_url in expanded:
+                    continue
+                name = url_filename(file_url)
+                problem = probe_header(file_url, name, session) if checked(name) else None
+                if problem:
+                    problems[file_url] = problem
+                    bad += 1
+                    print(f"  {name}: {problem}")
+                else:
+                    expanded.append(file_url)
+            emit("shards", url=url, files=len(files), bad=bad)
+    return expanded, problems
+
+
+def _shard_match(name: str):
+    """SHARD_NAME's match for `name` if it is a plausible NNNNN-of-MMMMM shard, else None."""
+    match = SHARD_NAME.match(name)
+    if not match:
+        return None
+    count = int(match.group("count"))
+    if not 1 < count <= MAX_SHARDS or int(match.group("index")) > count:
+        return None
+    return match
+
+
+def _index_files(url: str, session=None) -> List[str]:
+    """The distinct files of an index's weight_map, in order."""
+    from requests.exceptions import RequestException
+    from .transport import get_transport
+
+    try:
+        response = (session or get_transport()).get(
+            url, headers=DEFAULT_HEADERS.copy(), timeout=RUNTIME_CONFIG["download"]["timeout"])
+        response.raise_for_status()
+        weight_map = response.json()["weight_map"]
+        files = list(dict.fromkeys(weight_map.values()))
+    except (RequestException, ValueError, KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"unreadable shard index: {e}")
+    if not files or not all(isinstance(f, str) and f and "/" not in f and f != ".." for f in files):
+        raise ValueError("the shard index lists no usable file names")
+    return files
+
+
+def _exists(url: str, session=None) -> bool:
+    from requests.exceptions import RequestException
+    from .transport import get_transport
+
+    try:
+        response = (session or get_transport()).head(
+            url, headers=DEFAULT_HEADERS.copy(), allow_redirects=True, timeout=10)
+        return response.status_code == 200
+    except RequestException:
+        return False
@@ -0,0 +1,194 @@
+# Script: `.\scripts\store.py`
+
+# Imports
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from .extract import PartFollower
+from .temporary import CONTENT_TYPES, RUNTIME_CONFIG, STORE_DIRNAME
+
+# ── Content store ────────────────────────────────────────────────────────────
+# RUNTIME_CONFIG["storage"]["content_store"] (`launcher.py get --dedupe`).
+# The same model files kept being downloaded again under other names.  With
+# the store on, every completed download is identified by its SHA-256 and kept
+# once, in <downloads>/.store/objects/ab/abcdef...; the requested name is a
+# link to that object.  Before a download starts, DownLord looks the file up --
+# by the expected SHA-256 when one is given (`get --sha256`), otherwise by
+# size + strong ETag from the probe -- and links the stored copy instead of
+# fetching it.
+#
+# The hash is computed while downloading by a StreamingHasher, a PartFollower
+# (scripts/extract.py) that reads the .part as it grows -- off the download
+# thread, from the page cache, and from byte 0 so a resumed download needs no
+# saved hash state.  `get --sha256` verification reuses it instead of reading
+# the file a second time.
+#
+# Links are reflinks where the filesystem can clone (btrfs, XFS: independent
+# copy-on-write files), else hard links (one inode: editing one edits all),
+# else plain copies.  The store lives inside the downloads location, so it is
+# always on the same filesystem as the names that point into it.
+#
+# RUNTIME_CONFIG["storage"]["organize_by_type"] additionally links each
+# completed file into a folder for its CONTENT_TYPES group (model/, archive/,
+# video/...).  The file at its requested name stays where the 9-slot menu
+# looks for it.
+
+FICLONE = 0x40049409   # linux/fs.h _IOW(0x94, 9, int)
+
+
+# Classes
+class StreamingHasher(PartFollower):
+    """SHA-256 of a download, computed from its growing .part file."""
+
+    def __init__(self, part_path: Path):
+        super().__init__(part_path)
+        self.digest: Optional[str] = None
+
+    def consume(self, source) -> None:
+        digest = hashlib.sha256()
+        for block in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(block)
+        self.digest = digest.hexdigest()
+
+
+class ContentStore:
+    """SHA-256-addressed objects under <downloads>/.store, with a small JSON index."""
+
+    _lock = threading.Lock()   # one index file per store; the daemon has many threads
+
+    def __init__(self, downloads_location: Path):
+        self.root = Path(downloads_location) / STORE_DIRNAME
+        self.index_path = self.root / "index.json"
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / sha256[:2] / sha256
+
+    def lookup(self, sha256: Optional[str] = None, size: int = 0,
+               etag: Optional[str] = None) -> Optional[Path]:
+        """A stored object matching the hash, or the size + strong ETag; None if absent."""
+        index = self._load()
+        candidates = []
+        if sha256:
+            candidates.append(sha256.lower())
+        elif size > 0 and etag and not etag.startswith("W/"):
+            candidates.extend(sha for sha, entry in index.items()
+                              if entry.get("size") == size and etag in entry.get("etags", []))
+        for sha in candidates:
+            path = self.object_path(sha)
+            entry = index.get(sha)
+            if entry and path.is_file() and path.stat().st_size == entry.get("size"):
+                return path
+        return None
+
+    def add(self, path: Path, sha256: str, url: str = "", etag: Optional[str] = None) -> Path:
+        """Take a completed file into the store; `path` ends up a link to the object."""
+        obj = self.object_path(sha256)
+        size = path.stat().st_size
+        with self._lock:
+            if obj.is_file() and obj.stat().st_size == size:
+                if not _same_file(obj, path):
+                    link_file(obj, path)           # a duplicate: keep one copy
+            else:
+                obj.parent.mkdir(parents=True, exist_ok=True)
+                link_file(path, obj)
+            index = self._load()
+            entry = index.setdefault(sha256, {"size": size, "urls": [], "etags": [], "names": []})
+            for key, value in (("urls", url), ("etags", etag), ("names", path.name)):
+                if value and value not in entry[key]:
+                    entry[key].append(value)
+            self._save(index)
+        return obj
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, index: Dict[str, Dict]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(f"index.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)
+
+
+# Functions
+def content_store_enabled() -> bool:
+    return bool(RUNTIME_CONFIG["storage"].get("content_store"))
+
+
+def organize_enabled() -> bool:
+    return bool(RUNTIME_CONFIG["storage"].get("organize_by_type"))
+
+
+def type_folder(filename: str) -> Optional[str]:
+    """The CONTENT_TYPES group of a filename ("model", "archive"...), by suffix."""
+    lower = filename.lower()
+    for group, suffixes in CONTENT_TYPES.items():
+        if lower.endswith(tuple(suffixes)):
+            return group
+    return None
+
+
+def organize(path: Path, downloads_location: Path) -> Optional[Path]:
+    """Link `path` into <downloads>/<type>/; returns the new name, or None if untyped."""
+    group = type_folder(path.name)
+    if group is None:
+        return None
+    target = Path(downloads_location) / group / path.name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if not (target.exists() and _same_file(target, path)):
+        link_file(path, target)
+    return target
+
+
+def link_file(src: Path, dst: Path) -> str:
+    """Make `dst` the same content as `src`: reflink, hard link or copy.  Returns which."""
+    staging = dst.with_name(f".{dst.name}.link")
+    try:
+        staging.unlink()
+    except OSError:
+        pass
+    how = "copy"
+    if _reflink(src, staging):
+        how = "reflink"
+    else:
+        try:
+            os.link(src, staging)
+            how = "hardlink"
+        except OSError:
+            shutil.copyfile(src, staging)
+    os.replace(staging, dst)
+    return how
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+        return True
+    except OSError:
+        # EOPNOTSUPP / ENOTTY / EXDEV / EINVAL: no cloning here; fall back.
+        try:
+            dst.unlink()
+        except OSError:
+            pass
+        return False
+
+
+def _same_file(a: Path, b: Path) -> bool:
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
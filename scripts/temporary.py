@@ -5,12 +5,14 @@ import os
 import re
 import sys
 import threading
-import platform as _platform
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Union
 from urllib.parse import unquote
 
+from .cancel import AbortEvent
+from .progress import ProgressRegistry
+
 # Application Metadata
 APP_TITLE = "DownLord"
 
@@ -24,7 +26,24 @@ PLATFORM = "None"
 # use this, not PLATFORM -- PLATFORM is still "None" while `scripts.manage` is
 # being imported if no argv was supplied, which used to make Windows try to
 # `import termios` and crash before the launcher ever ran.
-IS_WINDOWS = _platform.system().lower().startswith("win") or os.name == "nt"
+# (sys.platform, not platform.system(): same answer, without importing the
+# platform module on every launch.)
+IS_WINDOWS = sys.platform.startswith("win") or os.name == "nt"
+
+# HEADLESS is set by launcher.py when argv[1] is one of CLI_COMMANDS rather than
+# a platform name.  No menus, no screen clears, no "read this" pauses -- see
+# scripts/headless.py.
+HEADLESS = False
+CLI_COMMANDS = ("get", "daemon", "queue", "manifest", "zip")
+
+# Process exit codes for headless runs, so cron/CI can branch on the outcome.
+EXIT_CODES = {
+    "ok": 0,
+    "failed": 1,       # at least one download did not complete
+    "usage": 2,        # bad arguments (argparse also uses 2)
+    "checksum": 3,     # downloaded, but --sha256 did not match
+    "interrupted": 130
+}
 
 
 def platform_name() -> str:
@@ -39,9 +58,19 @@ DATA_DIR = BASE_DIR / "data"
 DOWNLOADS_DIR = BASE_DIR / "downloads"
 SCRIPTS_DIR = BASE_DIR / "scripts"
 TEMP_DIR = BASE_DIR / "incomplete"  # Changed from "temp" to "incomplete"
+# Partials now live inside the downloads location, in this hidden folder, so a
+# finished .part is renamed into place on the same filesystem instead of being
+# copied across disks.  TEMP_DIR above is only read to adopt old partials.
+PARTIAL_DIRNAME = ".incomplete"
+# Content-addressed store for deduplication, also inside the downloads
+# location (scripts/store.py).
+STORE_DIRNAME = ".store"
 
 # File Paths
 PERSISTENT_FILE = DATA_DIR / "persistent.json"
+HISTORY_FILE = DATA_DIR / "history.jsonl"  # one HISTORY_ENTRY per completed download
+QUEUE_FILE = DATA_DIR / "queue.json"       # the daemon's persistent job list
+DAEMON_FILE = DATA_DIR / "daemon.json"     # port, token and pid of the running daemon (0600)
 REQUIREMENTS_FILE = DATA_DIR / "requirements.txt"
 
 # Retry and Refresh Options
@@ -50,15 +79,81 @@ REFRESH_OPTIONS = [1, 2, 4, 8]
 FS_UPDATE_INTERVAL = 5
 DISPLAY_REFRESH = 1
 
+# Scheduler (scripts/scheduler.py), used by menu batches, `get --parallel`
+# and the daemon.  per_host keeps one mirror from taking every slot;
+# busy_delay is how long a job waits when another one is writing its file.
+SCHEDULER_SETTINGS = {
+    "max_parallel": 2,
+    "per_host": 2,
+    "preempt": True,
+    "busy_delay": 5.0
+}
+
+# Daemon (scripts/daemon.py).  Loopback only; port 0 picks a free one.
+DAEMON_SETTINGS = {
+    "host": "127.0.0.1",
+    "port": 8767,
+    "max_parallel": 2
+}
+
+# Prometheus metrics endpoint (scripts/metrics.py): `get/daemon --metrics`,
+# or RUNTIME_CONFIG["interface"]["metrics_port"] for the menu.  Loopback only.
+METRICS_SETTINGS = {
+    "host": "127.0.0.1",
+    "port": 9477
+}
+
+# Receive buffers (scripts/buffers.py): every download's buffer counts against
+# `budget`; when it is tight, chunks shrink to an equal share, never below
+# `min_chunk`.  `get/daemon --buffer-budget MB` overrides it.
+BUFFER_SETTINGS = {
+    "budget": 256 * 1024 * 1024,
+    "min_chunk": 256 * 1024
+}
+
+# .part writers (scripts/buffers.py).  The mmap backend maps `mmap_window`
+# bytes at a time, msyncs and journals every `sync_every` bytes, and all mmap
+# downloads together keep at most `dirty_budget` unsynced bytes in the page cache.
+# With RUNTIME_CONFIG["download"]["drop_cache"], synced pages leave the cache
+# `drop_step` bytes at a time.
+WRITE_SETTINGS = {
+    "mmap_window": 64 * 1024 * 1024,
+    "sync_every": 64 * 1024 * 1024,
+    "dirty_budget": 256 * 1024 * 1024,
+    "drop_step": 16 * 1024 * 1024
+}
+
+# Pre-flight header checks (scripts/preflight.py): the first `prefix` bytes of
+# a model file are range-fetched and checked before the transfer; a header
+# longer than that is fetched in full up to `max_header`.
+PREFLIGHT_SETTINGS = {
+    "prefix": 64 * 1024,
+    "max_header": 16 * 1024 * 1024
+}
+
+# Delta updates (scripts/delta.py).  A manifest is published as FILE + `suffix`
+# and describes FILE in `block_size` blocks; the rolling checksum covers the
+# first `weak_span` bytes of a block, and at most `roll_limit` bytes of an old
+# copy are searched byte by byte for blocks that moved.
+DELTA_SETTINGS = {
+    "suffix": ".dlsum",
+    "block_size": 256 * 1024,
+    "weak_span": 4096,
+    "roll_limit": 32 * 1024 * 1024
+}
+
 # DownloadS
 _pending_handlers = []
-ACTIVE_DOWNLOADS = []
+# One ProgressRecord per live transfer; see scripts/progress.py.
+ACTIVE_DOWNLOADS = ProgressRegistry()
 
 # Abort signalling.
 # Set by the background key listener the instant "A" is seen; read by the
-# download loop (which stops at the next chunk boundary) and by the download
-# display (which swaps the prompt for a "Stopping..." notice).
-ABORT_EVENT = threading.Event()
+# download loop, which stops mid-chunk (scripts/cancel.py), and by the download
+# display (which swaps the prompt for a "Stopping..." notice).  PAUSE_EVENT is
+# toggled by "P": a warm pause, connection kept.
+ABORT_EVENT = AbortEvent()
+PAUSE_EVENT = threading.Event()
 
 # Download_Tracking
 DOWNLOAD_TRACKING = {
@@ -201,6 +296,13 @@ RUNTIME_CONFIG = {
         "max_retries": 10,
         "bandwidth_limit": None,
         "auto_resume": True,
+        "receive": "pooled",        # or "iter_content", the old allocating loop; see scripts/buffers.py
+        "write_backend": "pwrite",  # or "mmap"; see scripts/buffers.py
+        "drop_cache": False,        # fadvise(DONTNEED) what is synced; see scripts/buffers.py
+        "idle_io": False,           # write at idle I/O priority
+        "warm_pause": 300,          # seconds a pause keeps the connection; see scripts/cancel.py
+        "tail_check": 64 * 1024,    # bytes re-fetched and compared on resume (0: off); see scripts/resume.py
+        "preflight": True,          # check model/archive headers before downloading; see scripts/preflight.py
         "huggingface": {
             "use_auth": False,
             "token": None,
@@ -219,7 +321,8 @@ RUNTIME_CONFIG = {
         "download_dir": str(DOWNLOADS_DIR),
         "keep_incomplete": True,
         "organize_by_type": False,
-        "auto_extract": False
+        "auto_extract": False,
+        "content_store": False      # dedupe completed files by SHA-256; see scripts/store.py
     },
     "interface": {
         "show_progress": True,
@@ -227,6 +330,8 @@ RUNTIME_CONFIG = {
         "show_eta": True,
         "dark_mode": False,
         "detailed_logging": False,
+        "event_stream": None,       # file or FIFO for JSON-lines events; see scripts/events.py
+        "metrics_port": None,       # Prometheus /metrics on this loopback port; see scripts/metrics.py
         "notification_sound": False,
         "progress_bar_style": "tqdm"
     }
@@ -241,7 +346,7 @@ RUNTIME_STATS = {
 
 # Content Types and Extensions
 CONTENT_TYPES = {
-    "model": [".ckpt", ".pt", ".pth", ".safetensors", ".bin", ".onnx", ".h5"],
+    "model": [".ckpt", ".pt", ".pth", ".safetensors", ".gguf", ".bin", ".onnx", ".h5"],
     "video": [".mp4", ".mkv", ".avi", ".mov", ".wmv", ".flv", ".webm", ".m4v", ".mpeg", ".mpg", ".3gp"],
     "audio": [".mp3", ".wav", ".flac", ".m4a", ".aac", ".ogg", ".wma", ".alac", ".aiff"],
     "document": [".pdf", ".doc", ".docx", ".txt", ".rtf", ".odt", ".xlsx", ".pptx", ".csv", ".epub"],
@@ -0,0 +1,508 @@
+# Script: `.\scripts\transport.py`
+
+# Imports
+import bisect
+import contextlib
+import http.client
+import json
+import re
+import socket
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ChunkedEncodingError, ConnectionError
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.response import HTTPResponse
+from urllib3.util.retry import Retry
+
+# ── Transport ────────────────────────────────────────────────────────────────
+# Every HTTP request the engine makes -- the probe in get_remote_file_info,
+# the Google Drive confirm hop, the body GET in download_file -- goes through
+# get_transport() instead of calling requests directly.  The default Transport
+# is plain requests and behaves exactly as before.
+#
+# FaultInjectingTransport exists so the code that only runs when a real CDN
+# misbehaves -- _resolve_response_mode, the no_resume restart, the
+# ChunkedEncodingError completion check -- can be driven on purpose.  It
+# replays a script of faults, each pinned to a request and, for body faults,
+# to an ABSOLUTE byte offset in the file (so "drop at 10 MB" means the same
+# thing on the first attempt and on a resume from 6 MB):
+#
+#   {"action": "drop",     "at": 10485760}   connection reset at that offset
+#   {"action": "truncate", "at": 10485760}   body ends cleanly, short
+#   {"action": "status",   "status": 503}    replace the status code
+#   {"action": "status",   "status": 429, "headers": {"Retry-After": "2"}}
+#   {"action": "delay",    "seconds": 1.5}   hold the response headers back
+#   {"action": "norange"}                    strip Range: the server sends 200
+#
+# plus optional "method" (default GET), "match" (regex on the URL), "nth"
+# (which matching request, 1-based, default 1) and "times" (default 1).  A
+# script is a JSON list of these; `launcher.py get --faults FILE` and the
+# benchmark both take one.
+#
+# It also keeps the books the benchmark needs: body bytes delivered per URL,
+# when each fault fired, and how long until the next response for that URL
+# arrived (recovery latency).
+
+
+READ_SLICE = 256 * 1024   # BodyReader reads a chunk this much at a time; see scripts/cancel.py
+
+
+# Classes
+class Transport:
+    """Plain requests.  Subclasses change what happens on the wire."""
+
+    def adapter(self, max_retries: Union[int, Retry] = 0) -> HTTPAdapter:
+        return HTTPAdapter(max_retries=max_retries)
+
+    def session(self, max_retries: Union[int, Retry] = 0) -> requests.Session:
+        session = requests.Session()
+        adapter = self.adapter(max_retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        with self.session() as session:
+            return session.head(url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        with self.session() as session:
+            return session.get(url, **kwargs)
+
+
+class BodyReader:
+    """readinto() over a streamed response body, into the caller's buffer.
+
+    A plain body is read straight from http.client's socket file (recv_into,
+    no bytes objects).  A content-encoded body, or one that is not a stock
+    urllib3 response (the _FaultyBody below), goes through raw.read() and is
+    copied in.  Errors come out as iter_content would raise them.
+
+    `stop()`, checked between READ_SLICE pieces, hands over a partly filled
+    buffer early; interrupt() wakes a read blocked on the socket.  Once
+    interrupted, a failed read returns what it has instead of raising.
+    """
+
+    def __init__(self, response: requests.Response, stop: Optional[Callable[[], bool]] = None):
+        raw = response.raw
+        encoding = response.headers.get("Content-Encoding", "").strip().lower()
+        fp = getattr(raw, "_fp", None) if isinstance(raw, HTTPResponse) else None
+        self.direct = fp is not None and hasattr(fp, "readinto") and encoding in ("", "identity")
+        self.interrupted = False
+        self._raw = raw
+        self._fp = fp
+        self.stop = stop
+        self._pending = b""   # decoded bytes that did not fit last time
+        self._error = None    # raised on the call after the bytes before it
+
+    def readinto(self, view: memoryview) -> int:
+        """Fill `view` as far as the body allows; 0 at the end of the body."""
+        if self._error is not None:
+            error = self._error
+            raise error if isinstance(error, requests.RequestException) else ChunkedEncodingError(error)
+        filled = 0
+        while filled < len(view) and self._error is None:
+            if self.stop is not None and self.stop():
+                break
+            try:
+                n = self._read_slice(view[filled:filled + READ_SLICE])
+            except (ConnectionError, ChunkedEncodingError) as e:
+                if self.interrupted:
+                    break
+                if filled:
+                    self._error = e   # deliver what arrived before it; raise next time
+                    break
+                raise
+            if not n:
+                break
+            filled += n
+        return filled
+
+    def interrupt(self) -> None:
+        """Shut the socket down under a blocked read (AbortEvent callback)."""
+        self.interrupted = True
+        sock = _response_socket(self._raw)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _read_slice(self, view: memoryview) -> int:
+        try:
+            if self.direct:
+                try:
+                    return self._fp.readinto(view) or 0
+                except http.client.IncompleteRead as e:
+                    # A chunked body cut off mid-read: the bytes before the
+                    # break are already in `view`.  Hand those over first --
+                    # they may be the whole file (SourceForge never sends the
+                    # terminating chunk) -- and fail on the next call.
+                    if not e.partial:
+                        raise
+                    self._error = e
+                    return len(e.partial)
+            data = self._pending or self._raw.read(len(view), decode_content=True)
+            n = min(len(data), len(view))
+            view[:n] = data[:n]
+            self._pending = data[n:]
+            return n
+        except (ReadTimeoutError, socket.timeout) as e:
+            raise ConnectionError(e)
+        except (ProtocolError, http.client.IncompleteRead, OSError) as e:
+            raise ChunkedEncodingError(e)
+
+
+class RangeError(Exception):
+    """Byte ranges of this URL cannot be had: the server refuses them, or they keep failing."""
+    pass
+
+
+class RangeFile:
+    """A remote file as a read-only, seekable file object, read with Range requests.
+
+    Opening it costs one suffix request, which proves range support, gives the
+    size, and caches the last `tail` bytes -- where a zip keeps its directory.
+    After that, consecutive reads share one streamed request; a read anywhere
+    else starts another.  Set `boundaries` (sorted offsets) and no request
+    runs past the next one, so nothing beyond what is read is ever fetched.
+    `fetched` and `requests` count what it cost.
+    """
+
+    def __init__(self, url: str, headers: Optional[Dict[str, str]] = None,
+                 tail: int = 1024 * 1024, timeout: float = 120, attempts: int = 3):
+        self.url = url
+        self.headers = dict(headers or {})
+        self.headers["Accept-Encoding"] = "identity"
+        self.timeout = timeout
+        self.attempts = attempts
+        self.boundaries: List[int] = []
+        self.fetched = 0
+        self.requests = 0
+        self._session = get_transport().session()
+        self._pos = 0
+        self._response = None
+        self._stream_pos = self._stream_end = 0
+        response = self._get(f"bytes=-{tail}")
+        with response:
+            match = re.match(r"bytes (\d+)-(\d+)/(\d+)", response.headers.get("Content-Range", ""))
+            if response.status_code != 206 or not match:
+                self.close()
+                raise RangeError(f"the server answered HTTP {response.status_code} to a range request")
+            self._cache_start = int(match.group(1))
+            self._cache = response.content
+        self.size = int(match.group(3))
+        self.fetched += len(self._cache)
+
+    def read(self, n: Optional[int] = -1) -> bytes:
+        if n is None or n < 0:
+            n = self.size - self._pos
+        end = min(self.size, self._pos + max(0, n))
+        parts: List[bytes] = []
+        while self._pos < end:
+            offset = self._pos - self._cache_start
+            if 0 <= offset < len(self._cache):
+                data = self._cache[offset:offset + end - self._pos]
+            else:
+                data = self._read_stream(end)
+            parts.append(data)
+            self._pos += len(data)
+        return b"".join(parts)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        base = (0, self._pos, self.size)[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seekable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        self._close_stream()
+        self._session.close()
+
+    def __enter__(self) -> "RangeFile":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _get(self, spec: str) -> requests.Response:
+        headers = dict(self.headers, Range=spec)
+        self.requests += 1
+        return self._session.get(self.url, headers=headers, stream=True, timeout=self.timeout)
+
+    def _read_stream(self, end: int) -> bytes:
+        """Some bytes from self._pos on, at most up to `end`, off the open stream."""
+        pos, failures = self._pos, 0
+        while True:
+            try:
+                if self._response is None or self._stream_pos != pos:
+                    self._open_stream(pos, end)
+                data = self._response.raw.read(min(end, self._stream_end) - pos)
+            except (requests.RequestException, ProtocolError, ReadTimeoutError,
+                    http.client.HTTPException, OSError) as e:
+                data, error = b"", e
+            else:
+                error = "the body ended early"
+            if data:
+                break
+            self._close_stream()
+            failures += 1
+            if failures >= self.attempts:
+                raise RangeError(f"reading {self.url} at {pos} failed: {error}")
+        self._stream_pos = pos + len(data)
+        self.fetched += len(data)
+        if self._stream_pos >= self._stream_end:
+            self._close_stream()
+        return data
+
+    def _open_stream(self, pos: int, end: int) -> None:
+        self._close_stream()
+        i = bisect.bisect_right(self.boundaries, pos)
+        if i < len(self.boundaries):
+            stop = self.boundaries[i]            # never past the next member
+        else:
+            stop = max(end, pos + READ_SLICE)    # a little read-ahead for small reads
+        if pos < self._cache_start:
+            stop = min(stop, self._cache_start)  # the rest is cached already
+        stop = min(self.size, stop)
+        response = self._get(f"bytes={pos}-{stop - 1}")
+        if response.status_code != 206 or _range_start(response) != pos:
+            response.close()
+            raise RangeError(f"the server answered HTTP {response.status_code} to a range request")
+        self._response, self._stream_pos, self._stream_end = response, pos, stop
+
+    def _close_stream(self) -> None:
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+
+class Fault:
+    """One scripted misbehaviour; see the table at the top of this module."""
+
+    ACTIONS = ("drop", "truncate", "status", "delay", "norange")
+
+    def __init__(self, action: str, at: Optional[int] = None, status: Optional[int] = None,
+                 seconds: float = 0.0, headers: Optional[Dict[str, str]] = None,
+                 method: str = "GET", match: str = "", nth: int = 1, times: int = 1):
+        if action not in self.ACTIONS:
+            raise ValueError(f"Unknown fault action: {action}")
+        self.action = action
+        self.at = at
+        self.status = status
+        self.seconds = seconds
+        self.headers = headers or {}
+        self.method = method.upper()
+        self.match = re.compile(match) if match else None
+        self.nth = nth
+        self.times = times
+        self.seen = 0
+        self.fired = 0
+
+    def wants(self, request: requests.PreparedRequest) -> bool:
+        """Count a matching request and say whether this fault applies to it."""
+        if request.method != self.method or (self.match and not self.match.search(request.url)):
+            return False
+        self.seen += 1
+        if self.seen >= self.nth and self.fired < self.times:
+            self.fired += 1
+            return True
+        return False
+
+
+class _FaultyBody:
+    """Stands in for response.raw; ends the body at a byte limit."""
+
+    def __init__(self, raw, limit: Optional[int], drop: bool, on_bytes: Callable[[int], None],
+                 on_fault: Callable[[], None]):
+        self._raw = raw
+        self._limit = limit
+        self._drop = drop
+        self._on_bytes = on_bytes
+        self._on_fault = on_fault
+        self._sent = 0
+        self._ended = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _end(self) -> bytes:
+        if not self._ended:
+            self._ended = True
+            self._on_fault()
+        if self._drop:
+            raise ProtocolError("Connection broken: injected fault")
+        return b""
+
+    def read(self, amt: Optional[int] = None, *args, **kwargs) -> bytes:
+        if self._limit is not None:
+            left = self._limit - self._sent
+            if left <= 0:
+                return self._end()
+            if self._drop and (amt is None or amt > left):
+                # A real reset mid-read loses what that read() had gathered,
+                # so the bytes up to the fault arrive but never reach the caller.
+                self._on_bytes(len(self._raw.read(left, *args, **kwargs)))
+                self._sent = self._limit
+                return self._end()
+            amt = left if amt is None else min(amt, left)
+        data = self._raw.read(amt, *args, **kwargs)
+        self._sent += len(data)
+        self._on_bytes(len(data))
+        return data
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        while True:
+            data = self.read(amt, decode_content=decode_content)
+            if not data:
+                return
+            yield data
+
+
+class _FaultAdapter(HTTPAdapter):
+    def __init__(self, transport: "FaultInjectingTransport", **kwargs):
+        self.transport = transport
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        return self.transport._send(self, request, **kwargs)
+
+
+class FaultInjectingTransport(Transport):
+    """Replays a fault script; counts delivered bytes and recovery latency."""
+
+    def __init__(self, faults: List[Fault]):
+        self.faults = faults
+        self.lock = threading.Lock()
+        # Optional: bytes already on disk for a URL, sampled as each request
+        # goes out, so a body that starts below it is data fetched twice.
+        self.on_disk: Optional[Callable[[str], int]] = None
+        self.delivered: Dict[str, int] = {}       # body bytes per URL
+        self.requests: List[Dict] = []            # method, url, range, status, offsets, time
+        self.fault_log: List[Dict] = []           # what fired, where, when
+        self._pending_recovery: Dict[str, float] = {}
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "FaultInjectingTransport":
+        with open(path, "r") as f:
+            return cls([Fault(**entry) for entry in json.load(f)])
+
+    def adapter(self, max_retries: Union[int, Retry] = 0) -> HTTPAdapter:
+        return _FaultAdapter(self, max_retries=max_retries)
+
+    def _send(self, adapter: HTTPAdapter, request, **kwargs):
+        url = request.url
+        with self.lock:
+            fired = [f for f in self.faults if f.wants(request)]
+        on_disk = self.on_disk(url) if self.on_disk is not None else None
+        for fault in fired:
+            if fault.action == "delay":
+                self._log(fault, url, recovers=False)
+                time.sleep(fault.seconds)
+            elif fault.action == "norange":
+                self._log(fault, url, recovers=False)
+                request.headers.pop("Range", None)
+
+        response = HTTPAdapter.send(adapter, request, **kwargs)
+        now = time.time()
+        with self.lock:
+            started = self._pending_recovery.pop(url, None)
+            self.requests.append({
+                "method": request.method, "url": url, "range": request.headers.get("Range"),
+                "status": response.status_code, "body_start": _range_start(response),
+                "on_disk": on_disk, "time": now,
+                "recovery": round(now - started, 4) if started else None
+            })
+
+        for fault in fired:
+            if fault.action == "status":
+                self._log(fault, url)
+                response.status_code = fault.status
+                response.headers.update(fault.headers)
+        if request.method == "GET":
+            body = [f for f in fired if f.action in ("drop", "truncate")]
+            limit = None
+            if body:
+                start = _range_start(response)
+                limit = max(0, body[0].at - start) if body[0].at is not None else 0
+            response.raw = _FaultyBody(
+                response.raw, limit, drop=bool(body) and body[0].action == "drop",
+                on_bytes=lambda n, u=url: self._count(u, n),
+                on_fault=lambda f=(body[0] if body else None), u=url: self._log(f, u)
+            )
+        return response
+
+    def _count(self, url: str, n: int) -> None:
+        with self.lock:
+            self.delivered[url] = self.delivered.get(url, 0) + n
+
+    def _log(self, fault: Optional[Fault], url: str, recovers: bool = True) -> None:
+        """Record a fault firing; the next response for `url` measures recovery."""
+        if fault is None:
+            return
+        with self.lock:
+            now = time.time()
+            self.fault_log.append({"action": fault.action, "url": url, "at": fault.at, "time": now})
+            if recovers:
+                self._pending_recovery[url] = now
+
+    def refetched(self, url: str) -> int:
+        """Bytes requested again although they were already on disk (needs on_disk)."""
+        return sum(max(0, r["on_disk"] - r["body_start"]) for r in self.requests
+                   if r["url"] == url and r["method"] == "GET" and r["on_disk"] is not None
+                   and r["status"] in (200, 206))
+
+
+# Globals
+_transport: Transport = Transport()
+
+
+# Functions
+def _range_start(response: requests.Response) -> int:
+    """First byte offset of a 206 body, from Content-Range; 0 otherwise."""
+    match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+    return int(match.group(1)) if match and response.status_code == 206 else 0
+
+
+def _response_socket(raw) -> Optional[socket.socket]:
+    """The socket under a streamed urllib3 response, or None."""
+    connection = getattr(raw, "_connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is None:
+        # Released from the pool already: reach it through http.client's file.
+        fp = getattr(getattr(raw, "_fp", None), "fp", None)
+        sock = getattr(getattr(fp, "raw", None), "_sock", None)
+    return sock if isinstance(sock, socket.socket) else None
+
+
+def get_transport() -> Transport:
+    return _transport
+
+
+def set_transport(transport: Transport) -> None:
+    global _transport
+    _transport = transport
+
+
+@contextlib.contextmanager
+def use_transport(transport: Transport):
+    """Swap the transport for the duration of a with-block."""
+    previous = get_transport()
+    set_transport(transport)
+    try:
+        yield transport
+    finally:
+        set_transport(previous)